@@ -21,8 +21,10 @@ from app.models import *  # Import all models
 config = context.config
 
 # Override sqlalchemy.url with environment variable if available
+# (migrations run synchronously, so the app's asyncpg driver is swapped
+# for psycopg2)
 if settings.DATABASE_URL:
-    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("+asyncpg", "+psycopg2"))
 
 # Interpret the config file for Python logging.
 if config.config_file_name is not None:
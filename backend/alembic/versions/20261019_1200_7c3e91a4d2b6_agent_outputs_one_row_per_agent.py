@@ -0,0 +1,157 @@
+"""agent_outputs: one row per agent per project, with version history
+
+Brings an agent_outputs table created before output versioning up to the
+current model:
+
+- adds the columns added since (error, routing metadata, tier upgrade
+  attempts, current_version);
+- creates agent_output_versions;
+- merges duplicate (project_id, agent_type) rows into the most recently
+  generated one, whose history becomes the rows that completed, oldest
+  first; the other rows are deleted;
+- recreates idx_project_agent as a unique index.
+
+This is the first revision. It, and the revisions after it, upgrade a
+database holding the schema the backend shipped with (projects,
+agent_outputs, workflow_templates, ...) to the current models.
+
+Revision ID: 7c3e91a4d2b6
+Revises:
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+import json
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.utils.text_delta import compress
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e91a4d2b6'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NEW_COLUMNS = [
+    ("error", "TEXT"),
+    ("provider", "VARCHAR(20)"),
+    ("model_name", "VARCHAR(100)"),
+    ("model_tier", "VARCHAR(20)"),
+    ("downgraded", "BOOLEAN DEFAULT false"),
+    ("upgrade_attempts", "INTEGER DEFAULT 0"),
+    ("last_upgrade_at", "TIMESTAMP"),
+    ("current_version", "INTEGER"),
+]
+
+# Duplicate rows with these statuses are kept as versions
+VERSIONED_STATUSES = ("completed", "approved", "rejected")
+
+
+def _merge_duplicates(bind) -> None:
+    """Fold each duplicate (project_id, agent_type) group into its latest row."""
+    groups = bind.execute(sa.text(
+        "SELECT project_id, agent_type FROM agent_outputs "
+        "GROUP BY project_id, agent_type HAVING count(*) > 1"
+    )).all()
+
+    for project_id, agent_type in groups:
+        rows = bind.execute(sa.text(
+            "SELECT id, status, content, content_html, content_markdown, tokens_used, "
+            "provider, model_name, model_tier, generated_at "
+            "FROM agent_outputs WHERE project_id = :project_id AND agent_type = :agent_type "
+            "ORDER BY generated_at NULLS FIRST, id"
+        ), {"project_id": project_id, "agent_type": agent_type}).mappings().all()
+        kept = rows[-1]
+
+        has_history = bind.execute(sa.text(
+            "SELECT count(*) FROM agent_output_versions WHERE output_id = :id"
+        ), {"id": kept["id"]}).scalar()
+
+        # Each completed row becomes a full (base) version, oldest first
+        version = 0
+        if not has_history:
+            for row in rows:
+                if row["status"] not in VERSIONED_STATUSES:
+                    continue
+                version += 1
+                bind.execute(sa.text(
+                    "INSERT INTO agent_output_versions (id, output_id, version, base_version, content, "
+                    "content_html_data, content_markdown_data, tokens_used, provider, model_name, "
+                    "model_tier, created_at) "
+                    "VALUES (:id, :output_id, :version, :version, CAST(:content AS JSONB), :html, "
+                    ":markdown, :tokens_used, :provider, :model_name, :model_tier, "
+                    "coalesce(:created_at, now()))"
+                ), {
+                    "id": uuid.uuid4(),
+                    "output_id": kept["id"],
+                    "version": version,
+                    "content": json.dumps(row["content"]),
+                    "html": compress(row["content_html"]),
+                    "markdown": compress(row["content_markdown"]),
+                    "tokens_used": row["tokens_used"],
+                    "provider": row["provider"],
+                    "model_name": row["model_name"],
+                    "model_tier": row["model_tier"],
+                    "created_at": row["generated_at"],
+                })
+
+        if version and kept["status"] in VERSIONED_STATUSES:
+            bind.execute(sa.text(
+                "UPDATE agent_outputs SET current_version = :version WHERE id = :id"
+            ), {"version": version, "id": kept["id"]})
+
+        bind.execute(sa.text(
+            "DELETE FROM agent_outputs WHERE project_id = :project_id "
+            "AND agent_type = :agent_type AND id != :id"
+        ), {"project_id": project_id, "agent_type": agent_type, "id": kept["id"]})
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for name, definition in NEW_COLUMNS:
+        op.execute(f"ALTER TABLE agent_outputs ADD COLUMN IF NOT EXISTS {name} {definition}")
+
+    if not inspector.has_table("agent_output_versions"):
+        op.create_table(
+            "agent_output_versions",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column(
+                "output_id",
+                postgresql.UUID(as_uuid=True),
+                sa.ForeignKey("agent_outputs.id", ondelete="CASCADE"),
+                nullable=False
+            ),
+            sa.Column("version", sa.Integer, nullable=False),
+            sa.Column("base_version", sa.Integer, nullable=False),
+            sa.Column("content", postgresql.JSONB, nullable=False),
+            sa.Column("content_html_data", sa.LargeBinary),
+            sa.Column("content_markdown_data", sa.LargeBinary),
+            sa.Column("tokens_used", sa.Integer),
+            sa.Column("provider", sa.String(20)),
+            sa.Column("model_name", sa.String(100)),
+            sa.Column("model_tier", sa.String(20)),
+            sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.now()),
+        )
+        op.create_index("idx_output_version", "agent_output_versions", ["output_id", "version"], unique=True)
+
+    _merge_duplicates(bind)
+
+    op.execute("DROP INDEX IF EXISTS idx_project_agent")
+    op.create_index("idx_project_agent", "agent_outputs", ["project_id", "agent_type"], unique=True)
+
+
+def downgrade() -> None:
+    # Merged duplicate rows are not restored; their content is in the history
+    op.execute("DROP INDEX IF EXISTS idx_project_agent")
+    op.create_index("idx_project_agent", "agent_outputs", ["project_id", "agent_type"])
+    op.drop_table("agent_output_versions")
+    for name, _ in reversed(NEW_COLUMNS):
+        op.execute(f"ALTER TABLE agent_outputs DROP COLUMN IF EXISTS {name}")
@@ -0,0 +1,31 @@
+"""projects: match_result
+
+Adds the stored challenge matching result (challenge_matcher.match_project).
+
+Revision ID: f341794ab913
+Revises: 7c3e91a4d2b6
+Create Date: 2026-10-19 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f341794ab913'
+down_revision: Union[str, None] = '7c3e91a4d2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("projects")}
+    if "match_result" not in columns:
+        op.add_column("projects", sa.Column("match_result", postgresql.JSONB, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("projects", "match_result")
@@ -0,0 +1,57 @@
+"""workflow_templates: slug and base_price
+
+Adds the template's stable slug, unique, and its optional base_price.
+Existing templates get their name as slug (truncated to the column); where
+two names would clash only the oldest template takes it, and the others
+keep a NULL slug and are still found by name.
+
+Revision ID: 65d7184a844f
+Revises: f341794ab913
+Create Date: 2026-10-19 12:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '65d7184a844f'
+down_revision: Union[str, None] = 'f341794ab913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Postgres' name for the model's Column(unique=True) constraint
+SLUG_CONSTRAINT = "workflow_templates_slug_key"
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column["name"] for column in inspector.get_columns("workflow_templates")}
+
+    if "slug" not in columns:
+        op.add_column("workflow_templates", sa.Column("slug", sa.String(100), nullable=True))
+    if "base_price" not in columns:
+        op.add_column("workflow_templates", sa.Column("base_price", sa.DECIMAL(10, 2), nullable=True))
+
+    op.execute("""
+        UPDATE workflow_templates AS t SET slug = left(t.name, 100)
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY left(name, 100) ORDER BY created_at, id) AS n
+            FROM workflow_templates WHERE slug IS NULL
+        ) AS ranked
+        WHERE t.id = ranked.id AND ranked.n = 1
+          AND NOT EXISTS (SELECT 1 FROM workflow_templates o WHERE o.slug = left(t.name, 100))
+    """)
+
+    unique = {constraint["name"] for constraint in inspector.get_unique_constraints("workflow_templates")}
+    if SLUG_CONSTRAINT not in unique:
+        op.create_unique_constraint(SLUG_CONSTRAINT, "workflow_templates", ["slug"])
+
+
+def downgrade() -> None:
+    op.drop_constraint(SLUG_CONSTRAINT, "workflow_templates", type_="unique")
+    op.drop_column("workflow_templates", "base_price")
+    op.drop_column("workflow_templates", "slug")
@@ -0,0 +1,43 @@
+"""agent_latency_stats
+
+Creates the persisted rolling latency statistics (latency_model).
+
+Revision ID: df0a094b0350
+Revises: 65d7184a844f
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'df0a094b0350'
+down_revision: Union[str, None] = '65d7184a844f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("agent_latency_stats"):
+        return
+
+    op.create_table(
+        "agent_latency_stats",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("agent_type", sa.String(50), nullable=False),
+        sa.Column("model_name", sa.String(255), nullable=False),
+        sa.Column("sample_count", sa.Integer),
+        sa.Column("ewma_seconds", sa.Float, nullable=False),
+        sa.Column("p50_seconds", sa.Float, nullable=False),
+        sa.Column("p95_seconds", sa.Float, nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP, server_default=sa.func.now()),
+        sa.UniqueConstraint("agent_type", "model_name", name="uq_latency_agent_model"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("agent_latency_stats")
@@ -0,0 +1,50 @@
+"""orchestration_checkpoints
+
+Creates the per-project orchestration checkpoints (agent_orchestrator).
+
+Revision ID: 4bc6a6654907
+Revises: df0a094b0350
+Create Date: 2026-10-19 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4bc6a6654907'
+down_revision: Union[str, None] = 'df0a094b0350'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("orchestration_checkpoints"):
+        return
+
+    op.create_table(
+        "orchestration_checkpoints",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "project_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("projects.id", ondelete="CASCADE"),
+            nullable=False
+        ),
+        sa.Column("input_hash", sa.String(64), nullable=False),
+        sa.Column("context", postgresql.JSONB, nullable=False),
+        sa.Column("completed_agents", postgresql.ARRAY(sa.Text), nullable=False),
+        sa.Column("failed_agent", sa.String(50)),
+        sa.Column("error", sa.Text),
+        sa.Column("status", sa.String(50)),
+        sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.TIMESTAMP, server_default=sa.func.now()),
+        sa.UniqueConstraint("project_id", name="uq_checkpoint_project"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("orchestration_checkpoints")
@@ -0,0 +1,42 @@
+"""reusable_outputs
+
+Creates the cross-project store of canonical agent responses (output_reuse).
+
+Revision ID: a068d12aada0
+Revises: 4bc6a6654907
+Create Date: 2026-10-19 12:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a068d12aada0'
+down_revision: Union[str, None] = '4bc6a6654907'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("reusable_outputs"):
+        return
+
+    op.create_table(
+        "reusable_outputs",
+        sa.Column("fingerprint", sa.String(64), primary_key=True),
+        sa.Column("agent_type", sa.String(50), nullable=False),
+        sa.Column("text", sa.Text, nullable=False),
+        sa.Column("provider", sa.String(20)),
+        sa.Column("model_name", sa.String(100)),
+        sa.Column("tokens_used", sa.Integer),
+        sa.Column("hits", sa.Integer),
+        sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.now()),
+    )
+    op.create_index("idx_reusable_agent_created", "reusable_outputs", ["agent_type", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("reusable_outputs")
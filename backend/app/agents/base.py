@@ -2,34 +2,101 @@
 Base Agent class - Parent class for all AI agents.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from contextvars import ContextVar
 from datetime import datetime
+import asyncio
 import time
 import logging
 
+from sqlalchemy import select
+
 from app.models.agent_output import AgentOutput
 from app.models.project import Project
+from app.services.latency_model import latency_model
+from app.services.model_tiering import model_for_tier, TIER_LADDER
+from app.services.provider_router import provider_router
+from app.services.output_reuse import (
+    output_reuse, canonicalize_prompt, canonicalize_response, substitute, request_fingerprint
+)
+from app.services.output_history import output_history
+from app.utils.json_extract import extract_json, validate_json, JSONExtractionError
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Tier chosen for the agent run in progress, its project, and the
+# provider/model that served it
+_run_state: ContextVar[Optional[Dict[str, Any]]] = ContextVar("run_state", default=None)
+
+
+class AgentTimeoutError(Exception):
+    """Raised when an agent exceeds its deadline."""
+    pass
+
 
 class BaseAgent(ABC):
     """
     Base class for all AI agents.
     Each agent must implement the process() method.
+
+    Agents call generate(), which goes through the provider router: local
+    model, API provider or local-first with API overflow, per LLM_MODE.
+    Agents that produce JSON set `output_schema` (a JSON Schema) and pass it
+    to generate() to get structured output.
+
+    Agents keep their static instructions in `prompt_prefix`, which is sent
+    as the system prompt, and _build_prompt() returns only the
+    project-specific details. Every request from an agent then starts with
+    the same bytes, so backends can serve that prefix from their cache.
+
+    Agents whose prompts depend on the project only through a few fields
+    that the response at most echoes (like the business name) map them to
+    the label of their prompt line in `reuse_fields`, and list the response
+    fields that may echo them in `reuse_output_fields`; with a TTL in
+    AGENT_OUTPUT_REUSE_TTL_HOURS, a response to an identical request for
+    another project is then reused with those fields filled in (see
+    output_reuse).
     """
 
-    def __init__(self, agent_type: str, model_name: str):
+    output_schema: Optional[Dict[str, Any]] = None
+    prompt_prefix: str = ""
+    reuse_fields: Dict[str, str] = {}
+    reuse_output_fields: List[str] = []
+
+    def __init__(self, agent_type: str, model_tier: str, api_provider: str):
         """
         Initialize base agent.
 
         Args:
             agent_type: Type of agent (overview, proposal, etc.)
-            model_name: AI model to use
+            model_tier: Default model tier ("opus", "sonnet", "haiku")
+            api_provider: "anthropic" or "gemini" - used in API mode and for
+                          hybrid-mode overflow
         """
         self.agent_type = agent_type
-        self.model_name = model_name
+        self.model_tier = model_tier
+        self.api_provider = api_provider
+        # Where requests go first, and the default model there
+        self.provider = provider_router.primary_provider(api_provider)
+        self.model_name = model_for_tier(self.provider, model_tier)
+
+    @property
+    def active_tier(self) -> str:
+        """Tier for the current run: the tiering policy's choice, else the default."""
+        state = _run_state.get()
+        return state["tier"] if state else self.model_tier
+
+    @property
+    def db_session(self):
+        """
+        The current run's database session.
+
+        Changes process() makes through it (without committing) are
+        committed together with the output, or rolled back if it fails.
+        """
+        state = _run_state.get()
+        return state["db_session"] if state else None
 
     @abstractmethod
     async def process(self, project: Project, context: Dict[str, Any]) -> Dict[str, Any]:
@@ -49,7 +116,11 @@ class BaseAgent(ABC):
         self,
         project: Project,
         context: Dict[str, Any],
-        db_session
+        db_session,
+        timeout: Optional[float] = None,
+        model_tier: Optional[str] = None,
+        preserve_on_failure: bool = False,
+        reuse_outputs: bool = True
     ) -> AgentOutput:
         """
         Run the agent and save output to database.
@@ -58,33 +129,98 @@ class BaseAgent(ABC):
             project: Project instance
             context: Additional context
             db_session: Database session
+            timeout: Deadline in seconds for process(), capped at
+                     AGENT_TIMEOUT. When it passes, the in-flight LLM
+                     request is cancelled and the output marked timed_out.
+            model_tier: Tier to use instead of the default (tier downgrade)
+            preserve_on_failure: Keep the existing content and status if
+                                 this run fails (off-peak upgrade runs)
+            reuse_outputs: Reuse stored responses from other projects (False
+                           forces a fresh response, which is then stored)
 
         Returns:
             AgentOutput instance
+
+        Raises:
+            AgentTimeoutError: If the deadline passed
         """
         start_time = time.time()
+        timeout = min(timeout or settings.AGENT_TIMEOUT, settings.AGENT_TIMEOUT)
+        model_tier = model_tier or self.model_tier
+        previous_status = None
+        state = {
+            "tier": model_tier,
+            "project": project,
+            "db_session": db_session,
+            "reuse_outputs": reuse_outputs,
+            "provider": None,
+            "model": None,
+            "served_tier": None
+        }
+        state_token = _run_state.set(state)
 
         try:
             logger.info(f"Running {self.agent_type} agent for project {project.id}")
 
-            # Create pending output record
-            output = AgentOutput(
-                project_id=project.id,
-                agent_type=self.agent_type,
-                content={},
-                status="generating",
-                generated_at=datetime.utcnow()
+            # Reuse the existing output record when regenerating, so there is
+            # only ever one row per (project, agent_type); earlier content is
+            # kept in its version history
+            existing = await db_session.execute(
+                select(AgentOutput)
+                .where(
+                    AgentOutput.project_id == project.id,
+                    AgentOutput.agent_type == self.agent_type
+                )
+                .order_by(AgentOutput.generated_at.desc())
+                .limit(1)
             )
-            db_session.add(output)
+            output = existing.scalars().first()
+
+            if output is None:
+                output = AgentOutput(
+                    project_id=project.id,
+                    agent_type=self.agent_type,
+                    content={},
+                    status="generating",
+                    generated_at=datetime.utcnow()
+                )
+                db_session.add(output)
+            else:
+                previous_status = output.status
+                output.status = "regenerating"
+                output.generated_at = datetime.utcnow()
+                output.approved_by = None
+                output.approved_at = None
+                output.rejection_reason = None
+                output.error = None
+
             await db_session.commit()
             await db_session.refresh(output)
 
-            # Process
-            result = await self.process(project, context)
+            # Process (cancelled if the deadline passes) in a savepoint, so
+            # anything it stages through db_session is committed with the
+            # output or discarded if it fails
+            savepoint = await db_session.begin_nested()
+            try:
+                result = await asyncio.wait_for(self.process(project, context), timeout=timeout)
+            except asyncio.TimeoutError:
+                await savepoint.rollback()
+                raise AgentTimeoutError(
+                    f"{self.agent_type} agent timed out after {timeout:.0f}s"
+                )
+            except BaseException:
+                await savepoint.rollback()
+                raise
+            await savepoint.commit()
 
             # Calculate metrics
             end_time = time.time()
             generation_time = int(end_time - start_time)
+            provider = state["provider"] or self.provider
+            # A generate() call may pick its own tier (e.g. the proposal summary)
+            served_tier = state["served_tier"] or model_tier
+            model_name = state["model"] or model_for_tier(provider, served_tier)
+            latency_model.record(self.agent_type, model_name, end_time - start_time)
 
             # Update output with results
             output.content = result.get("content", {})
@@ -93,28 +229,116 @@ class BaseAgent(ABC):
             output.status = "completed"
             output.tokens_used = result.get("tokens_used", 0)
             output.generation_time_seconds = generation_time
+            output.provider = provider
+            output.model_name = model_name
+            output.model_tier = served_tier
+            output.downgraded = TIER_LADDER.index(served_tier) > TIER_LADDER.index(self.model_tier)
+            # An output still below its default tier (e.g. a cheaper summary
+            # tier) keeps its upgrade count, so upgrades stay capped
+            if not output.downgraded:
+                output.upgrade_attempts = 0
+            await output_history.record(db_session, output)
 
             await db_session.commit()
             await db_session.refresh(output)
 
             logger.info(
                 f"{self.agent_type} agent completed for project {project.id} "
-                f"in {generation_time}s"
+                f"in {generation_time}s ({provider}: {model_name})"
             )
 
             return output
 
+        except asyncio.CancelledError:
+            logger.warning(f"{self.agent_type} agent cancelled for project {project.id}")
+
+            if 'output' in locals():
+                await self._mark_output(output, db_session, "failed", "Cancelled", previous_status, preserve_on_failure)
+
+            raise
+
         except Exception as e:
             logger.error(f"{self.agent_type} agent failed for project {project.id}: {e}")
 
             # Mark as failed
             if 'output' in locals():
-                output.status = "failed"
-                output.content = {"error": str(e)}
-                await db_session.commit()
+                status = "timed_out" if isinstance(e, AgentTimeoutError) else "failed"
+                await self._mark_output(output, db_session, status, str(e), previous_status, preserve_on_failure)
 
             raise
 
+        finally:
+            _run_state.reset(state_token)
+
+    async def _mark_output(
+        self,
+        output: AgentOutput,
+        db_session,
+        status: str,
+        error: str,
+        previous_status: Optional[str] = None,
+        preserve: bool = False
+    ) -> None:
+        """
+        Record a terminal failure status without masking the original error.
+
+        Content is only replaced on success, so a failed regeneration keeps
+        the previous output (and its current_version) and records the error
+        alongside; a first run that fails has no content to keep.
+        """
+        try:
+            output.error = error
+            if preserve and previous_status:
+                output.status = previous_status
+            else:
+                output.status = status
+                has_content = output.current_version is not None or previous_status in (
+                    "completed", "approved", "rejected"
+                )
+                if not has_content:
+                    output.content = {"error": error}
+                    output.content_html = None
+                    output.content_markdown = None
+            await db_session.commit()
+        except Exception as e:
+            await db_session.rollback()
+            logger.error(f"Could not mark {self.agent_type} output as {status}: {e}")
+
+    def parse_json_output(self, text: str, default: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Extract the agent's JSON output from a model response.
+
+        Recovers JSON wrapped in prose or code fences and output truncated
+        at max_tokens, then validates it against `output_schema`. Schema
+        violations are logged but the recovered data is kept.
+
+        Args:
+            text: Model response
+            default: Returned if no JSON can be recovered; if None, raise
+
+        Returns:
+            Parsed JSON object
+
+        Raises:
+            JSONExtractionError: If no JSON can be recovered and no default given
+        """
+        try:
+            content = extract_json(text)
+        except JSONExtractionError as e:
+            if default is None:
+                raise
+            logger.warning(f"{self.agent_type} agent returned no usable JSON ({e}), using default")
+            return default
+
+        if self.output_schema:
+            errors = validate_json(content, self.output_schema)
+            if errors:
+                logger.warning(
+                    f"{self.agent_type} output does not match schema: {'; '.join(errors[:5])}"
+                )
+
+        return content
+
     def format_prompt(self, template: str, **kwargs) -> str:
         """
         Format prompt template with variables.
@@ -132,42 +356,142 @@ class BaseAgent(ABC):
             logger.error(f"Missing variable in prompt template: {e}")
             raise
 
-    async def generate_text(
+    def mark_served(self, provider: str, model: str, tier: Optional[str] = None) -> None:
+        """Record the provider, model and tier (None without a model) behind the current run's output."""
+        state = _run_state.get()
+        if state is not None:
+            state["provider"] = provider
+            state["model"] = model
+            state["served_tier"] = tier
+
+    async def generate(
         self,
         prompt: str,
-        model: str,
         temperature: float = 0.7,
-        max_tokens: int = 4000
+        max_tokens: int = 4000,
+        json_schema: Optional[Dict[str, Any]] = None,
+        system: Optional[str] = None,
+        tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Generate text using either API or local LLM based on settings.
+        Generate text at the run's tier on the provider chosen by LLM_MODE.
 
         Args:
             prompt: Input prompt
-            model: Model name (local or API)
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            json_schema: Optional JSON Schema for structured output
+            system: System instructions (defaults to the agent's prompt_prefix)
+            tier: Tier for this request instead of the run's tier
 
         Returns:
             Dict with 'text' and 'tokens_used' keys
         """
-        if settings.LLM_MODE == "local":
-            # Use local LLM
-            from app.services.local_llm_service import local_llm
-
-            result = await local_llm.generate(
-                prompt=prompt,
-                model=model,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+        tier = tier or self.active_tier
+        system = self.prompt_prefix if system is None else system
+
+        reuse = self._reuse_request(prompt, system, tier, temperature, max_tokens, json_schema)
+        if reuse is not None and _run_state.get()["reuse_outputs"]:
+            fingerprint, values = reuse
+            try:
+                stored = await output_reuse.get(
+                    fingerprint, settings.AGENT_OUTPUT_REUSE_TTL_HOURS[self.agent_type] * 3600
+                )
+            except Exception as e:
+                logger.warning(f"Output reuse lookup failed for {self.agent_type}: {e}")
+                stored = None
+
+            if stored is not None:
+                logger.info(f"Reusing a stored {self.agent_type} response ({stored['tokens_used']} tokens saved)")
+                self.mark_served("reuse", "output_reuse", tier)
+                return {
+                    "text": substitute(stored["text"], values, self.reuse_output_fields),
+                    "tokens_used": 0
+                }
+
+        result = await provider_router.generate(
+            agent_type=self.agent_type,
+            tier=tier,
+            api_provider=self.api_provider,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_schema=json_schema,
+            system=system
+        )
+
+        # Record what actually served the run (hybrid mode may overflow)
+        self.mark_served(result["provider"], result["model"], tier)
+
+        if reuse is not None and self._reusable(result["text"], json_schema):
+            fingerprint, values = reuse
+            # None if the response mentions the values outside
+            # reuse_output_fields, i.e. is specific to this project
+            canonical = canonicalize_response(result["text"], values, self.reuse_output_fields)
+            if canonical is not None:
+                try:
+                    await output_reuse.put(
+                        fingerprint,
+                        self.agent_type,
+                        canonical,
+                        result["provider"],
+                        result["model"],
+                        result["usage"].get("total_tokens", 0)
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not store {self.agent_type} response for reuse: {e}")
+
+        return {
+            "text": result["text"],
+            "tokens_used": result["usage"].get("total_tokens", 0)
+        }
+
+    def _reusable(self, text: str, json_schema: Optional[Dict[str, Any]]) -> bool:
+        """Whether a response is worth storing (JSON responses must parse)."""
+        if not text.strip():
+            return False
+        if json_schema is None:
+            return True
+        try:
+            extract_json(text)
+            return True
+        except JSONExtractionError:
+            return False
 
-            return {
-                "text": result["text"],
-                "tokens_used": result["usage"].get("total_tokens", 0)
-            }
+    def _reuse_request(
+        self,
+        prompt: str,
+        system: str,
+        tier: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]]
+    ) -> Optional[tuple]:
+        """
+        Fingerprint of this request with the project's reuse_fields
+        replaced by placeholders on their prompt lines, if the agent has
+        opted in to reuse and the prompt has those lines.
 
-        else:
-            # Use API mode - agents will handle their own API calls
-            # This method is just for local mode
-            raise ValueError("generate_text should only be called in local mode")
+        Returns:
+            (fingerprint, field values), or None
+        """
+        state = _run_state.get()
+        project = state.get("project") if state else None
+        if not self.reuse_fields or project is None or self.agent_type not in settings.AGENT_OUTPUT_REUSE_TTL_HOURS:
+            return None
+
+        values = {field: str(getattr(project, field, None) or "") for field in self.reuse_fields}
+        canonical_prompt = canonicalize_prompt(prompt, self.reuse_fields, values)
+        if canonical_prompt is None:
+            return None
+
+        fingerprint = request_fingerprint(
+            self.agent_type,
+            tier,
+            prompt=canonical_prompt,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_schema=json_schema
+        )
+        return fingerprint, values
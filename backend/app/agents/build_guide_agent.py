@@ -1,23 +1,90 @@
 """
-Build Guide Agent - Creates implementation checklist using Claude Sonnet.
+Build Guide Agent - Creates implementation checklist using local LLM or Claude Sonnet.
 """
 from typing import Dict, Any
-from anthropic import Anthropic
 
 from app.agents.base import BaseAgent
 from app.models.project import Project
-from app.config import settings
+
+
+BUILD_GUIDE_PROMPT_PREFIX = """You are creating an implementation guide for the DeepFlow team to build this client's automation.
+
+The client, complexity, estimated hours, timeline, automations to build, enquiry sources and admin method are given after these instructions. Replace every <placeholder> below with the matching project detail.
+
+Create a detailed build guide in Markdown format:
+
+# Build Guide: <business name>
+
+## Project Overview
+- Client: <contact name>
+- Timeline: <weeks> weeks
+- Complexity: <complexity>
+- Total Hours: <estimated hours>
+
+## Phase 1: Discovery & Setup (Week 1)
+### Tasks:
+- [ ] Schedule kickoff call with <contact name>
+- [ ] Gather API credentials needed (based on their enquiry sources)
+- [ ] Document current process (observe for 2-3 days)
+- [ ] Set up development environment
+
+## Phase 2: Build Workflows (Week 2-<weeks - 1>)
+For each automation:
+
+### [Automation Name]
+**Purpose:** [what it does]
+
+**n8n Workflow Steps:**
+1. Trigger: [trigger type]
+2. Data Processing: [what to do]
+3. Actions: [what happens]
+
+**Configuration Needed:**
+- [API keys]
+- [Client-specific settings]
+
+**Testing Checklist:**
+- [ ] Test trigger works
+- [ ] Test data flows correctly
+- [ ] Test error handling
+- [ ] Test with real client data
+
+## Phase 3: Testing & Training (Week <weeks>)
+- [ ] End-to-end test all workflows
+- [ ] Client UAT session
+- [ ] Create training materials
+- [ ] Handoff documentation
+
+## Deployment Checklist
+- [ ] All workflows tested in staging
+- [ ] Client approval obtained
+- [ ] Production deployment
+- [ ] Monitor for 24-48 hours
+- [ ] Client training completed
+- [ ] Support documentation provided
+
+## Potential Gotchas
+- [List any technical challenges specific to their setup]
+- [Integration complexities]
+- [Data migration needs]
+
+IMPORTANT: Output ONLY the Markdown. No explanations before or after.
+
+---
+"""
 
 
 class BuildGuideAgent(BaseAgent):
     """Build Guide Agent for creating implementation plans."""
 
+    prompt_prefix = BUILD_GUIDE_PROMPT_PREFIX
+
     def __init__(self):
         super().__init__(
             agent_type="build_guide",
-            model_name=settings.CLAUDE_SONNET_MODEL
+            model_tier="sonnet",
+            api_provider="anthropic"
         )
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
 
     async def process(self, project: Project, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -32,23 +99,20 @@ class BuildGuideAgent(BaseAgent):
 
         prompt = self._build_prompt(project, matched_templates, complexity, estimated_hours)
 
-        response = self.client.messages.create(
-            model=self.model_name,
-            max_tokens=3000,
+        result = await self.generate(
+            prompt=prompt,
             temperature=0.7,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
+            max_tokens=3000
         )
 
-        markdown_content = response.content[0].text
+        markdown_content = result["text"]
 
         return {
             "content": {
                 "estimated_hours": estimated_hours
             },
             "content_markdown": markdown_content,
-            "tokens_used": response.usage.input_tokens + response.usage.output_tokens
+            "tokens_used": result["tokens_used"]
         }
 
     def _build_prompt(
@@ -68,9 +132,8 @@ class BuildGuideAgent(BaseAgent):
         enquiry_sources = ", ".join(project.enquiry_sources)
         weeks = (estimated_hours // 24) + 1  # Rough estimate
 
-        prompt = f"""You are creating an implementation guide for the DeepFlow team to build this client's automation.
-
-Client: {project.business_name}
+        return f"""Client: {project.business_name}
+Contact: {project.client_name}
 Complexity: {complexity}
 Estimated Hours: {estimated_hours}
 Timeline: {weeks} weeks
@@ -80,64 +143,4 @@ Automations to Build:
 
 Enquiry Sources: {enquiry_sources}
 Admin Method: {project.admin_method}
-
-Create a detailed build guide in Markdown format:
-
-# Build Guide: {project.business_name}
-
-## Project Overview
-- Client: {project.client_name}
-- Timeline: {weeks} weeks
-- Complexity: {complexity}
-- Total Hours: {estimated_hours}
-
-## Phase 1: Discovery & Setup (Week 1)
-### Tasks:
-- [ ] Schedule kickoff call with {project.client_name}
-- [ ] Gather API credentials needed (based on their enquiry sources)
-- [ ] Document current process (observe for 2-3 days)
-- [ ] Set up development environment
-
-## Phase 2: Build Workflows (Week 2-{weeks-1})
-For each automation:
-
-### [Automation Name]
-**Purpose:** [what it does]
-
-**n8n Workflow Steps:**
-1. Trigger: [trigger type]
-2. Data Processing: [what to do]
-3. Actions: [what happens]
-
-**Configuration Needed:**
-- [API keys]
-- [Client-specific settings]
-
-**Testing Checklist:**
-- [ ] Test trigger works
-- [ ] Test data flows correctly
-- [ ] Test error handling
-- [ ] Test with real client data
-
-## Phase 3: Testing & Training (Week {weeks})
-- [ ] End-to-end test all workflows
-- [ ] Client UAT session
-- [ ] Create training materials
-- [ ] Handoff documentation
-
-## Deployment Checklist
-- [ ] All workflows tested in staging
-- [ ] Client approval obtained
-- [ ] Production deployment
-- [ ] Monitor for 24-48 hours
-- [ ] Client training completed
-- [ ] Support documentation provided
-
-## Potential Gotchas
-- [List any technical challenges specific to their setup]
-- [Integration complexities]
-- [Data migration needs]
-
-IMPORTANT: Output ONLY the Markdown. No explanations before or after.
 """
-        return prompt
@@ -1,80 +1,47 @@
 """
-Dashboard Agent - Generates dashboard specification using Gemini.
+Dashboard Agent - Generates dashboard specification using local LLM or Gemini.
 """
 from typing import Dict, Any
-import json
-import google.generativeai as genai
 
 from app.agents.base import BaseAgent
 from app.models.project import Project
-from app.config import settings
 
-genai.configure(api_key=settings.GOOGLE_AI_API_KEY)
 
-
-class DashboardAgent(BaseAgent):
-    """Dashboard Agent for creating dashboard specifications."""
-
-    def __init__(self):
-        super().__init__(
-            agent_type="dashboard",
-            model_name=settings.GEMINI_FLASH_MODEL
-        )
-
-    async def process(self, project: Project, context: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Generate client dashboard specification.
-
-        Returns:
-            Dict with appName, pages, components, features
-        """
-        matched_templates = context.get("matched_templates", [])
-
-        prompt = self._build_prompt(project, matched_templates)
-
-        model = genai.GenerativeModel(self.model_name)
-
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,
-                "max_output_tokens": 2000,
+DASHBOARD_OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "appName": {"type": "string"},
+        "description": {"type": "string"},
+        "pages": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "components": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "type": {"type": "string"},
+                                "title": {"type": "string"},
+                                "dataSource": {"type": "string"}
+                            },
+                            "required": ["type", "title"]
+                        }
+                    }
+                },
+                "required": ["name", "components"]
             }
-        )
+        },
+        "features": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["appName", "pages"]
+}
 
-        # Parse JSON
-        try:
-            content = json.loads(response.text)
-        except json.JSONDecodeError:
-            text = response.text
-            if "```json" in text:
-                json_str = text.split("```json")[1].split("```")[0].strip()
-                content = json.loads(json_str)
-            else:
-                content = {"appName": f"{project.business_name} Dashboard", "pages": []}
-
-        tokens_used = len(prompt) // 4 + len(response.text) // 4
+DASHBOARD_PROMPT_PREFIX = """You are designing a custom dashboard for a joinery business.
 
-        return {
-            "content": content,
-            "tokens_used": tokens_used
-        }
-
-    def _build_prompt(self, project: Project, matched_templates: list) -> str:
-        """Build prompt for Dashboard Agent."""
-
-        workflows_list = "\n".join([
-            f"- {t.get('category', 'automation').replace('_', ' ').title()}"
-            for t in matched_templates
-        ])
-
-        prompt = f"""You are designing a custom dashboard for a joinery business.
-
-Client: {project.business_name}
-Team Size: {project.team_size}
-
-Workflows they'll have:
-{workflows_list}
+The client and the workflows they'll have are listed after these instructions.
 
 Design a dashboard specification that shows:
 
@@ -91,43 +58,104 @@ Design a dashboard specification that shows:
    - Main table (what data?)
    - Chart (what visualization?)
 
-Output as structured JSON:
+Output as structured JSON, with appName set to "<Client> Command Center":
 
-{{
-  "appName": "{project.business_name} Command Center",
+{
+  "appName": "Example Joinery Command Center",
   "description": "Custom automation dashboard for managing your business",
   "pages": [
-    {{
+    {
       "name": "Dashboard",
       "components": [
-        {{
+        {
           "type": "stat_card",
           "title": "New Enquiries (This Week)",
           "dataSource": "enquiries_count",
           "icon": "inbox"
-        }},
-        {{
+        },
+        {
           "type": "table",
           "title": "Recent Enquiries",
           "columns": ["Date", "Name", "Source", "Status"],
           "dataSource": "recent_enquiries"
-        }},
-        {{
+        },
+        {
           "type": "chart",
           "chartType": "bar",
           "title": "Enquiries by Source",
           "dataSource": "enquiries_by_source"
-        }}
+        }
       ]
-    }}
+    }
   ],
   "features": [
     "Real-time enquiry notifications",
     "One-click quote generation",
     "Job status tracking"
   ]
-}}
+}
 
 IMPORTANT: Output ONLY valid JSON. No explanations.
+
+---
+"""
+
+
+class DashboardAgent(BaseAgent):
+    """Dashboard Agent for creating dashboard specifications."""
+
+    output_schema = DASHBOARD_OUTPUT_SCHEMA
+    prompt_prefix = DASHBOARD_PROMPT_PREFIX
+    reuse_fields = {"business_name": "Client: "}
+    reuse_output_fields = ["appName"]
+
+    def __init__(self):
+        super().__init__(
+            agent_type="dashboard",
+            model_tier="haiku",
+            api_provider="gemini"
+        )
+
+    async def process(self, project: Project, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate client dashboard specification.
+
+        Returns:
+            Dict with appName, pages, components, features
+        """
+        matched_templates = context.get("matched_templates", [])
+
+        prompt = self._build_prompt(project, matched_templates)
+
+        result = await self.generate(
+            prompt=prompt,
+            temperature=0.7,
+            max_tokens=2000,
+            json_schema=self.output_schema
+        )
+
+        # Parse JSON
+        content = self.parse_json_output(
+            result["text"],
+            default={"appName": f"{project.business_name} Dashboard", "pages": []}
+        )
+
+        return {
+            "content": content,
+            "tokens_used": result["tokens_used"]
+        }
+
+    def _build_prompt(self, project: Project, matched_templates: list) -> str:
+        """Build prompt for Dashboard Agent."""
+
+        workflows_list = "\n".join([
+            f"- {t.get('category', 'automation').replace('_', ' ').title()}"
+            for t in matched_templates
+        ])
+
+        return f"""Client: {project.business_name}
+Team Size: {project.team_size}
+
+Workflows they'll have:
+{workflows_list}
 """
-        return prompt
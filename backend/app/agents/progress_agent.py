@@ -1,24 +1,110 @@
 """
-Progress Agent - Breaks project into tasks using Claude Haiku.
+Progress Agent - Breaks project into tasks using local LLM or Claude Haiku.
 """
 from typing import Dict, Any
-import json
-from anthropic import Anthropic
 
 from app.agents.base import BaseAgent
 from app.models.project import Project
-from app.config import settings
+
+
+PROGRESS_OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tasks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "category": {"type": "string"},
+                    "estimatedHours": {"type": "number"},
+                    "dependencies": {"type": "array", "items": {"type": "string"}},
+                    "status": {"type": "string"}
+                },
+                "required": ["title", "category", "estimatedHours", "dependencies", "status"]
+            }
+        },
+        "totalHours": {"type": "number"},
+        "estimatedWeeks": {"type": "integer"}
+    },
+    "required": ["tasks", "totalHours", "estimatedWeeks"]
+}
+
+PROGRESS_PROMPT_PREFIX = """You are a project manager breaking down an automation project into tasks.
+
+The project, its complexity, total hours, timeline and the client's challenges are given after these instructions.
+
+Create a task breakdown with:
+1. All tasks needed (Discovery, Build, Testing, Deployment phases)
+2. Estimated hours per task
+3. Dependencies
+4. Task categories
+
+Set totalHours to the project's Total Hours and estimatedWeeks to its Timeline in weeks.
+
+Format as JSON array:
+
+{
+  "tasks": [
+    {
+      "title": "Schedule kickoff call with client",
+      "category": "Discovery",
+      "estimatedHours": 0.5,
+      "dependencies": [],
+      "status": "To Do"
+    },
+    {
+      "title": "Set up development environment",
+      "category": "Setup",
+      "estimatedHours": 2,
+      "dependencies": ["Schedule kickoff call with client"],
+      "status": "To Do"
+    },
+    {
+      "title": "Build enquiry capture workflow",
+      "category": "Build",
+      "estimatedHours": 8,
+      "dependencies": ["Set up development environment"],
+      "status": "To Do"
+    },
+    {
+      "title": "Test workflows end-to-end",
+      "category": "Testing",
+      "estimatedHours": 4,
+      "dependencies": ["Build enquiry capture workflow"],
+      "status": "To Do"
+    },
+    {
+      "title": "Deploy to production",
+      "category": "Deployment",
+      "estimatedHours": 2,
+      "dependencies": ["Test workflows end-to-end"],
+      "status": "To Do"
+    }
+  ],
+  "totalHours": 24,
+  "estimatedWeeks": 2
+}
+
+IMPORTANT: Output ONLY valid JSON. No explanation.
+
+---
+"""
 
 
 class ProgressAgent(BaseAgent):
     """Progress Agent for creating task breakdowns."""
 
+    output_schema = PROGRESS_OUTPUT_SCHEMA
+    prompt_prefix = PROGRESS_PROMPT_PREFIX
+    reuse_fields = {"business_name": "Project: "}
+
     def __init__(self):
         super().__init__(
             agent_type="progress",
-            model_name=settings.CLAUDE_HAIKU_MODEL
+            model_tier="haiku",
+            api_provider="anthropic"
         )
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
 
     async def process(self, project: Project, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -33,33 +119,26 @@ class ProgressAgent(BaseAgent):
 
         prompt = self._build_prompt(project, complexity, estimated_hours)
 
-        response = self.client.messages.create(
-            model=self.model_name,
-            max_tokens=2000,
+        result = await self.generate(
+            prompt=prompt,
             temperature=0.7,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
+            max_tokens=2000,
+            json_schema=self.output_schema
         )
 
         # Parse JSON
-        try:
-            content = json.loads(response.content[0].text)
-        except json.JSONDecodeError:
-            text = response.content[0].text
-            if "```json" in text:
-                json_str = text.split("```json")[1].split("```")[0].strip()
-                content = json.loads(json_str)
-            else:
-                content = {
-                    "tasks": [],
-                    "totalHours": estimated_hours,
-                    "estimatedWeeks": estimated_weeks
-                }
+        content = self.parse_json_output(
+            result["text"],
+            default={
+                "tasks": [],
+                "totalHours": estimated_hours,
+                "estimatedWeeks": estimated_weeks
+            }
+        )
 
         return {
             "content": content,
-            "tokens_used": response.usage.input_tokens + response.usage.output_tokens
+            "tokens_used": result["tokens_used"]
         }
 
     def _build_prompt(self, project: Project, complexity: str, estimated_hours: int) -> str:
@@ -67,66 +146,11 @@ class ProgressAgent(BaseAgent):
 
         weeks = (estimated_hours // 24) + 1
 
-        prompt = f"""You are a project manager breaking down an automation project into tasks.
-
-Project: {project.business_name}
+        return f"""Project: {project.business_name}
 Complexity: {complexity}
 Total Hours: {estimated_hours}
 Timeline: {weeks} weeks
 
 Client's Challenges:
 {chr(10).join([f"- {c}" for c in project.challenges])}
-
-Create a task breakdown with:
-1. All tasks needed (Discovery, Build, Testing, Deployment phases)
-2. Estimated hours per task
-3. Dependencies
-4. Task categories
-
-Format as JSON array:
-
-{{
-  "tasks": [
-    {{
-      "title": "Schedule kickoff call with client",
-      "category": "Discovery",
-      "estimatedHours": 0.5,
-      "dependencies": [],
-      "status": "To Do"
-    }},
-    {{
-      "title": "Set up development environment",
-      "category": "Setup",
-      "estimatedHours": 2,
-      "dependencies": ["Schedule kickoff call with client"],
-      "status": "To Do"
-    }},
-    {{
-      "title": "Build enquiry capture workflow",
-      "category": "Build",
-      "estimatedHours": 8,
-      "dependencies": ["Set up development environment"],
-      "status": "To Do"
-    }},
-    {{
-      "title": "Test workflows end-to-end",
-      "category": "Testing",
-      "estimatedHours": 4,
-      "dependencies": ["Build enquiry capture workflow"],
-      "status": "To Do"
-    }},
-    {{
-      "title": "Deploy to production",
-      "category": "Deployment",
-      "estimatedHours": 2,
-      "dependencies": ["Test workflows end-to-end"],
-      "status": "To Do"
-    }}
-  ],
-  "totalHours": {estimated_hours},
-  "estimatedWeeks": {weeks}
-}}
-
-IMPORTANT: Output ONLY valid JSON. No explanation.
 """
-        return prompt
@@ -1,27 +1,88 @@
 """
 Proposal Agent - Generates professional client proposals using local LLM or Claude Opus.
+
+Leads whose complexity is in PROPOSAL_TEMPLATE_COMPLEXITIES get a proposal
+rendered from HTML templates instead (see proposal_renderer), with at most
+a short summary written by a small model.
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import logging
 import re
 
 from app.agents.base import BaseAgent
 from app.models.project import Project
+from app.services.proposal_renderer import render_proposal
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+PROPOSAL_PROMPT_PREFIX = """You are writing a professional project proposal for a joinery automation project.
+
+The client, their challenges, the automation systems we will build, the total investment and the timeline are given after these instructions.
+
+Create a comprehensive HTML proposal document that includes:
+
+1. Executive Summary
+   - Acknowledge their pain points
+   - Overview of solution
+   - Expected outcomes
+
+2. Understanding Your Business
+   - Restate their challenges in your words
+   - Show you understand their daily frustrations
+
+3. Proposed Solution
+   - For each automation system:
+     * What it does
+     * How it solves their problem
+     * Key features
+     * Expected time savings
+
+4. Implementation Plan
+   - Week-by-week timeline
+   - What we'll need from them
+   - When they'll see results
+
+5. Investment Breakdown
+   - Cost per automation system
+   - Total investment (as given below)
+   - Payment terms (50% upfront, 50% on completion)
+
+6. Why DeepFlow AI
+   - Specialization in trade businesses
+   - Custom-built (not one-size-fits-all)
+   - Ongoing support
+
+7. Next Steps
+   - Schedule discovery call
+   - Gather system access
+   - Kickoff date
+
+Tone: Professional but approachable, like you're talking to a tradesperson not a corporate exec.
+Format: Clean HTML with inline CSS, suitable for email.
+
+IMPORTANT: Output ONLY the HTML. Do not include any explanations or markdown. Start with <html> tag.
+
+---
+"""
+
+SUMMARY_SYSTEM_PROMPT = """You write the opening summary of a proposal for a trade business automation project.
+
+Write two short paragraphs of plain text (no HTML, no headings, no greeting, no sign-off): acknowledge the client's specific pain points, say what we will build, and the outcome they can expect. Tone: professional but approachable, like talking to a tradesperson. Do not mention prices.
+"""
+
 
 class ProposalAgent(BaseAgent):
     """Proposal Agent for generating client-facing proposals."""
 
-    def __init__(self):
-        # Select model based on LLM mode
-        if settings.LLM_MODE == "local":
-            model_name = settings.LOCAL_OPUS_MODEL
-        else:
-            model_name = settings.CLAUDE_OPUS_MODEL
+    prompt_prefix = PROPOSAL_PROMPT_PREFIX
 
+    def __init__(self):
         super().__init__(
             agent_type="proposal",
-            model_name=model_name
+            model_tier="opus",
+            api_provider="anthropic"
         )
 
     async def process(self, project: Project, context: Dict[str, Any]) -> Dict[str, Any]:
@@ -36,41 +97,22 @@ class ProposalAgent(BaseAgent):
         total_value = context.get("total_value", 0)
         timeline_weeks = context.get("estimated_weeks", 3)
 
-        # Build prompt
-        prompt = self._build_prompt(project, matched_templates, total_value, timeline_weeks)
-
-        # Generate using local or API mode
-        if settings.LLM_MODE == "local":
-            result = await self.generate_text(
-                prompt=prompt,
-                model=self.model_name,
-                temperature=0.7,
-                max_tokens=4000
-            )
-            html_content = result["text"]
-            tokens_used = result["tokens_used"]
-
-        else:
-            # Use Claude Opus API
-            from anthropic import Anthropic
-            client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-
-            response = client.messages.create(
-                model=self.model_name,
-                max_tokens=4000,
-                temperature=0.7,
-                messages=[{"role": "user", "content": prompt}]
-            )
+        # Generate subject line
+        subject_line = f"Your Custom Automation Plan - {project.business_name}"
 
-            html_content = response.content[0].text
-            tokens_used = response.usage.input_tokens + response.usage.output_tokens
+        if context.get("complexity") in settings.PROPOSAL_TEMPLATE_COMPLEXITIES:
+            return await self._render_from_template(project, context, subject_line)
 
-        # Generate plain text version (strip HTML tags)
-        import re
-        plain_text = re.sub(r'<[^>]+>', '', html_content)
+        # Build prompt
+        prompt = self._build_prompt(project, matched_templates, total_value, timeline_weeks)
 
-        # Generate subject line
-        subject_line = f"Your Custom Automation Plan - {project.business_name}"
+        result = await self.generate(
+            prompt=prompt,
+            temperature=0.7,
+            max_tokens=4000
+        )
+        html_content = result["text"]
+        tokens_used = result["tokens_used"]
 
         return {
             "content": {
@@ -78,7 +120,50 @@ class ProposalAgent(BaseAgent):
                 "estimated_value": total_value
             },
             "content_html": html_content,
-            "tokens_used": response.usage.input_tokens + response.usage.output_tokens
+            "tokens_used": tokens_used
+        }
+
+    async def _render_from_template(
+        self,
+        project: Project,
+        context: Dict[str, Any],
+        subject_line: str
+    ) -> Dict[str, Any]:
+        """Render the proposal from HTML templates, with an optional model-written summary."""
+        summary: Optional[str] = None
+        tokens_used = 0
+
+        if settings.PROPOSAL_SUMMARY_TIER:
+            try:
+                result = await self.generate(
+                    prompt=self._build_prompt(
+                        project,
+                        context.get("matched_templates", []),
+                        context.get("total_value", 0),
+                        context.get("estimated_weeks", 3)
+                    ),
+                    temperature=0.7,
+                    max_tokens=400,
+                    system=SUMMARY_SYSTEM_PROMPT,
+                    tier=settings.PROPOSAL_SUMMARY_TIER
+                )
+                # Plain text is asked for; drop any markup the model adds anyway
+                summary = re.sub(r'<[^>]+>', '', result["text"]).strip() or None
+                tokens_used = result["tokens_used"]
+            except Exception as e:
+                logger.warning(f"Proposal summary generation failed for project {project.id}, using standard summary: {e}")
+
+        if summary is None:
+            self.mark_served("template", "proposal_renderer")
+
+        return {
+            "content": {
+                "subject_line": subject_line,
+                "estimated_value": context.get("total_value", 0),
+                "rendered_from_template": True
+            },
+            "content_html": render_proposal(project, context, summary),
+            "tokens_used": tokens_used
         }
 
     def _build_prompt(
@@ -101,9 +186,7 @@ class ProposalAgent(BaseAgent):
             )
         templates_formatted = "\n".join(templates_list)
 
-        prompt = f"""You are writing a professional project proposal for a joinery automation project.
-
-Client: {project.client_name} at {project.business_name}
+        return f"""Client: {project.client_name} at {project.business_name}
 
 Their Current Challenges:
 {challenges_formatted}
@@ -113,48 +196,4 @@ We will build the following automation systems:
 
 Total Investment: £{total_value:,.0f}
 Timeline: {timeline_weeks} weeks
-
-Create a comprehensive HTML proposal document that includes:
-
-1. Executive Summary
-   - Acknowledge their pain points
-   - Overview of solution
-   - Expected outcomes
-
-2. Understanding Your Business
-   - Restate their challenges in your words
-   - Show you understand their daily frustrations
-
-3. Proposed Solution
-   - For each automation system:
-     * What it does
-     * How it solves their problem
-     * Key features
-     * Expected time savings
-
-4. Implementation Plan
-   - Week-by-week timeline
-   - What we'll need from them
-   - When they'll see results
-
-5. Investment Breakdown
-   - Cost per automation system
-   - Total investment: £{total_value:,.0f}
-   - Payment terms (50% upfront, 50% on completion)
-
-6. Why DeepFlow AI
-   - Specialization in trade businesses
-   - Custom-built (not one-size-fits-all)
-   - Ongoing support
-
-7. Next Steps
-   - Schedule discovery call
-   - Gather system access
-   - Kickoff date
-
-Tone: Professional but approachable, like you're talking to a tradesperson not a corporate exec.
-Format: Clean HTML with inline CSS, suitable for email.
-
-IMPORTANT: Output ONLY the HTML. Do not include any explanations or markdown. Start with <html> tag.
 """
-        return prompt
@@ -1,62 +1,144 @@
 """
-Workflow Agent - Generates n8n workflow specifications using Claude Sonnet.
+Workflow Agent - Generates n8n workflow specifications using local LLM or Claude Sonnet.
+
+Matched templates that exist in the template library are rendered for the
+project by the workflow renderer; the LLM only designs workflows for the
+rest.
 """
 from typing import Dict, Any
-import json
-from anthropic import Anthropic
+import logging
 
 from app.agents.base import BaseAgent
 from app.models.project import Project
-from app.config import settings
+from app.services.workflow_renderer import workflow_renderer
+
+logger = logging.getLogger(__name__)
+
+
+WORKFLOW_OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "workflows": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "purpose": {"type": "string"},
+                    "trigger": {"type": "string"},
+                    "steps": {"type": "array", "items": {"type": "string"}},
+                    "integrations": {"type": "array", "items": {"type": "string"}},
+                    "output": {"type": "string"},
+                    "estimated_build_time": {"type": "string"}
+                },
+                "required": ["name", "purpose", "trigger", "steps", "integrations"]
+            }
+        }
+    },
+    "required": ["workflows"]
+}
+
+WORKFLOW_PROMPT_PREFIX = """You are designing n8n workflow specifications for a joinery business.
+
+The client info and the automations they need are listed after these instructions.
+
+For each automation, create a workflow specification with:
+1. Workflow name
+2. Purpose
+3. Trigger (what starts it)
+4. Steps (what happens)
+5. Integrations needed (Gmail, Facebook, etc.)
+6. Output (what result is produced)
+
+Output as JSON:
+
+{
+  "workflows": [
+    {
+      "name": "Enquiry_Capture_Workflow",
+      "purpose": "Capture leads from multiple sources",
+      "trigger": "Email received OR Facebook Lead Ad submitted OR Website form submitted",
+      "steps": [
+        "1. Receive enquiry from any source",
+        "2. Extract customer details (name, email, phone, message)",
+        "3. Log to Google Sheets (Enquiries tab)",
+        "4. Send SMS notification to business owner",
+        "5. Send auto-reply to customer"
+      ],
+      "integrations": ["Gmail", "Facebook Lead Ads", "Webhook", "Google Sheets", "Twilio SMS"],
+      "output": "New row in Enquiries spreadsheet + SMS notification sent",
+      "estimated_build_time": "8 hours"
+    }
+  ]
+}
+
+IMPORTANT: Output ONLY valid JSON. No explanation.
+
+---
+"""
 
 
 class WorkflowAgent(BaseAgent):
     """Workflow Agent for generating n8n workflow specifications."""
 
+    output_schema = WORKFLOW_OUTPUT_SCHEMA
+    prompt_prefix = WORKFLOW_PROMPT_PREFIX
+    reuse_fields = {"business_name": "- Business: "}
+
     def __init__(self):
         super().__init__(
             agent_type="workflow",
-            model_name=settings.CLAUDE_SONNET_MODEL
+            model_tier="sonnet",
+            api_provider="anthropic"
         )
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
 
     async def process(self, project: Project, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate n8n workflow specifications.
 
-        For MVP, we'll generate workflow descriptions rather than full JSON.
-        Full n8n JSON generation would require templates from database.
+        Workflows for templates in the library are rendered from the
+        template (and saved as the project's draft workflows when the run
+        succeeds); only matched templates without one are designed by the LLM.
 
         Returns:
             Dict with workflow specifications
         """
         matched_templates = context.get("matched_templates", [])
 
-        prompt = self._build_prompt(project, matched_templates)
-
-        response = self.client.messages.create(
-            model=self.model_name,
-            max_tokens=2500,
-            temperature=0.7,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-
-        # Parse JSON response
+        # Staged in the run's session: committed with the output, discarded
+        # if the run fails or times out
         try:
-            workflows = json.loads(response.content[0].text)
-        except json.JSONDecodeError:
-            text = response.content[0].text
-            if "```json" in text:
-                json_str = text.split("```json")[1].split("```")[0].strip()
-                workflows = json.loads(json_str)
-            else:
-                workflows = {"workflows": []}
+            async with self.db_session.begin_nested():
+                rendered = await workflow_renderer.render_for_project(self.db_session, project, matched_templates)
+        except Exception as e:
+            logger.warning(f"Could not render workflow templates for project {project.id}: {e}")
+            rendered = {"workflows": [], "gaps": matched_templates}
+
+        workflows = rendered["workflows"]
+        tokens_used = 0
+
+        if rendered["gaps"] or not workflows:
+            prompt = self._build_prompt(project, rendered["gaps"])
+
+            result = await self.generate(
+                prompt=prompt,
+                temperature=0.7,
+                max_tokens=2500,
+                json_schema=self.output_schema
+            )
+
+            # Parse JSON response
+            generated = self.parse_json_output(result["text"], default={"workflows": []})
+            for workflow in generated.get("workflows", []):
+                workflow.setdefault("source", "generated")
+            workflows = workflows + generated.get("workflows", [])
+            tokens_used = result["tokens_used"]
+        else:
+            self.mark_served("template", "workflow_renderer")
 
         return {
-            "content": workflows,
-            "tokens_used": response.usage.input_tokens + response.usage.output_tokens
+            "content": {"workflows": workflows},
+            "tokens_used": tokens_used
         }
 
     def _build_prompt(self, project: Project, matched_templates: list) -> str:
@@ -68,9 +150,7 @@ class WorkflowAgent(BaseAgent):
             for t in matched_templates
         ])
 
-        prompt = f"""You are designing n8n workflow specifications for {project.business_name}.
-
-Client Info:
+        return f"""Client Info:
 - Business: {project.business_name}
 - Team Size: {project.team_size}
 - Enquiry Sources: {', '.join(project.enquiry_sources)}
@@ -78,37 +158,4 @@ Client Info:
 
 Automations Needed:
 {templates_info}
-
-For each automation, create a workflow specification with:
-1. Workflow name
-2. Purpose
-3. Trigger (what starts it)
-4. Steps (what happens)
-5. Integrations needed (Gmail, Facebook, etc.)
-6. Output (what result is produced)
-
-Output as JSON:
-
-{{
-  "workflows": [
-    {{
-      "name": "Enquiry_Capture_Workflow",
-      "purpose": "Capture leads from multiple sources",
-      "trigger": "Email received OR Facebook Lead Ad submitted OR Website form submitted",
-      "steps": [
-        "1. Receive enquiry from any source",
-        "2. Extract customer details (name, email, phone, message)",
-        "3. Log to Google Sheets (Enquiries tab)",
-        "4. Send SMS notification to business owner",
-        "5. Send auto-reply to customer"
-      ],
-      "integrations": ["Gmail", "Facebook Lead Ads", "Webhook", "Google Sheets", "Twilio SMS"],
-      "output": "New row in Enquiries spreadsheet + SMS notification sent",
-      "estimated_build_time": "8 hours"
-    }}
-  ]
-}}
-
-IMPORTANT: Output ONLY valid JSON. No explanation.
 """
-        return prompt
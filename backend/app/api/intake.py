@@ -3,13 +3,18 @@ Intake API - Handles website form submissions.
 """
 from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timedelta
+from typing import List, Optional
+from decimal import Decimal
 import logging
+import time
 
 from app.database import get_db
 from app.schemas.intake import IntakeFormRequest, IntakeFormResponse
 from app.models.project import Project
 from app.services.agent_orchestrator import orchestrator
+from app.services.latency_model import latency_model
+from app.services.job_scheduler import job_scheduler, calculate_job_priority
+from app.services.challenge_matcher import match_project, calculate_lead_score
 from app.services.notification_service import send_whatsapp_notification
 from app.config import settings
 
@@ -29,10 +34,11 @@ async def submit_intake_form(
 
     This endpoint:
     1. Validates form data
-    2. Creates project in database
-    3. Triggers AI agent processing in background
-    4. Sends WhatsApp notification
-    5. Returns immediately with project ID
+    2. Matches challenges and scores the lead
+    3. Creates project in database
+    4. Queues AI agent processing, prioritised by lead score and urgency
+    5. Sends WhatsApp notification
+    6. Returns immediately with project ID
 
     Args:
         form_data: Intake form data from website
@@ -45,6 +51,16 @@ async def submit_intake_form(
     try:
         logger.info(f"Received intake form submission for {form_data.businessName}")
 
+        # Match challenges and score the lead up front (pure and cheap) so the
+        # scheduler can prioritise the run
+        matching_result = match_project(form_data.challenges, form_data.notes)
+        lead_score = calculate_lead_score(
+            team_size=form_data.teamSize,
+            num_challenges=len(form_data.challenges),
+            notes=form_data.notes or "",
+            revenue_value=float(matching_result["total_value"])
+        )
+
         # Create project
         project = Project(
             client_name=form_data.name,
@@ -57,6 +73,10 @@ async def submit_intake_form(
             admin_method=form_data.adminMethod,
             notes=form_data.notes,
             submitted_at=form_data.submittedAt,
+            lead_score=lead_score,
+            revenue_value=Decimal(str(matching_result["total_value"])),
+            project_complexity=matching_result["complexity"],
+            match_result=matching_result,
             status="new_lead"
         )
 
@@ -66,10 +86,18 @@ async def submit_intake_form(
 
         logger.info(f"Project created with ID: {project.id}")
 
-        # Trigger agent processing in background
-        background_tasks.add_task(
+        # Queue agent processing, best leads first
+        priority = calculate_job_priority(lead_score, matching_result["matched_templates"])
+        queue_depth = job_scheduler.depth_ahead(priority)
+
+        # Checkpointed first, so the run survives a restart before it starts
+        await orchestrator.mark_queued(project, db)
+        job_scheduler.submit(
             run_agents_for_project,
-            project_id=str(project.id)
+            priority=priority,
+            name=f"agents:{project.id}",
+            project_id=str(project.id),
+            enqueued_at=time.time()
         )
 
         # Send WhatsApp notification in background
@@ -78,8 +106,12 @@ async def submit_intake_form(
             project_id=str(project.id)
         )
 
-        # Calculate estimated completion (rough estimate: 5 minutes for all agents)
-        estimated_completion = datetime.utcnow() + timedelta(minutes=5)
+        # Estimate completion from observed agent latencies and current backlog
+        estimated_completion = latency_model.predict_completion(
+            orchestrator.agent_models(),
+            queue_depth=queue_depth,
+            concurrency=job_scheduler.concurrency
+        )
 
         # Build dashboard URL
         dashboard_url = f"{settings.DASHBOARD_URL}/projects/{project.id}" if settings.DASHBOARD_URL else None
@@ -97,8 +129,20 @@ async def submit_intake_form(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def run_agents_for_project(project_id: str):
-    """Background task to run all AI agents for a project."""
+async def run_agents_for_project(
+    project_id: str,
+    agent_types: Optional[List[str]] = None,
+    enqueued_at: Optional[float] = None,
+    upgrade: bool = False
+):
+    """
+    Background task to run AI agents for a project.
+
+    Resumes from the project's checkpoint, so only missing or failed agents
+    run unless agent_types names specific agents to (re)generate.
+    enqueued_at (time.time()) starts the run's SLO clock; upgrade runs the
+    agents at their default model tier.
+    """
     from app.database import AsyncSessionLocal
     from sqlalchemy import select
 
@@ -116,8 +160,14 @@ async def run_agents_for_project(project_id: str):
 
             logger.info(f"Starting agent processing for project {project_id}")
 
-            # Run all agents
-            await orchestrator.run_all_agents(project, db)
+            # Run agents
+            await orchestrator.run_all_agents(
+                project,
+                db,
+                agent_types=agent_types,
+                run_started_at=enqueued_at,
+                upgrade=upgrade
+            )
 
             logger.info(f"Agent processing completed for project {project_id}")
 
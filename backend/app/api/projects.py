@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc, asc
 from typing import Optional
 import logging
+import time
 import uuid
 
 from app.database import get_db
@@ -13,6 +14,11 @@ from app.models.project import Project
 from app.models.agent_output import AgentOutput
 from app.schemas.project import ProjectListResponse, ProjectResponse, ProjectSummaryResponse, AgentStatusResponse
 from app.services.notification_service import send_proposal_email
+from app.services.output_history import output_history
+from app.services.agent_orchestrator import orchestrator
+from app.services.job_scheduler import job_scheduler, calculate_job_priority
+from app.services.lead_scoring import rescore_all_leads
+from app.api.intake import run_agents_for_project
 
 logger = logging.getLogger(__name__)
 
@@ -150,6 +156,12 @@ async def get_project(
                 "generatedAt": output.generated_at,
                 "tokensUsed": output.tokens_used,
                 "generationTimeSeconds": output.generation_time_seconds,
+                "provider": output.provider,
+                "modelName": output.model_name,
+                "modelTier": output.model_tier,
+                "downgraded": bool(output.downgraded),
+                "currentVersion": output.current_version,
+                "error": output.error,
                 "approvedBy": output.approved_by,
                 "approvedAt": output.approved_at
             }
@@ -157,17 +169,15 @@ async def get_project(
         # Get agent status
         agent_status = get_agent_status(outputs)
 
-        # Get matched templates (from overview output if available)
-        matched_templates = []
-        if "overview" in outputs_dict:
-            # Templates would be reconstructed from challenge matching
-            # For now, return empty array
-            matched_templates = []
+        # Matching result stored at intake (or by the last agent run)
+        match_result = project.match_result or {}
 
         return {
             "project": ProjectResponse.from_orm(project),
             "outputs": outputs_dict,
-            "matchedTemplates": matched_templates,
+            "matchedTemplates": match_result.get("matched_templates", []),
+            "suggestedTemplates": match_result.get("suggested_templates", []),
+            "matcherVersion": match_result.get("matcher_version"),
             "agentStatus": agent_status
         }
 
@@ -210,17 +220,7 @@ async def approve_output(
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        # Get output
-        output_result = await db.execute(
-            select(AgentOutput).where(
-                AgentOutput.project_id == project.id,
-                AgentOutput.agent_type == output_type
-            )
-        )
-        output = output_result.scalar_one_or_none()
-
-        if not output:
-            raise HTTPException(status_code=404, detail=f"{output_type} output not found")
+        output = await _get_output(db, project.id, output_type)
 
         # Update approval status
         if approved:
@@ -263,6 +263,240 @@ async def approve_output(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/projects/{project_id}/outputs/{output_type}/versions")
+async def get_output_versions(
+    project_id: str,
+    output_type: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List an agent output's versions, newest first.
+
+    Args:
+        project_id: Project UUID
+        output_type: Type of output (proposal, workflow, etc.)
+        db: Database session
+
+    Returns:
+        Current version and version metadata (without content)
+    """
+    try:
+        output = await _get_output(db, project_id, output_type)
+        versions = await output_history.list_versions(db, output.id)
+
+        return {
+            "currentVersion": output.current_version,
+            "versions": [
+                {
+                    "version": v["version"],
+                    "baseVersion": v["base_version"],
+                    "storedBytes": v["stored_bytes"],
+                    "tokensUsed": v["tokens_used"],
+                    "provider": v["provider"],
+                    "modelName": v["model_name"],
+                    "modelTier": v["model_tier"],
+                    "createdAt": v["created_at"]
+                }
+                for v in versions
+            ]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get {output_type} versions for project {project_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/projects/{project_id}/outputs/{output_type}/versions/{version}")
+async def get_output_version(
+    project_id: str,
+    output_type: str,
+    version: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get one version of an agent output.
+
+    Args:
+        project_id: Project UUID
+        output_type: Type of output (proposal, workflow, etc.)
+        version: Version number
+        db: Database session
+
+    Returns:
+        The version's content
+    """
+    try:
+        output = await _get_output(db, project_id, output_type)
+        restored = await output_history.load(db, output.id, version)
+
+        if restored is None:
+            raise HTTPException(status_code=404, detail=f"{output_type} version {version} not found")
+
+        return {
+            "version": restored["version"],
+            "current": restored["version"] == output.current_version,
+            "content": restored["content"],
+            "contentHtml": restored["content_html"],
+            "contentMarkdown": restored["content_markdown"],
+            "tokensUsed": restored["tokens_used"],
+            "provider": restored["provider"],
+            "modelName": restored["model_name"],
+            "modelTier": restored["model_tier"],
+            "createdAt": restored["created_at"]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get {output_type} version {version} for project {project_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/projects/{project_id}/outputs/{output_type}/versions/{version}/restore")
+async def restore_output_version(
+    project_id: str,
+    output_type: str,
+    version: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Make an earlier version of an agent output the current one.
+
+    The restored output needs approving again.
+
+    Args:
+        project_id: Project UUID
+        output_type: Type of output (proposal, workflow, etc.)
+        version: Version number
+        db: Database session
+
+    Returns:
+        Success message
+    """
+    try:
+        output = await _get_output(db, project_id, output_type)
+
+        if not await output_history.restore(db, output, version):
+            raise HTTPException(status_code=404, detail=f"{output_type} version {version} not found")
+
+        await db.commit()
+
+        return {
+            "success": True,
+            "message": f"{output_type} restored to version {version}",
+            "outputId": str(output.id)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to restore {output_type} version {version} for project {project_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/projects/{project_id}/regenerate/{agent_type}")
+async def regenerate_output(
+    project_id: str,
+    agent_type: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Rerun a single agent for a project.
+
+    The agent reuses the context checkpointed by the last run, so no other
+    agent is regenerated.
+
+    Args:
+        project_id: Project UUID
+        agent_type: Type of agent to rerun (proposal, workflow, etc.)
+        db: Database session
+
+    Returns:
+        Success message
+    """
+    try:
+        if agent_type not in orchestrator.agent_types:
+            raise HTTPException(status_code=400, detail=f"Unknown agent type: {agent_type}")
+
+        project_result = await db.execute(
+            select(Project).where(Project.id == project_id)
+        )
+        project = project_result.scalar_one_or_none()
+
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        await orchestrator.mark_queued(project, db, [agent_type])
+        job_scheduler.submit(
+            run_agents_for_project,
+            priority=calculate_job_priority(
+                project.lead_score, (project.match_result or {}).get("matched_templates", [])
+            ),
+            name=f"regenerate:{agent_type}:{project.id}",
+            project_id=str(project.id),
+            agent_types=[agent_type],
+            enqueued_at=time.time()
+        )
+
+        return {
+            "success": True,
+            "message": f"{agent_type} regeneration queued"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to queue regeneration: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/leads/rescore")
+async def rescore_leads_endpoint():
+    """
+    Rescore every project's lead score with the current rubric.
+
+    Runs as a low-priority background job; use after changing the scoring
+    rubric or team size scores.
+
+    Returns:
+        Success message
+    """
+    job_scheduler.submit(rescore_all_leads, priority=0, name="rescore-leads")
+
+    return {
+        "success": True,
+        "message": "Lead rescoring queued"
+    }
+
+
+async def _get_output(db: AsyncSession, project_id, output_type: str) -> AgentOutput:
+    """
+    A project's output for an agent type.
+
+    Outputs from before versioning may have duplicate rows; the most
+    recently generated one is used.
+
+    Raises:
+        HTTPException: 404 if the project has no such output
+    """
+    output = (await db.execute(
+        select(AgentOutput)
+        .where(
+            AgentOutput.project_id == project_id,
+            AgentOutput.agent_type == output_type
+        )
+        .order_by(desc(AgentOutput.generated_at))
+        .limit(1)
+    )).scalar_one_or_none()
+
+    if not output:
+        raise HTTPException(status_code=404, detail=f"{output_type} output not found")
+
+    return output
+
+
 def get_agent_status(outputs: list) -> AgentStatusResponse:
     """
     Build agent status response from outputs.
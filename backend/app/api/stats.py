@@ -0,0 +1,141 @@
+"""
+Stats API - Operational statistics for capacity planning.
+"""
+from fastapi import APIRouter
+import logging
+
+from app.services.agent_orchestrator import orchestrator
+from app.services.latency_model import latency_model
+from app.services.job_scheduler import job_scheduler
+from app.services.rate_limiter import rate_limiter
+from app.services.local_llm_service import local_llm
+from app.services.prefill_stats import prefill_tracker
+from app.services.model_residency import model_residency
+from app.services.model_tiering import tiering_policy
+from app.services.provider_router import provider_router
+from app.services.token_counter import token_counter
+from app.services.template_catalog import template_catalog
+from app.services.output_reuse import output_reuse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/stats", tags=["stats"])
+
+
+@router.get("/latency")
+async def get_latency_stats():
+    """
+    Get rolling agent latency statistics and current backlog.
+
+    Returns:
+        Per agent/model latency percentiles, queue depth and the
+        expected duration of a full run with the current configuration
+    """
+    agent_models = orchestrator.agent_models()
+
+    return {
+        "queueDepth": job_scheduler.pending,
+        "activeRuns": job_scheduler.active,
+        "workers": job_scheduler.concurrency,
+        "expectedRunSeconds": {
+            "p50": round(latency_model.estimate_run_seconds(agent_models, "p50"), 2),
+            "p95": round(latency_model.estimate_run_seconds(agent_models, "p95"), 2),
+        },
+        "agents": latency_model.snapshot()
+    }
+
+
+@router.get("/rate-limits")
+async def get_rate_limit_stats():
+    """
+    Get current API rate limiter budgets.
+
+    Returns:
+        Available requests and tokens per provider/model
+    """
+    return {
+        "limits": rate_limiter.snapshot()
+    }
+
+
+@router.get("/llm-endpoints")
+async def get_llm_endpoint_stats():
+    """
+    Get circuit breaker state and latency for each local LLM endpoint.
+
+    Returns:
+        Per-endpoint breaker state and latency percentiles
+    """
+    return {
+        "endpoints": local_llm.resilience.snapshot()
+    }
+
+
+@router.get("/prefill")
+async def get_prefill_stats():
+    """
+    Get prompt prefill timing and prefix-cache reuse per agent.
+
+    Returns:
+        Per-agent prefill latency, cached prompt tokens and the estimated
+        prefill time saved by the KV cache
+    """
+    return {
+        "agents": prefill_tracker.snapshot()
+    }
+
+
+@router.get("/models")
+async def get_model_residency():
+    """
+    Get local model residency.
+
+    Returns:
+        Configured model, keep-alive and load state per tier, the models
+        currently loaded and the last warm-up time per model
+    """
+    return await model_residency.snapshot()
+
+
+@router.get("/tiering")
+async def get_tiering_stats():
+    """
+    Get the SLO-driven model tiering policy state.
+
+    Returns:
+        SLO, tier floors, off-peak status and queued upgrade regenerations
+    """
+    return tiering_policy.snapshot()
+
+
+@router.get("/providers")
+async def get_provider_stats():
+    """
+    Get per-provider request, token, cost and latency accounting.
+
+    In hybrid mode, `overflows` counts requests sent to an API provider
+    because the local server was queued, slow or unavailable.
+    """
+    return {**provider_router.snapshot(), "tokenizers": token_counter.snapshot()}
+
+
+@router.get("/templates")
+async def get_template_catalog_stats():
+    """
+    Get the template catalog challenge matching currently uses.
+
+    Returns:
+        Catalog version, source (database or built-in) and size
+    """
+    return template_catalog.snapshot()
+
+
+@router.get("/reuse")
+async def get_output_reuse_stats():
+    """
+    Get cross-project agent response reuse since startup.
+
+    Returns:
+        Hits, misses, hit rate, responses stored and tokens saved
+    """
+    return output_reuse.snapshot()
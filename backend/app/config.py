@@ -3,7 +3,7 @@ Application configuration using Pydantic settings.
 Loads configuration from environment variables.
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -35,9 +35,16 @@ class Settings(BaseSettings):
     ]
 
     # AI Configuration
-    LLM_MODE: str = "local"  # "api" or "local"
+    LLM_MODE: str = "local"  # "api", "local" or "hybrid" (local first, overflow to API)
 
-    # AI APIs (only needed if LLM_MODE="api")
+    # Hybrid mode: send a request to the API provider instead of the local server
+    # when the predicted local queue wait or the agent's local p95 latency exceeds these
+    HYBRID_MAX_LOCAL_WAIT_SECONDS: float = 60.0
+    HYBRID_MAX_LOCAL_LATENCY_SECONDS: float = 300.0
+    HYBRID_MIN_LATENCY_SAMPLES: int = 5  # Observations needed before p95 is trusted
+    LOCAL_LLM_PARALLELISM: int = 1  # Requests the local server runs at once (e.g. OLLAMA_NUM_PARALLEL)
+
+    # AI APIs (needed if LLM_MODE is "api" or "hybrid")
     ANTHROPIC_API_KEY: str = ""
     GOOGLE_AI_API_KEY: str = ""
 
@@ -47,9 +54,64 @@ class Settings(BaseSettings):
     CLAUDE_HAIKU_MODEL: str = "claude-haiku-3-5-20241022"
     GEMINI_FLASH_MODEL: str = "gemini-2.0-flash-exp"
 
-    # Local LLM Configuration (for local mode)
+    # API Rate Limits per provider, or per "provider:model" (requests & tokens per minute)
+    API_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+        "anthropic": {"rpm": 50, "tpm": 40000},
+        "gemini": {"rpm": 60, "tpm": 1000000},
+    }
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "redis" (shared)
+    RATE_LIMIT_MAX_RETRIES: int = 3  # Retries after a 429
+    RATE_LIMIT_BACKOFF_SECONDS: float = 10.0
+
+    # Context windows in tokens, by model name or (as a default) by provider.
+    # Prompts are counted before sending and max_tokens capped to fit
+    MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+        "anthropic": 200000,
+        "gemini": 1048576,
+    }
+    TOKEN_COUNT_SAFETY_MARGIN: float = 0.15  # Added to approximate (non-tokenizer) counts
+    MIN_OUTPUT_TOKENS: int = 256  # Refuse requests that would leave less room than this
+
+    # API prices per million tokens, for cost accounting (local requests cost nothing)
+    API_PRICING_PER_MTOK: Dict[str, Dict[str, float]] = {
+        "claude-opus-4-5-20251101": {"input": 5.0, "output": 25.0},
+        "claude-sonnet-4-5-20250929": {"input": 3.0, "output": 15.0},
+        "claude-haiku-3-5-20241022": {"input": 0.8, "output": 4.0},
+        "gemini-2.0-flash-exp": {"input": 0.1, "output": 0.4},
+    }
+
+    # Local LLM Configuration (for local and hybrid mode)
     LOCAL_LLM_ENDPOINT: str = "http://localhost:11434"  # Ollama default
     LOCAL_LLM_TYPE: str = "ollama"  # "ollama", "vllm", "llamacpp", or "openai-compatible"
+    LOCAL_LLM_API_STYLE: str = "chat"  # "chat" (system/user messages) or "completion" (raw prompt)
+    LOCAL_LLM_KEEP_ALIVE: str = "30m"  # Ollama: how long a model stays loaded after a request
+    LOCAL_LLM_CONTEXT_WINDOW: int = 8192  # Sent to Ollama as num_ctx; match -c / --max-model-len elsewhere
+
+    # Tokenizer per local model family (Hugging Face repo or tokenizer.json path)
+    TOKENIZER_FAMILIES: Dict[str, str] = {
+        "qwen2": "Qwen/Qwen2.5-7B-Instruct",
+        "llama3": "NousResearch/Meta-Llama-3.1-8B-Instruct",
+        "gemma2": "unsloth/gemma-2-9b-it",
+        "mistral": "mistralai/Mistral-7B-Instruct-v0.3",
+    }
+
+    LOCAL_LLM_FALLBACK_ENDPOINTS: List[str] = []  # Extra replicas for failover/hedging
+    LOCAL_LLM_STRUCTURED_OUTPUT: str = "schema"  # "schema", "json" or "off" (constrained decoding)
+
+    # Retries, circuit breaker and hedging for local LLM requests
+    LLM_RETRY_MAX_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_DELAY: float = 1.0  # seconds, doubled per attempt (full jitter)
+    LLM_RETRY_MAX_DELAY: float = 20.0
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures before opening
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+    LLM_HEDGING_ENABLED: bool = False  # Needs LOCAL_LLM_FALLBACK_ENDPOINTS
+
+    # Micro-batching of concurrent requests (vllm, llamacpp, openai-compatible only).
+    # Requires LOCAL_LLM_API_STYLE="completion": chat routes take one
+    # conversation per request, so with the default "chat" style these have no
+    # effect (the servers still batch concurrent chat requests themselves).
+    LOCAL_LLM_BATCH_WINDOW_MS: int = 25  # 0 disables batching
+    LOCAL_LLM_MAX_BATCH_SIZE: int = 16
 
     # Local Model Names (adjust based on your downloaded models)
     LOCAL_OPUS_MODEL: str = "qwen2.5:72b"  # For complex reasoning (Proposal, Build Guide)
@@ -57,6 +119,19 @@ class Settings(BaseSettings):
     LOCAL_HAIKU_MODEL: str = "qwen2.5:14b"  # For simple tasks (Overview, Dashboard)
     LOCAL_FLASH_MODEL: str = "qwen2.5:14b"  # Fast inference
 
+    # Model residency (Ollama): tiers preloaded at startup and kept loaded,
+    # keep-alive per tier, and interchangeable models per tier that the router
+    # may use instead when they are already loaded
+    LOCAL_LLM_WARMUP_TIERS: List[str] = ["haiku"]  # Default agent tier; list more only if they fit in VRAM together
+    LOCAL_LLM_KEEP_ALIVE_BY_TIER: Dict[str, str] = {
+        "opus": "1h",
+        "sonnet": "1h",
+        "haiku": "24h",
+    }
+    LOCAL_MODEL_EQUIVALENTS: Dict[str, List[str]] = {}  # e.g. {"sonnet": ["qwen2.5:32b-instruct-q4_K_M"]}
+    LOCAL_LLM_RESIDENCY_CHECK_INTERVAL: int = 0  # seconds between reloads of evicted tiers, 0 disables
+    LOCAL_LLM_VRAM_GB: float = 0  # VRAM for models; a tier is only reloaded if it fits (0 = never reload)
+
     # Alternative local models (uncomment to use)
     # LOCAL_OPUS_MODEL: str = "llama-3.1-70b-instruct"
     # LOCAL_SONNET_MODEL: str = "llama-3.1-8b-instruct"
@@ -81,9 +156,50 @@ class Settings(BaseSettings):
     # Redis (Phase 2)
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    # SLO-driven model tiering: downgrade an agent's tier when the run is
+    # predicted to finish later than the SLO (seconds from being queued)
+    MODEL_TIERING_ENABLED: bool = True
+    AGENT_RUN_SLO_SECONDS: int = 900
+    MODEL_TIER_FLOORS: Dict[str, str] = {"proposal": "sonnet"}  # Lowest tier per agent (default haiku)
+    TIER_UPGRADE_REGENERATION: bool = False  # Regenerate downgraded outputs off-peak
+    TIER_UPGRADE_CHECK_INTERVAL: int = 900  # seconds
+    TIER_UPGRADE_MAX_ATTEMPTS: int = 3  # Upgrades tried per output before giving up
+    TIER_UPGRADE_RETRY_HOURS: float = 12  # Wait before retrying a failed upgrade, doubled per attempt
+    OFF_PEAK_START_HOUR: int = 22  # Server local time
+    OFF_PEAK_END_HOUR: int = 6
+
     # Timeouts
     AI_REQUEST_TIMEOUT: int = 120  # seconds
     AGENT_PROCESSING_TIMEOUT: int = 600  # 10 minutes total for all agents
+    AGENT_TIMEOUT: int = 240  # seconds per agent
+
+    # Job Scheduler
+    AGENT_WORKER_CONCURRENCY: int = 2  # Agent runs processed in parallel
+    SCHEDULER_AGING_POINTS_PER_MINUTE: float = 2.0  # Priority gained per minute queued
+
+    # Latency Model (completion estimates & capacity planning)
+    LATENCY_EWMA_ALPHA: float = 0.2  # Weight of the newest sample
+    LATENCY_PERSIST_INTERVAL: int = 300  # seconds between snapshots to the DB
+    LATENCY_SEED_SAMPLES: int = 500  # AgentOutputs used to seed an empty model
+
+    # Proposal fast path: render proposals for these complexities from HTML
+    # templates instead of the proposal model; a model at PROPOSAL_SUMMARY_TIER
+    # writes just the opening summary ("" for the standard summary). The output
+    # records that tier, so below the proposal's own tier it counts as downgraded
+    PROPOSAL_TEMPLATE_COMPLEXITIES: List[str] = ["simple"]
+    PROPOSAL_SUMMARY_TIER: str = "haiku"
+
+    # Cross-project reuse of agent responses for identical canonical inputs:
+    # agent type -> hours a stored response stays reusable (absent = no reuse)
+    AGENT_OUTPUT_REUSE_TTL_HOURS: Dict[str, float] = {"dashboard": 168, "workflow": 168, "progress": 168}
+
+    # Agent output version history: full texts every N versions, deltas between
+    AGENT_OUTPUT_BASE_INTERVAL: int = 10
+
+    # Template Catalog (challenge matching reads an in-memory copy)
+    TEMPLATE_CATALOG_REFRESH_INTERVAL: int = 60  # seconds between version checks, 0 disables
+    TEMPLATE_CATALOG_CHANNEL: str = "workflow_templates_changed"  # Postgres NOTIFY channel, "" disables
+    TEMPLATE_TIER_PRICES: Dict[str, float] = {"basic": 1000, "standard": 2000, "advanced": 3500}
 
     class Config:
         env_file = ".env"
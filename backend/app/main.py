@@ -7,8 +7,16 @@ from fastapi.responses import JSONResponse
 import logging
 
 from app.config import settings
-from app.database import engine, Base
-from app.api import intake, projects, websocket
+from app.database import engine, Base, AsyncSessionLocal
+from app.api import intake, projects, websocket, stats
+from app.services.agent_orchestrator import orchestrator
+from app.services.latency_model import latency_model
+from app.services.local_llm_service import local_llm
+from app.services.job_scheduler import job_scheduler
+from app.services.model_residency import model_residency
+from app.services.model_tiering import tiering_policy
+from app.services.template_catalog import template_catalog
+from app.services.token_counter import token_counter
 
 # Configure logging
 logging.basicConfig(
@@ -52,12 +60,62 @@ async def startup_event():
             await conn.run_sync(Base.metadata.create_all)
             logger.info("Database tables created")
 
+    # Restore rolling agent latency stats for completion estimates
+    try:
+        async with AsyncSessionLocal() as db:
+            await latency_model.load(db, dict(orchestrator.agent_models()))
+    except Exception as e:
+        logger.warning(f"Could not load latency stats: {e}")
+    latency_model.start()
+
+    # Load the workflow template catalog for challenge matching, and keep it
+    # in sync with template edits
+    try:
+        async with AsyncSessionLocal() as db:
+            await template_catalog.load(db)
+    except Exception as e:
+        logger.warning(f"Could not load template catalog, using built-in mappings: {e}")
+    template_catalog.start()
+
+    # Load tokenizers for accurate token counts and context-window sizing
+    token_counter.start()
+
+    # Preload local models in the background so the first lead doesn't pay
+    # the model load, and reload them if they get evicted
+    if settings.LLM_MODE in ("local", "hybrid"):
+        model_residency.start()
+
+    # Start agent run workers
+    job_scheduler.start()
+
+    # Off-peak regeneration of outputs produced by a downgraded model tier
+    tiering_policy.start()
+
+    # Resume runs queued or interrupted before a restart (completed agents are skipped)
+    try:
+        async with AsyncSessionLocal() as db:
+            for project_id in await orchestrator.find_interrupted_runs(db):
+                job_scheduler.submit(
+                    intake.run_agents_for_project,
+                    priority=0,
+                    name=f"resume:{project_id}",
+                    project_id=project_id
+                )
+    except Exception as e:
+        logger.warning(f"Could not resume interrupted agent runs: {e}")
+
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on application shutdown."""
     logger.info("Shutting down application...")
+    await tiering_policy.stop()
+    await template_catalog.stop()
+    await job_scheduler.stop()
+    await model_residency.stop()
+    await local_llm.stop()
+    await latency_model.stop()
     await engine.dispose()
 
 
@@ -89,6 +147,7 @@ async def root():
 app.include_router(intake.router)
 app.include_router(projects.router)
 app.include_router(websocket.router)
+app.include_router(stats.router)
 
 
 # Global exception handler
@@ -3,18 +3,26 @@ Database models package.
 """
 from app.models.project import Project
 from app.models.agent_output import AgentOutput
+from app.models.agent_output_version import AgentOutputVersion
 from app.models.workflow_template import WorkflowTemplate
 from app.models.project_workflow import ProjectWorkflow
 from app.models.chat_message import ChatMessage
 from app.models.approval import Approval
 from app.models.notification import Notification
+from app.models.agent_latency_stat import AgentLatencyStat
+from app.models.orchestration_checkpoint import OrchestrationCheckpoint
+from app.models.reusable_output import ReusableOutput
 
 __all__ = [
     "Project",
     "AgentOutput",
+    "AgentOutputVersion",
     "WorkflowTemplate",
     "ProjectWorkflow",
     "ChatMessage",
     "Approval",
     "Notification",
+    "AgentLatencyStat",
+    "OrchestrationCheckpoint",
+    "ReusableOutput",
 ]
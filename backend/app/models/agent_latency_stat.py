@@ -0,0 +1,42 @@
+"""
+AgentLatencyStat model - persisted snapshot of rolling agent latency statistics.
+"""
+from sqlalchemy import Column, String, Integer, Float, TIMESTAMP, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+from app.database import Base
+
+
+class AgentLatencyStat(Base):
+    """Rolling latency statistics for one (agent_type, model_name) pair."""
+
+    __tablename__ = "agent_latency_stats"
+
+    # Primary Key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Key
+    agent_type = Column(String(50), nullable=False)
+    model_name = Column(String(255), nullable=False)
+
+    # Rolling statistics (seconds)
+    sample_count = Column(Integer, default=0)
+    ewma_seconds = Column(Float, nullable=False)
+    p50_seconds = Column(Float, nullable=False)
+    p95_seconds = Column(Float, nullable=False)
+
+    # Metadata
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('agent_type', 'model_name', name='uq_latency_agent_model'),
+    )
+
+    def __repr__(self):
+        return (
+            f"<AgentLatencyStat(agent_type='{self.agent_type}', model_name='{self.model_name}', "
+            f"p50={self.p50_seconds}, p95={self.p95_seconds})>"
+        )
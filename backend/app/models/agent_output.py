@@ -1,7 +1,7 @@
 """
 AgentOutput model - stores outputs from AI agents.
 """
-from sqlalchemy import Column, String, Integer, TIMESTAMP, Text, Index, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, Text, Index, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -31,21 +31,35 @@ class AgentOutput(Base):
 
     # Status
     status = Column(String(50), default='generating')
-    # Status: 'generating', 'completed', 'approved', 'rejected', 'regenerating'
+    # Status: 'generating', 'completed', 'approved', 'rejected', 'regenerating',
+    #         'failed', 'timed_out'
 
     # Approval
     approved_by = Column(String(255))
     approved_at = Column(TIMESTAMP)
     rejection_reason = Column(Text)
 
+    # Last failure; the content is the previous version if there was one
+    error = Column(Text)
+
     # Metadata
     generated_at = Column(TIMESTAMP, server_default=func.now())
     tokens_used = Column(Integer)  # For cost tracking
     generation_time_seconds = Column(Integer)
+    provider = Column(String(20))  # 'local', 'anthropic', 'gemini', 'template', 'reuse'
+    model_name = Column(String(100))  # Model that produced the content
+    model_tier = Column(String(20))  # 'opus', 'sonnet', 'haiku'
+    downgraded = Column(Boolean, default=False)  # Produced below the agent's default tier
+    upgrade_attempts = Column(Integer, default=0)  # Off-peak upgrade regenerations tried
+    last_upgrade_at = Column(TIMESTAMP)
+
+    # Version history (agent_output_versions); this row holds that version's content
+    current_version = Column(Integer)
 
     # Indexes
     __table_args__ = (
-        Index('idx_project_agent', 'project_id', 'agent_type'),
+        # One output per agent per project; regenerations add versions
+        Index('idx_project_agent', 'project_id', 'agent_type', unique=True),
         Index('idx_status', 'status'),
     )
 
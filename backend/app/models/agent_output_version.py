@@ -0,0 +1,48 @@
+"""
+AgentOutputVersion model - version history of agent outputs.
+"""
+from sqlalchemy import Column, String, Integer, TIMESTAMP, LargeBinary, Index, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+import uuid
+
+from app.database import Base
+
+
+class AgentOutputVersion(Base):
+    """One generated version of an AgentOutput (see output_history)."""
+
+    __tablename__ = "agent_output_versions"
+
+    # Primary Key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    output_id = Column(UUID(as_uuid=True), ForeignKey('agent_outputs.id', ondelete='CASCADE'), nullable=False)
+    version = Column(Integer, nullable=False)  # 1, 2, ... per output
+
+    # Version holding the full texts; equal to version for a base
+    base_version = Column(Integer, nullable=False)
+
+    # Output Data
+    content = Column(JSONB, nullable=False)
+    # zlib-compressed full text for a base, else a delta against the base
+    content_html_data = Column(LargeBinary)
+    content_markdown_data = Column(LargeBinary)
+
+    # Metadata
+    tokens_used = Column(Integer)
+    provider = Column(String(20))
+    model_name = Column(String(100))
+    model_tier = Column(String(20))
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_output_version', 'output_id', 'version', unique=True),
+    )
+
+    @property
+    def is_base(self) -> bool:
+        return self.version == self.base_version
+
+    def __repr__(self):
+        return f"<AgentOutputVersion(output_id={self.output_id}, version={self.version}, base_version={self.base_version})>"
@@ -0,0 +1,42 @@
+"""
+OrchestrationCheckpoint model - persisted state of an agent orchestration run.
+"""
+from sqlalchemy import Column, String, TIMESTAMP, Text, ARRAY, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+import uuid
+
+from app.database import Base
+
+
+class OrchestrationCheckpoint(Base):
+    """Checkpoint allowing an interrupted or failed run to resume where it stopped."""
+
+    __tablename__ = "orchestration_checkpoints"
+
+    # Primary Key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+
+    # Run State
+    input_hash = Column(String(64), nullable=False)  # SHA-256 of the project inputs
+    context = Column(JSONB, nullable=False)  # Matching context shared by all agents
+    completed_agents = Column(ARRAY(Text), nullable=False, default=list)
+    failed_agent = Column(String(50))
+    error = Column(Text)
+
+    # Status
+    status = Column(String(50), default='running')
+    # Status: 'queued', 'running', 'completed', 'partial', 'failed', 'timed_out'
+
+    # Metadata
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('project_id', name='uq_checkpoint_project'),
+    )
+
+    def __repr__(self):
+        return f"<OrchestrationCheckpoint(project_id={self.project_id}, status='{self.status}')>"
@@ -2,7 +2,7 @@
 Project model - stores client intake form submissions.
 """
 from sqlalchemy import Column, String, Integer, DECIMAL, TIMESTAMP, Text, ARRAY, Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from datetime import datetime
 import uuid
@@ -35,6 +35,7 @@ class Project(Base):
     lead_score = Column(Integer)  # 0-100, calculated by Overview Agent
     revenue_value = Column(DECIMAL(10, 2))  # Estimated project value
     project_complexity = Column(String(50))  # 'simple', 'medium', 'complex'
+    match_result = Column(JSONB)  # Challenge matching result (challenge_matcher.match_project)
 
     # Status
     status = Column(String(50), default='new_lead')
@@ -0,0 +1,37 @@
+"""
+ReusableOutput model - agent model responses reusable across projects.
+"""
+from sqlalchemy import Column, String, Integer, TIMESTAMP, Text, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class ReusableOutput(Base):
+    """A model response stored under the fingerprint of its canonical inputs."""
+
+    __tablename__ = "reusable_outputs"
+
+    # Primary Key: SHA-256 of the agent's canonical request (see output_reuse)
+    fingerprint = Column(String(64), primary_key=True)
+    agent_type = Column(String(50), nullable=False)
+
+    # Response with project-specific values replaced by [[placeholders]]
+    text = Column(Text, nullable=False)
+    provider = Column(String(20))
+    model_name = Column(String(100))
+    tokens_used = Column(Integer, default=0)  # Tokens each reuse saves
+
+    # Usage
+    hits = Column(Integer, default=0)
+
+    # Metadata
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_reusable_agent_created', 'agent_type', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<ReusableOutput(agent_type='{self.agent_type}', fingerprint='{self.fingerprint[:12]}', hits={self.hits})>"
@@ -19,6 +19,7 @@ class WorkflowTemplate(Base):
 
     # Template Info
     name = Column(String(255), nullable=False)
+    slug = Column(String(100), unique=True)  # e.g. 'ai_quote_generator'; defaults to name
     description = Column(Text, nullable=False)
     category = Column(String(100), nullable=False)
     # Categories: 'enquiry_capture', 'quote_generation', 'follow_up',
@@ -34,6 +35,7 @@ class WorkflowTemplate(Base):
     # Pricing & Complexity
     estimated_hours = Column(DECIMAL(5, 2), nullable=False)
     pricing_tier = Column(String(50), nullable=False)  # 'basic', 'standard', 'advanced'
+    base_price = Column(DECIMAL(10, 2))  # Defaults to TEMPLATE_TIER_PRICES[pricing_tier]
     complexity = Column(String(50), nullable=False)  # 'simple', 'medium', 'complex'
 
     # Usage Stats
@@ -1,23 +1,36 @@
 """
 Agent Orchestrator - Runs all AI agents sequentially for a project.
 """
-from typing import Dict, Any, Optional, Callable
-import asyncio
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import hashlib
+import json
 import logging
+import time
+
+from sqlalchemy import select
 
 from app.models.project import Project
+from app.models.orchestration_checkpoint import OrchestrationCheckpoint
+from app.agents.base import AgentTimeoutError
 from app.agents.overview_agent import OverviewAgent
 from app.agents.proposal_agent import ProposalAgent
 from app.agents.build_guide_agent import BuildGuideAgent
 from app.agents.workflow_agent import WorkflowAgent
 from app.agents.dashboard_agent import DashboardAgent
 from app.agents.progress_agent import ProgressAgent
-from app.services.challenge_matcher import match_challenges_to_templates, calculate_lead_score
+from app.services.challenge_matcher import match_project, is_current_match, calculate_lead_score
+from app.services.model_tiering import tiering_policy
+from app.config import settings
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
 
+class RunTimeoutError(Exception):
+    """Raised when a run exceeds AGENT_PROCESSING_TIMEOUT."""
+    pass
+
+
 class AgentOrchestrator:
     """
     Orchestrates the execution of all AI agents for a project.
@@ -33,20 +46,55 @@ class AgentOrchestrator:
         self.dashboard_agent = DashboardAgent()
         self.progress_agent = ProgressAgent()
 
+        self.agents = [
+            self.overview_agent,
+            self.proposal_agent,
+            self.build_guide_agent,
+            self.workflow_agent,
+            self.dashboard_agent,
+            self.progress_agent,
+        ]
+
+        # Runs currently in progress (queue depth for completion estimates)
+        self.active_runs = 0
+
+    def agent_models(self) -> List[Tuple[str, str]]:
+        """(agent_type, model_name) for every agent, in execution order."""
+        return [(agent.agent_type, agent.model_name) for agent in self.agents]
+
+    @property
+    def agent_types(self) -> List[str]:
+        """Agent types in execution order."""
+        return [agent.agent_type for agent in self.agents]
+
     async def run_all_agents(
         self,
         project: Project,
         db_session,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        agent_types: Optional[List[str]] = None,
+        run_started_at: Optional[float] = None,
+        upgrade: bool = False
     ) -> Dict[str, Any]:
         """
-        Run all 6 agents sequentially for a project.
+        Run agents sequentially for a project, resuming from its checkpoint.
+
+        Progress is checkpointed after every agent. When the project's inputs
+        are unchanged since the last run, agents that already completed are
+        skipped and the stored context is reused, so a retry or a restarted
+        worker only pays for the missing or failed agents.
 
         Args:
             project: Project instance
             db_session: Database session
             progress_callback: Optional async callback for progress updates
                               Signature: async def callback(agent_type: str, status: str, progress: int)
+            agent_types: Run exactly these agents (e.g. to regenerate one),
+                         regardless of checkpoint state. Default: all missing agents.
+            run_started_at: time.time() when the run was queued; the tiering
+                            policy measures the SLO from here (default: now)
+            upgrade: Run every agent at its default tier and keep the previous
+                     output if it fails (off-peak upgrade regeneration)
 
         Returns:
             Dictionary with results from all agents
@@ -54,89 +102,69 @@ class AgentOrchestrator:
         logger.info(f"Starting agent orchestration for project {project.id}")
 
         results = {}
+        checkpoint = None
+        current_agent = None
+        deadline = time.monotonic() + settings.AGENT_PROCESSING_TIMEOUT
+        run_started_at = run_started_at or time.time()
+        self.active_runs += 1
 
         try:
-            # Step 1: Match challenges to templates
-            logger.info("Matching challenges to templates...")
-            matching_result = match_challenges_to_templates(project.challenges)
-
-            # Calculate lead score
-            lead_score = calculate_lead_score(
-                team_size=project.team_size,
-                num_challenges=len(project.challenges),
-                notes=project.notes or "",
-                revenue_value=float(matching_result["total_value"])
-            )
-
-            # Update project with calculated fields
-            project.lead_score = lead_score
-            project.revenue_value = Decimal(str(matching_result["total_value"]))
-            project.project_complexity = matching_result["complexity"]
+            checkpoint, context = await self._prepare_checkpoint(project, db_session)
+            completed = list(checkpoint.completed_agents or [])
+
+            if agent_types is not None:
+                to_run = [agent for agent in self.agents if agent.agent_type in agent_types]
+            else:
+                to_run = [agent for agent in self.agents if agent.agent_type not in completed]
+                for agent_type in completed:
+                    logger.info(f"Skipping {agent_type} agent for project {project.id} (checkpointed)")
+
+            for index, agent in enumerate(to_run):
+                current_agent = agent.agent_type
+
+                # Whole-run deadline: each agent gets at most the time remaining
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RunTimeoutError(
+                        f"Run exceeded {settings.AGENT_PROCESSING_TIMEOUT}s before {agent.agent_type} agent"
+                    )
+
+                if progress_callback:
+                    await progress_callback(agent.agent_type, "started", 0)
+
+                # Drop to a faster tier if the run is predicted to miss its SLO
+                model_tier, _ = tiering_policy.choose(
+                    agent, to_run[index + 1:], run_started_at, upgrade=upgrade
+                )
+
+                results[agent.agent_type] = await agent.run(
+                    project,
+                    context,
+                    db_session,
+                    timeout=remaining,
+                    model_tier=model_tier,
+                    preserve_on_failure=upgrade,
+                    # Explicit regenerations ask for a new response
+                    reuse_outputs=agent_types is None
+                )
+
+                # Checkpoint after every agent
+                if agent.agent_type not in completed:
+                    completed.append(agent.agent_type)
+                checkpoint.completed_agents = list(completed)
+                await db_session.commit()
+
+                if progress_callback:
+                    await progress_callback(agent.agent_type, "completed", 100)
+
+            current_agent = None
+            # Every requested agent succeeded; 'partial' if agents outside this
+            # run (e.g. a single-agent regeneration) are still missing
+            checkpoint.status = "completed" if set(self.agent_types) <= set(completed) else "partial"
+            checkpoint.failed_agent = None
+            checkpoint.error = None
             await db_session.commit()
 
-            context = {
-                "matched_templates": matching_result["matched_templates"],
-                "total_value": matching_result["total_value"],
-                "complexity": matching_result["complexity"],
-                "estimated_hours": matching_result["estimated_hours"],
-                "estimated_weeks": matching_result["estimated_weeks"],
-                "categories": matching_result["categories"]
-            }
-
-            # Step 2: Run Overview Agent
-            if progress_callback:
-                await progress_callback("overview", "started", 0)
-
-            results["overview"] = await self.overview_agent.run(project, context, db_session)
-
-            if progress_callback:
-                await progress_callback("overview", "completed", 100)
-
-            # Step 3: Run Proposal Agent
-            if progress_callback:
-                await progress_callback("proposal", "started", 0)
-
-            results["proposal"] = await self.proposal_agent.run(project, context, db_session)
-
-            if progress_callback:
-                await progress_callback("proposal", "completed", 100)
-
-            # Step 4: Run Build Guide Agent
-            if progress_callback:
-                await progress_callback("build_guide", "started", 0)
-
-            results["build_guide"] = await self.build_guide_agent.run(project, context, db_session)
-
-            if progress_callback:
-                await progress_callback("build_guide", "completed", 100)
-
-            # Step 5: Run Workflow Agent
-            if progress_callback:
-                await progress_callback("workflow", "started", 0)
-
-            results["workflow"] = await self.workflow_agent.run(project, context, db_session)
-
-            if progress_callback:
-                await progress_callback("workflow", "completed", 100)
-
-            # Step 6: Run Dashboard Agent
-            if progress_callback:
-                await progress_callback("dashboard", "started", 0)
-
-            results["dashboard"] = await self.dashboard_agent.run(project, context, db_session)
-
-            if progress_callback:
-                await progress_callback("dashboard", "completed", 100)
-
-            # Step 7: Run Progress Agent
-            if progress_callback:
-                await progress_callback("progress", "started", 0)
-
-            results["progress"] = await self.progress_agent.run(project, context, db_session)
-
-            if progress_callback:
-                await progress_callback("progress", "completed", 100)
-
             logger.info(f"Agent orchestration completed for project {project.id}")
 
             return {
@@ -148,6 +176,16 @@ class AgentOrchestrator:
         except Exception as e:
             logger.error(f"Agent orchestration failed for project {project.id}: {e}")
 
+            if checkpoint is not None:
+                try:
+                    checkpoint.status = "timed_out" if isinstance(e, (RunTimeoutError, AgentTimeoutError)) else "failed"
+                    checkpoint.failed_agent = current_agent
+                    checkpoint.error = str(e)
+                    await db_session.commit()
+                except Exception as checkpoint_error:
+                    await db_session.rollback()
+                    logger.error(f"Failed to checkpoint project {project.id}: {checkpoint_error}")
+
             if progress_callback:
                 await progress_callback("error", "failed", 0)
 
@@ -157,6 +195,140 @@ class AgentOrchestrator:
                 "results": results
             }
 
+        finally:
+            self.active_runs -= 1
+
+    async def mark_queued(self, project: Project, db_session, agent_types: Optional[List[str]] = None) -> None:
+        """
+        Checkpoint a run as queued when it is submitted to the job scheduler.
+
+        The scheduler's queue is in memory, so queued checkpoints are what
+        find_interrupted_runs resumes after a restart. Agents queued for
+        regeneration are taken off the completed list, so the resumed run
+        (which runs the missing agents) still regenerates them.
+
+        Args:
+            project: Project instance
+            db_session: Database session
+            agent_types: Agents queued for regeneration (default: a full run)
+        """
+        checkpoint, _ = await self._prepare_checkpoint(project, db_session, status="queued")
+        if agent_types:
+            checkpoint.completed_agents = [
+                agent_type for agent_type in checkpoint.completed_agents or []
+                if agent_type not in agent_types
+            ]
+            await db_session.commit()
+
+    async def _prepare_checkpoint(
+        self,
+        project: Project,
+        db_session,
+        status: str = "running"
+    ) -> Tuple[OrchestrationCheckpoint, Dict[str, Any]]:
+        """
+        Load the project's checkpoint, or start a fresh one if there is none
+        or the project inputs changed since it was written.
+
+        Args:
+            project: Project instance
+            db_session: Database session
+            status: Status to mark the checkpoint with
+
+        Returns:
+            (checkpoint, context) with the checkpoint marked with status
+        """
+        input_hash = compute_input_hash(project)
+
+        result = await db_session.execute(
+            select(OrchestrationCheckpoint).where(OrchestrationCheckpoint.project_id == project.id)
+        )
+        checkpoint = result.scalar_one_or_none()
+
+        if checkpoint is not None and checkpoint.input_hash == input_hash and checkpoint.context:
+            if status == "running":
+                logger.info(
+                    f"Resuming project {project.id} from checkpoint "
+                    f"({len(checkpoint.completed_agents or [])} agents completed)"
+                )
+            checkpoint.status = status
+            await db_session.commit()
+            return checkpoint, checkpoint.context
+
+        # Step 1: Match challenges to templates (stored at intake; redone
+        # only if the challenges or notes have changed since)
+        matching_result = project.match_result
+        if not is_current_match(matching_result, project.challenges, project.notes):
+            logger.info("Matching challenges to templates...")
+            matching_result = match_project(project.challenges, project.notes)
+            project.match_result = matching_result
+
+        # Calculate lead score
+        lead_score = calculate_lead_score(
+            team_size=project.team_size,
+            num_challenges=len(project.challenges),
+            notes=project.notes or "",
+            revenue_value=float(matching_result["total_value"])
+        )
+
+        # Update project with calculated fields
+        project.lead_score = lead_score
+        project.revenue_value = Decimal(str(matching_result["total_value"]))
+        project.project_complexity = matching_result["complexity"]
+
+        context = {
+            "matched_templates": matching_result["matched_templates"],
+            "total_value": matching_result["total_value"],
+            "complexity": matching_result["complexity"],
+            "estimated_hours": matching_result["estimated_hours"],
+            "estimated_weeks": matching_result["estimated_weeks"],
+            "categories": matching_result["categories"],
+            "suggested_templates": matching_result.get("suggested_templates", []),
+            "matcher_version": matching_result.get("matcher_version")
+        }
+
+        if checkpoint is None:
+            checkpoint = OrchestrationCheckpoint(project_id=project.id)
+            db_session.add(checkpoint)
+
+        checkpoint.input_hash = input_hash
+        checkpoint.context = context
+        checkpoint.completed_agents = []
+        checkpoint.failed_agent = None
+        checkpoint.error = None
+        checkpoint.status = status
+        await db_session.commit()
+
+        return checkpoint, context
+
+    async def find_interrupted_runs(self, db_session) -> List[str]:
+        """
+        Project IDs whose last run was queued or still in progress, e.g.
+        because the worker was restarted before or during the run.
+        """
+        result = await db_session.execute(
+            select(OrchestrationCheckpoint.project_id).where(
+                OrchestrationCheckpoint.status.in_(["queued", "running"])
+            )
+        )
+        return [str(project_id) for project_id in result.scalars().all()]
+
+
+def compute_input_hash(project: Project) -> str:
+    """SHA-256 over the project fields that agents read."""
+    payload = {
+        "client_name": project.client_name,
+        "client_email": project.client_email,
+        "business_name": project.business_name,
+        "team_size": project.team_size,
+        "challenges": list(project.challenges or []),
+        "enquiry_sources": list(project.enquiry_sources or []),
+        "admin_method": project.admin_method,
+        "notes": project.notes or "",
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
 
 # Singleton instance
 orchestrator = AgentOrchestrator()
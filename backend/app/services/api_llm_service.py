@@ -0,0 +1,203 @@
+"""
+API LLM Service - Handles inference with hosted LLM APIs.
+Supports Anthropic Claude and Google Gemini.
+
+All calls use the providers' async clients, so cancelling the awaiting task
+(e.g. when an agent deadline passes) aborts the in-flight HTTP request, and
+are paced by the provider-level rate limiter.
+"""
+import logging
+from typing import Dict, Any, Optional
+
+from app.config import settings
+from app.services.rate_limiter import rate_limiter
+from app.services.token_counter import token_counter
+
+logger = logging.getLogger(__name__)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for provider quota errors (HTTP 429 / RESOURCE_EXHAUSTED)."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return type(error).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+
+class ApiLLMService:
+    """Service for interacting with hosted LLM APIs."""
+
+    def __init__(self):
+        self.timeout = settings.AI_REQUEST_TIMEOUT
+        self._anthropic_client = None
+        self._gemini_configured = False
+
+    async def generate(
+        self,
+        prompt: str,
+        model: str,
+        provider: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        json_schema: Optional[Dict[str, Any]] = None,
+        system: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Generate text using a hosted API.
+
+        Args:
+            prompt: Input prompt
+            model: Model name (e.g., "claude-sonnet-4-5-20250929")
+            provider: "anthropic" or "gemini"
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            json_schema: Optional JSON Schema; switches the provider to its
+                         JSON output mode
+            system: Optional system instructions
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            Dict with 'text' and 'usage' keys
+        """
+        # Worst case: the whole prompt plus a full-length response
+        estimated_tokens = (
+            token_counter.count(prompt, provider, model)
+            + token_counter.count(system or "", provider, model)
+            + max_tokens
+        )
+        attempt = 0
+
+        while True:
+            # Wait for request and token budget before sending
+            await rate_limiter.acquire(provider, model, estimated_tokens)
+
+            try:
+                if provider == "anthropic":
+                    result = await self._generate_anthropic(
+                        prompt, model, temperature, max_tokens, json_schema, system
+                    )
+                elif provider == "gemini":
+                    result = await self._generate_gemini(
+                        prompt, model, temperature, max_tokens, json_schema, system
+                    )
+                else:
+                    raise ValueError(f"Unsupported API provider: {provider}")
+
+                await rate_limiter.settle(
+                    provider, model, estimated_tokens, result["usage"].get("total_tokens", 0)
+                )
+                return result
+
+            except Exception as e:
+                if is_rate_limit_error(e) and attempt < settings.RATE_LIMIT_MAX_RETRIES:
+                    attempt += 1
+                    delay = settings.RATE_LIMIT_BACKOFF_SECONDS * attempt
+                    logger.warning(f"{provider}:{model} rate limited, backing off {delay}s (attempt {attempt})")
+                    await rate_limiter.backoff(provider, model, delay)
+                    continue
+
+                logger.error(f"API LLM generation failed ({provider}): {e}")
+                raise
+
+    async def _generate_anthropic(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None,
+        system: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate text using the Anthropic Messages API.
+
+        For JSON output the assistant turn is prefilled with "{", which
+        makes Claude continue with the object itself rather than prose.
+        The system prompt is marked cacheable; Anthropic serves it from its
+        prompt cache on later calls once it exceeds the minimum cache size.
+        """
+        if self._anthropic_client is None:
+            from anthropic import AsyncAnthropic
+            self._anthropic_client = AsyncAnthropic(
+                api_key=settings.ANTHROPIC_API_KEY,
+                timeout=self.timeout
+            )
+
+        messages = [{"role": "user", "content": prompt}]
+        prefill = ""
+        if json_schema:
+            prefill = "{"
+            messages.append({"role": "assistant", "content": prefill})
+
+        request = {}
+        if system:
+            request["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+
+        response = await self._anthropic_client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=messages,
+            **request
+        )
+
+        # input_tokens excludes tokens written to or read from the cache
+        cache_written = getattr(response.usage, "cache_creation_input_tokens", None) or 0
+        cache_read = getattr(response.usage, "cache_read_input_tokens", None) or 0
+        prompt_tokens = response.usage.input_tokens + cache_written + cache_read
+
+        return {
+            "text": prefill + response.content[0].text,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": response.usage.output_tokens,
+                "total_tokens": prompt_tokens + response.usage.output_tokens,
+                "cached_tokens": cache_read
+            }
+        }
+
+    async def _generate_gemini(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None,
+        system: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Generate text using the Gemini API."""
+        import google.generativeai as genai
+
+        if not self._gemini_configured:
+            genai.configure(api_key=settings.GOOGLE_AI_API_KEY)
+            self._gemini_configured = True
+
+        generation_config = {
+            "temperature": temperature,
+            "top_p": 0.95,
+            "max_output_tokens": max_tokens,
+        }
+        if json_schema:
+            generation_config["response_mime_type"] = "application/json"
+
+        response = await genai.GenerativeModel(model, system_instruction=system).generate_content_async(
+            prompt,
+            generation_config=generation_config
+        )
+        text = response.text
+
+        usage = {}
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is not None:
+            usage["prompt_tokens"] = getattr(metadata, "prompt_token_count", 0) or 0
+            usage["completion_tokens"] = getattr(metadata, "candidates_token_count", 0) or 0
+            usage["cached_tokens"] = getattr(metadata, "cached_content_token_count", 0) or 0
+
+        return {
+            "text": text,
+            "usage": token_counter.complete_usage(usage, "gemini", model, prompt, text, system)
+        }
+
+
+# Global instance
+api_llm = ApiLLMService()
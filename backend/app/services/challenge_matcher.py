@@ -1,8 +1,14 @@
 """
 Challenge Matching Engine - Maps client challenges to workflow templates.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from decimal import Decimal
+import hashlib
+import json
+import re
+
+from app.utils.keyword_scanner import KeywordScanner
+from app.utils.similarity_index import SimilarityIndex
 
 
 # Challenge to Template Mapping Configuration
@@ -15,7 +21,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "enquiry_capture",
         "urgency": "high",
-        "base_price": 2500
+        "base_price": 2500,
+        "description": "Missed calls, leads, emails, website forms, Facebook and WhatsApp messages go unanswered or get a slow response"
     },
     "Quotes take too long to send": {
         "templates": [
@@ -25,7 +32,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "quote_generation",
         "urgency": "high",
-        "base_price": 3500
+        "base_price": 3500,
+        "description": "Writing, pricing and sending quotes and estimates takes ages; quoting is slow and manual"
     },
     "I don't have time to chase people": {
         "templates": [
@@ -35,7 +43,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "follow_up",
         "urgency": "medium",
-        "base_price": 2000
+        "base_price": 2000,
+        "description": "Following up on quotes, leads and old customers who went quiet; no follow up or nudges"
     },
     "I lose track of jobs once they're booked": {
         "templates": [
@@ -45,7 +54,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "job_management",
         "urgency": "medium",
-        "base_price": 3000
+        "base_price": 3000,
+        "description": "Booked jobs, site visits and work in progress slip through the cracks; no job tracking"
     },
     "Scheduling jobs is messy or confusing": {
         "templates": [
@@ -55,7 +65,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "scheduling",
         "urgency": "medium",
-        "base_price": 2500
+        "base_price": 2500,
+        "description": "Planning the calendar, booking appointments, diary and crew rota; double bookings"
     },
     "Customers keep messaging for updates": {
         "templates": [
@@ -65,7 +76,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "client_communication",
         "urgency": "low",
-        "base_price": 2000
+        "base_price": 2000,
+        "description": "Clients call and text asking for progress and status updates on their job"
     },
     "I forget to invoice or invoice late": {
         "templates": [
@@ -75,7 +87,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "invoicing",
         "urgency": "high",
-        "base_price": 2500
+        "base_price": 2500,
+        "description": "Invoicing and billing is late or forgotten once work is finished; paperwork for invoices"
     },
     "Chasing payments is awkward": {
         "templates": [
@@ -85,7 +98,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "payments",
         "urgency": "medium",
-        "base_price": 1500
+        "base_price": 1500,
+        "description": "Customers pay late or not at all; unpaid invoices, overdue payments and debt chasing"
     },
     "I don't ask for reviews often enough": {
         "templates": [
@@ -95,7 +109,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "marketing",
         "urgency": "low",
-        "base_price": 1000
+        "base_price": 1000,
+        "description": "Getting Google reviews, testimonials, ratings and referrals from happy customers"
     },
     "I have no clear view of what's going on day to day": {
         "templates": [
@@ -105,7 +120,8 @@ CHALLENGE_MAPPINGS = {
         ],
         "category": "reporting",
         "urgency": "medium",
-        "base_price": 2000
+        "base_price": 2000,
+        "description": "No visibility of how the business is doing; reports, numbers, KPIs and a daily overview"
     }
 }
 
@@ -128,7 +144,15 @@ class ChallengeMatchResult:
         self.estimated_weeks = estimated_weeks
 
 
-def match_challenges_to_templates(challenges: List[str], db_session=None) -> Dict[str, Any]:
+# Matched templates are listed most urgent first
+URGENCY_ORDER = {"high": 3, "medium": 2, "low": 1}
+
+
+def match_challenges_to_templates(
+    challenges: List[str],
+    db_session=None,
+    notes: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Takes client's selected challenges and returns:
     - Matched workflow templates
@@ -136,33 +160,90 @@ def match_challenges_to_templates(challenges: List[str], db_session=None) -> Dic
     - Complexity rating
     - Recommended implementation order
 
+    Matches against the active template catalog (see template_catalog),
+    held in memory as a MatchIndex, so a match never queries the database.
+    Challenges typed in free text are matched to the most similar catalog
+    challenge (see MatchIndex.resolve).
+
     Args:
         challenges: List of challenge strings from form
-        db_session: Optional database session to fetch actual templates
+        db_session: Unused; kept for callers that pass one
+        notes: Client notes; if given, the result also has
+               'suggested_templates' for catalog challenges the notes
+               describe (not priced)
 
     Returns:
         Dictionary with matched templates, pricing, and complexity
     """
+    index = _active_index
+    resolved = index.resolve(challenges)
+    result = index.match(resolved)
+
+    if notes is not None:
+        result["suggested_templates"] = index.suggest(notes, exclude=resolved)
+    return result
+
+
+def match_project(challenges: List[str], notes: Optional[str]) -> Dict[str, Any]:
+    """
+    Match a project's challenges and notes, for storing on the project.
+
+    Returns:
+        The match_challenges_to_templates result (with suggested_templates)
+        plus 'matcher_version' (matching rules and catalog version used) and
+        'inputs_hash' (see is_current_match)
+    """
+    result = match_challenges_to_templates(challenges, notes=notes or "")
+    return {
+        **result,
+        "matcher_version": f"{MATCHER_VERSION}/{_active_index.version}",
+        "inputs_hash": _match_inputs_hash(challenges, notes),
+    }
+
+
+def is_current_match(match_result: Optional[Dict[str, Any]], challenges: List[str], notes: Optional[str]) -> bool:
+    """
+    Whether a stored match result was made from these challenges and notes.
+
+    A stored result stays valid when the catalog changes, so a project's
+    quote only changes when its own inputs do.
+    """
+    return bool(match_result) and match_result.get("inputs_hash") == _match_inputs_hash(challenges, notes)
+
+
+def _match_inputs_hash(challenges: List[str], notes: Optional[str]) -> str:
+    payload = json.dumps({"challenges": list(challenges or []), "notes": notes or ""}, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _match_challenges(
+    challenges: List[str],
+    mappings: Dict[str, Dict[str, Any]] = CHALLENGE_MAPPINGS
+) -> Dict[str, Any]:
+    """Match challenges one by one (builds MatchIndex tables; handles any input)."""
     matched_templates = []
     total_value = Decimal('0')
     categories = set()
 
     for challenge in challenges:
-        config = CHALLENGE_MAPPINGS.get(challenge)
+        config = mappings.get(challenge)
         if not config:
             continue
 
         # Get primary template for this challenge
         primary_template_slug = config["templates"][0] if config["templates"] else None
 
-        matched_templates.append({
+        template = {
             "challenge": challenge,
             "category": config["category"],
             "urgency": config["urgency"],
             "base_price": config["base_price"],
             "template_slug": primary_template_slug,
             "all_templates": config["templates"]
-        })
+        }
+        if config.get("estimated_hours") is not None:
+            template["estimated_hours"] = config["estimated_hours"]
+        matched_templates.append(template)
 
         total_value += Decimal(str(config["base_price"]))
         categories.add(config["category"])
@@ -175,9 +256,8 @@ def match_challenges_to_templates(challenges: List[str], db_session=None) -> Dic
     )
 
     # Sort by urgency (high first)
-    urgency_order = {"high": 3, "medium": 2, "low": 1}
     matched_templates.sort(
-        key=lambda x: urgency_order.get(x["urgency"], 0),
+        key=lambda x: URGENCY_ORDER.get(x["urgency"], 0),
         reverse=True
     )
 
@@ -243,12 +323,14 @@ def calculate_complexity(num_challenges: int, num_categories: int, total_value:
 def calculate_hours(matched_templates: List[Dict[str, Any]]) -> int:
     """
     Estimate total hours based on matched templates.
-    Uses pricing as proxy: roughly 1 hour per £100-150
+    Uses the template's estimated_hours where the catalog has it, otherwise
+    pricing as proxy: roughly 1 hour per £100-150
     """
-    total_price = sum(t["base_price"] for t in matched_templates)
-
     # Rough estimation: £125 per hour average
-    base_hours = total_price / 125
+    base_hours = sum(
+        t["estimated_hours"] if t.get("estimated_hours") is not None else t["base_price"] / 125
+        for t in matched_templates
+    )
 
     # Add overhead for integration (20%)
     total_hours = base_hours * 1.2
@@ -278,6 +360,236 @@ def calculate_weeks(estimated_hours: int, complexity: str) -> int:
     return max(1, int(base_weeks + 0.5))
 
 
+# Bump when a change to the matching rules changes results
+MATCHER_VERSION = "3"
+
+# Cosine similarity a free-text challenge needs to its closest catalog
+# challenge to be matched to it
+CHALLENGE_MIN_SIMILARITY = 0.25
+
+# Notes suggest at most this many challenges, each at least this similar
+# to one sentence of the notes
+NOTES_MAX_SUGGESTIONS = 2
+NOTES_MIN_SIMILARITY = 0.25
+_SENTENCE_BREAK = re.compile(r"[.!?;\n]+")
+
+
+def _challenge_document(challenge: str, config: Dict[str, Any]) -> str:
+    """Text a challenge is found by: its wording, description, category and templates."""
+    return " ".join([
+        challenge,
+        config.get("description", ""),
+        config["category"].replace("_", " "),
+        *(template.replace("_", " ") for template in config["templates"]),
+    ])
+
+
+# Catalogs up to this many challenges have every subset matched up front
+# (2^12 = 4096 results); larger ones fill their table as subsets are seen
+MAX_PRECOMPUTED_CHALLENGES = 12
+
+
+class MatchIndex:
+    """
+    Match results for one version of the template catalog.
+
+    Each challenge gets a bit, and the result for a set of challenges is
+    stored under the OR of their bits, so a match is a bitmask lookup.
+    Stored results list templates of the same urgency in catalog order;
+    match() puts them back in the order the client picked them, as
+    one-by-one matching does.
+
+    An index is never modified once built (beyond filling its table); a new
+    catalog version gets a new index.
+    """
+
+    def __init__(self, mappings: Dict[str, Dict[str, Any]], version: str = "builtin"):
+        """
+        Build the index.
+
+        Args:
+            mappings: Challenge -> config, in the shape of CHALLENGE_MAPPINGS
+                      (plus optional 'estimated_hours')
+            version: Catalog version the mappings were loaded from
+        """
+        self.mappings = mappings
+        self.version = version
+        self.bits = {challenge: 1 << index for index, challenge in enumerate(mappings)}
+        self.similarity = SimilarityIndex({
+            challenge: _challenge_document(challenge, config) for challenge, config in mappings.items()
+        })
+        self._table: Dict[int, Dict[str, Any]] = {}
+
+        if len(mappings) <= MAX_PRECOMPUTED_CHALLENGES:
+            for mask in range(1 << len(mappings)):
+                self._table[mask] = self._match_mask(mask)
+
+    def _match_mask(self, mask: int) -> Dict[str, Any]:
+        return _match_challenges(
+            [challenge for challenge, bit in self.bits.items() if mask & bit],
+            self.mappings
+        )
+
+    def resolve(self, challenges: List[str]) -> List[str]:
+        """
+        Replace free-text challenges with the catalog challenge they describe.
+
+        A challenge that isn't in the catalog is replaced by its most similar
+        catalog challenge (at least CHALLENGE_MIN_SIMILARITY), unless that
+        one is already selected. Anything else is kept as given.
+        """
+        if all(challenge in self.bits for challenge in challenges):
+            return challenges
+
+        resolved = []
+        for challenge in challenges:
+            if challenge not in self.bits:
+                best = self.similarity.search(challenge, k=1, min_similarity=CHALLENGE_MIN_SIMILARITY)
+                if best:
+                    if best[0][0] in challenges or best[0][0] in resolved:
+                        continue
+                    challenge = best[0][0]
+            resolved.append(challenge)
+        return resolved
+
+    def suggest(self, notes: str, exclude: List[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Catalog challenges the notes describe, beyond those already selected.
+
+        Each sentence is scored separately and a challenge keeps its best
+        sentence, so one relevant line in long notes isn't diluted.
+
+        Returns:
+            Up to NOTES_MAX_SUGGESTIONS dicts with 'challenge', 'category',
+            'template_slug' and 'similarity', most similar first
+        """
+        sentences = [s for s in _SENTENCE_BREAK.split(notes or "") if s.strip()]
+        if not sentences:
+            return []
+
+        scores = self.similarity.similarities_many(sentences).max(axis=0)
+        suggestions = []
+        for challenge, similarity in self.similarity.top_k(
+            scores, k=NOTES_MAX_SUGGESTIONS + len(exclude), min_similarity=NOTES_MIN_SIMILARITY
+        ):
+            if challenge in exclude:
+                continue
+            config = self.mappings[challenge]
+            suggestions.append({
+                "challenge": challenge,
+                "category": config["category"],
+                "template_slug": config["templates"][0] if config["templates"] else None,
+                "similarity": round(similarity, 3),
+            })
+        return suggestions[:NOTES_MAX_SUGGESTIONS]
+
+    def match(self, challenges: List[str]) -> Dict[str, Any]:
+        """Match challenges (same result as _match_challenges, as a fresh copy)."""
+        mask = 0
+        bits = self.bits
+        in_catalog_order = True
+        for challenge in challenges:
+            bit = bits.get(challenge)
+            if bit is None or mask & bit:
+                # Unknown or repeated challenges still count towards complexity
+                # (and repeats towards value), which the table does not cover
+                return _match_challenges(challenges, self.mappings)
+            if bit < mask:
+                in_catalog_order = False
+            mask |= bit
+
+        result = self._table.get(mask)
+        if result is None:
+            result = self._table[mask] = self._match_mask(mask)
+
+        matched_templates = [
+            {**template, "all_templates": list(template["all_templates"])}
+            for template in result["matched_templates"]
+        ]
+        if not in_catalog_order:
+            # Equal urgency keeps the client's order, as in _match_challenges
+            position = {challenge: i for i, challenge in enumerate(challenges)}
+            matched_templates.sort(key=lambda t: (-URGENCY_ORDER.get(t["urgency"], 0), position[t["challenge"]]))
+
+        return {
+            **result,
+            "matched_templates": matched_templates,
+            "categories": list(result["categories"])
+        }
+
+# Built-in catalog, used until (or unless) the database catalog is loaded
+_BUILTIN_INDEX = MatchIndex(CHALLENGE_MAPPINGS)
+_active_index = _BUILTIN_INDEX
+
+
+def set_catalog(mappings: Dict[str, Dict[str, Any]], version: str) -> MatchIndex:
+    """
+    Build an index for a new catalog version and make it the active one.
+
+    The index is fully built before the single reference swap, so matches
+    in progress finish on the old catalog and later ones see the new one.
+
+    Returns:
+        The new active index
+    """
+    global _active_index
+    index = MatchIndex(mappings, version)
+    _active_index = index
+    return index
+
+
+def reset_catalog() -> None:
+    """Go back to the built-in catalog."""
+    global _active_index
+    _active_index = _BUILTIN_INDEX
+
+
+def active_catalog() -> MatchIndex:
+    """The index matches currently use."""
+    return _active_index
+
+
+# Lead score rubric (shared with the batch scorer in lead_scoring)
+TEAM_SIZE_SCORES = {
+    "Just me": 15,
+    "2-3 people": 20,
+    "4-6 people": 22,
+    "7-10 people": 25,
+    "11+ people": 25
+}
+DEFAULT_TEAM_SIZE_SCORE = 15
+
+# (minimum, points) from highest to lowest; below every minimum scores the last points
+CHALLENGE_COUNT_SCORES = [(7, 30), (5, 25), (3, 20), (0, 15)]
+REVENUE_VALUE_SCORES = [(10000, 25), (7000, 22), (5000, 18), (3000, 15), (0, 10)]
+
+# Notes keyword groups: points per distinct term found, capped per group.
+# Terms match anywhere in the notes (so "miss" also matches "missed") unless
+# they set "word_boundary"; multi-word phrases are allowed
+NOTES_KEYWORD_GROUPS = {
+    "urgency": {
+        "terms": {
+            "urgent": 3, "asap": 3, "immediately": 3, "losing": 3, "miss": 3, "forget": 3,
+        },
+        "max_points": 10,
+    },
+    "revenue": {
+        "terms": {
+            "revenue": 3, "sales": 3, "money": 3, "profit": 3, "growth": 3, "expanding": 3,
+        },
+        "max_points": 10,
+    },
+}
+NOTES_SCANNER = KeywordScanner(NOTES_KEYWORD_GROUPS)
+
+
+def _tier_score(value: float, tiers: List[tuple]) -> int:
+    for minimum, points in tiers:
+        if value >= minimum:
+            return points
+    return tiers[-1][1]
+
+
 def calculate_lead_score(
     team_size: str,
     num_challenges: int,
@@ -296,48 +608,16 @@ def calculate_lead_score(
     score = 0
 
     # Team size scoring (0-25 points)
-    team_size_scores = {
-        "Just me": 15,
-        "2-3 people": 20,
-        "4-6 people": 22,
-        "7-10 people": 25,
-        "11+ people": 25
-    }
-    score += team_size_scores.get(team_size, 15)
+    score += TEAM_SIZE_SCORES.get(team_size, DEFAULT_TEAM_SIZE_SCORE)
 
     # Challenge count scoring (0-30 points)
-    if num_challenges >= 7:
-        score += 30
-    elif num_challenges >= 5:
-        score += 25
-    elif num_challenges >= 3:
-        score += 20
-    else:
-        score += 15
-
-    # Notes analysis scoring (0-20 points)
-    if notes:
-        notes_lower = notes.lower()
-        urgency_keywords = ["urgent", "asap", "immediately", "losing", "miss", "forget"]
-        revenue_keywords = ["revenue", "sales", "money", "profit", "growth", "expanding"]
+    score += _tier_score(num_challenges, CHALLENGE_COUNT_SCORES)
 
-        urgency_count = sum(1 for keyword in urgency_keywords if keyword in notes_lower)
-        revenue_count = sum(1 for keyword in revenue_keywords if keyword in notes_lower)
-
-        score += min(10, urgency_count * 3)  # Max 10 points for urgency
-        score += min(10, revenue_count * 3)  # Max 10 points for revenue mentions
+    # Notes analysis scoring (0-20 points: max 10 for urgency, 10 for revenue mentions)
+    score += sum(NOTES_SCANNER.score(notes).values())
 
     # Revenue value scoring (0-25 points)
-    if revenue_value >= 10000:
-        score += 25
-    elif revenue_value >= 7000:
-        score += 22
-    elif revenue_value >= 5000:
-        score += 18
-    elif revenue_value >= 3000:
-        score += 15
-    else:
-        score += 10
+    score += _tier_score(revenue_value, REVENUE_VALUE_SCORES)
 
     # Ensure score is within 0-100
     return min(100, max(0, score))
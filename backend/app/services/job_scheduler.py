@@ -0,0 +1,145 @@
+"""
+Job Scheduler - Priority-aware execution of agent runs with aging.
+
+Intakes are ordered by lead score and challenge urgency rather than arrival
+time. Every queued job gains priority linearly while it waits, so low-score
+leads are still guaranteed to run under sustained load.
+"""
+from typing import Dict, Any, List, Callable, Awaitable
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Extra priority points per matched challenge, by urgency
+URGENCY_PRIORITY_POINTS = {
+    "high": 5,
+    "medium": 2,
+    "low": 0
+}
+
+
+def calculate_job_priority(lead_score: int, matched_templates: List[Dict[str, Any]]) -> float:
+    """
+    Priority of an agent run: the lead score plus urgency bonuses.
+
+    Args:
+        lead_score: Lead score (0-100) from calculate_lead_score
+        matched_templates: Matched templates from match_challenges_to_templates
+
+    Returns:
+        Priority (higher runs first)
+    """
+    urgency_bonus = sum(
+        URGENCY_PRIORITY_POINTS.get(t.get("urgency"), 0)
+        for t in matched_templates
+    )
+    return float(lead_score or 0) + urgency_bonus
+
+
+class PriorityJobScheduler:
+    """
+    Fixed pool of workers draining a priority queue.
+
+    Effective priority is `priority + aging_rate * waited_seconds`. Because
+    every waiting job ages at the same rate, ordering by effective priority
+    is the same as ordering by `aging_rate * enqueued_at - priority`, which
+    never changes after submission, so a plain heap keeps the order exact.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._available = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._aging_rate = settings.SCHEDULER_AGING_POINTS_PER_MINUTE / 60
+        self.concurrency = settings.AGENT_WORKER_CONCURRENCY
+        self.active = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs waiting to start."""
+        return len(self._heap)
+
+    def _sort_key(self, priority: float, enqueued_at: float) -> float:
+        return self._aging_rate * enqueued_at - priority
+
+    def submit(
+        self,
+        job: Callable[..., Awaitable[Any]],
+        priority: float,
+        name: str = "",
+        **kwargs
+    ) -> None:
+        """
+        Queue a job.
+
+        Args:
+            job: Async callable to run
+            priority: Base priority (higher runs first)
+            name: Label for logging
+            **kwargs: Arguments passed to the job
+        """
+        enqueued_at = self._clock()
+        heapq.heappush(
+            self._heap,
+            (self._sort_key(priority, enqueued_at), next(self._sequence), name, job, kwargs)
+        )
+        self._available.set()
+
+        logger.info(f"Queued job {name} with priority {priority:.1f} ({self.pending} pending)")
+
+    def depth_ahead(self, priority: float) -> int:
+        """Jobs that would run before a job submitted now with this priority."""
+        key = self._sort_key(priority, self._clock())
+        queued_ahead = sum(1 for entry in self._heap if entry[0] <= key)
+        return queued_ahead + self.active
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            while not self._heap:
+                self._available.clear()
+                await self._available.wait()
+
+            _, _, name, job, kwargs = heapq.heappop(self._heap)
+            self.active += 1
+
+            try:
+                await job(**kwargs)
+            except Exception as e:
+                logger.error(f"Scheduled job {name} failed on worker {worker_id}: {e}")
+            finally:
+                self.active -= 1
+
+    def start(self) -> None:
+        """Start the worker pool."""
+        if self._workers:
+            return
+
+        self._workers = [
+            asyncio.create_task(self._worker(i))
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Job scheduler started with {self.concurrency} workers")
+
+    async def stop(self) -> None:
+        """Cancel workers. Jobs still queued are dropped."""
+        for task in self._workers:
+            task.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        if self._heap:
+            logger.warning(f"Job scheduler stopped with {self.pending} jobs still queued")
+
+
+# Global instance
+job_scheduler = PriorityJobScheduler()
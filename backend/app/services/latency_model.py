@@ -0,0 +1,249 @@
+"""
+Latency Model - Rolling per-agent/per-model latency statistics.
+
+Keeps an EWMA and streaming p50/p95 estimates of agent generation time in
+memory, persists them periodically to `agent_latency_stats`, and combines
+them with the current queue depth to predict when a run will complete.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Used until an (agent, model) pair has observed samples: 5 minutes / 6 agents
+DEFAULT_AGENT_SECONDS = 50.0
+
+
+class LatencyStats:
+    """
+    Streaming latency estimator for a single (agent_type, model_name) pair.
+
+    The mean is an exponentially weighted moving average. Quantiles use the
+    stochastic-approximation update q += step * (p - [x < q]), with a step
+    proportional to the current EWMA so the estimate adapts at the same
+    rate for 5-second and 500-second agents.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        ewma: Optional[float] = None,
+        p50: Optional[float] = None,
+        p95: Optional[float] = None,
+        count: int = 0
+    ):
+        self.alpha = alpha
+        self.ewma = ewma
+        self.p50 = p50
+        self.p95 = p95
+        self.count = count
+
+    def observe(self, seconds: float) -> None:
+        """Fold one observed generation time into the estimates."""
+        seconds = max(0.0, float(seconds))
+        self.count += 1
+
+        if self.ewma is None:
+            self.ewma = self.p50 = self.p95 = seconds
+            return
+
+        self.ewma += self.alpha * (seconds - self.ewma)
+
+        step = self.alpha * max(self.ewma, 1.0)
+        self.p50 = self._update_quantile(self.p50, seconds, 0.50, step)
+        self.p95 = max(self.p50, self._update_quantile(self.p95, seconds, 0.95, step))
+
+    @staticmethod
+    def _update_quantile(estimate: float, sample: float, quantile: float, step: float) -> float:
+        if sample < estimate:
+            return max(0.0, estimate - step * (1 - quantile))
+        return estimate + step * quantile
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": self.count,
+            "ewmaSeconds": round(self.ewma or 0.0, 2),
+            "p50Seconds": round(self.p50 or 0.0, 2),
+            "p95Seconds": round(self.p95 or 0.0, 2),
+        }
+
+
+class LatencyModel:
+    """
+    Registry of LatencyStats keyed by (agent_type, model_name).
+
+    Recording is synchronous and cheap so it can be called from the hot path;
+    persistence happens in a background loop started at application startup.
+    """
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], LatencyStats] = {}
+        self._dirty = False
+        self._persist_task: Optional[asyncio.Task] = None
+
+    def record(self, agent_type: str, model_name: str, seconds: float) -> None:
+        """Record an observed generation time."""
+        key = (agent_type, model_name)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = LatencyStats(alpha=settings.LATENCY_EWMA_ALPHA)
+        stats.observe(seconds)
+        self._dirty = True
+
+    def get(self, agent_type: str, model_name: str) -> Optional[LatencyStats]:
+        """Return stats for a pair, or None if nothing has been observed."""
+        return self._stats.get((agent_type, model_name))
+
+    def expected_seconds(self, agent_type: str, model_name: str, quantile: str = "p50") -> float:
+        """Expected generation time for one agent, falling back to the default."""
+        stats = self.get(agent_type, model_name)
+        if stats is None or stats.count == 0:
+            return DEFAULT_AGENT_SECONDS
+        return getattr(stats, quantile) or DEFAULT_AGENT_SECONDS
+
+    def estimate_run_seconds(self, agents: List[Tuple[str, str]], quantile: str = "p50") -> float:
+        """Expected duration of a full run over the given (agent_type, model_name) list."""
+        return sum(self.expected_seconds(agent_type, model, quantile) for agent_type, model in agents)
+
+    def predict_completion(
+        self,
+        agents: List[Tuple[str, str]],
+        queue_depth: int = 0,
+        concurrency: int = 1
+    ) -> datetime:
+        """
+        Predict completion time for a run submitted now.
+
+        Runs ahead of it in the queue are costed at their typical (p50)
+        duration and drained `concurrency` at a time; the run itself is
+        costed at p95 so the estimate is rarely optimistic.
+        """
+        typical_run = self.estimate_run_seconds(agents, "p50")
+        own_run = self.estimate_run_seconds(agents, "p95")
+        wait = typical_run * queue_depth / max(1, concurrency)
+
+        return datetime.utcnow() + timedelta(seconds=wait + own_run)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """All stats as a list of dicts for capacity planning."""
+        return [
+            {"agentType": agent_type, "modelName": model_name, **stats.to_dict()}
+            for (agent_type, model_name), stats in sorted(self._stats.items())
+        ]
+
+    async def load(self, db_session, agent_models: Dict[str, str]) -> None:
+        """
+        Load persisted stats. If none exist yet, seed from the
+        generation_time_seconds already recorded on completed AgentOutputs,
+        attributed to the model that produced them (or, for outputs from
+        before that was recorded, the agent's currently configured model).
+        """
+        from sqlalchemy import select
+        from app.models.agent_latency_stat import AgentLatencyStat
+        from app.models.agent_output import AgentOutput
+
+        result = await db_session.execute(select(AgentLatencyStat))
+        rows = result.scalars().all()
+
+        for row in rows:
+            self._stats[(row.agent_type, row.model_name)] = LatencyStats(
+                alpha=settings.LATENCY_EWMA_ALPHA,
+                ewma=row.ewma_seconds,
+                p50=row.p50_seconds,
+                p95=row.p95_seconds,
+                count=row.sample_count or 0
+            )
+
+        if rows:
+            logger.info(f"Loaded latency stats for {len(rows)} agent/model pairs")
+            return
+
+        result = await db_session.execute(
+            select(AgentOutput.agent_type, AgentOutput.model_name, AgentOutput.generation_time_seconds)
+            .where(
+                AgentOutput.generation_time_seconds.isnot(None),
+                AgentOutput.status.in_(["completed", "approved"])
+            )
+            .order_by(AgentOutput.generated_at.desc())
+            .limit(settings.LATENCY_SEED_SAMPLES)
+        )
+        history = result.all()
+
+        # Oldest first, so the EWMA ends weighted towards recent runs
+        for agent_type, recorded_model, seconds in reversed(history):
+            model_name = recorded_model or agent_models.get(agent_type)
+            if model_name:
+                self.record(agent_type, model_name, seconds)
+
+        logger.info(f"Seeded latency stats from {len(history)} historical agent outputs")
+
+    async def persist(self, db_session) -> None:
+        """Upsert current stats into agent_latency_stats."""
+        from sqlalchemy import select
+        from app.models.agent_latency_stat import AgentLatencyStat
+
+        if not self._dirty:
+            return
+        # Cleared before reading, so samples recorded meanwhile stay dirty
+        self._dirty = False
+
+        try:
+            result = await db_session.execute(select(AgentLatencyStat))
+            existing = {(row.agent_type, row.model_name): row for row in result.scalars().all()}
+
+            for (agent_type, model_name), stats in list(self._stats.items()):
+                row = existing.get((agent_type, model_name))
+                if row is None:
+                    row = AgentLatencyStat(agent_type=agent_type, model_name=model_name)
+                    db_session.add(row)
+                row.sample_count = stats.count
+                row.ewma_seconds = stats.ewma
+                row.p50_seconds = stats.p50
+                row.p95_seconds = stats.p95
+
+            await db_session.commit()
+        except Exception:
+            # Retried on the next persist
+            self._dirty = True
+            raise
+
+    async def _persist_loop(self, interval: int) -> None:
+        from app.database import AsyncSessionLocal
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.persist(db)
+            except Exception as e:
+                logger.error(f"Failed to persist latency stats: {e}")
+
+    def start(self) -> None:
+        """Start the periodic persistence loop."""
+        if self._persist_task is None:
+            self._persist_task = asyncio.create_task(
+                self._persist_loop(settings.LATENCY_PERSIST_INTERVAL)
+            )
+
+    async def stop(self) -> None:
+        """Stop the persistence loop and flush pending stats."""
+        from app.database import AsyncSessionLocal
+
+        if self._persist_task is not None:
+            self._persist_task.cancel()
+            self._persist_task = None
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await self.persist(db)
+        except Exception as e:
+            logger.error(f"Failed to flush latency stats on shutdown: {e}")
+
+
+# Global instance
+latency_model = LatencyModel()
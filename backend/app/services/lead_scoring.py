@@ -0,0 +1,169 @@
+"""
+Lead Scoring - Vectorized batch lead scoring and portfolio rescoring.
+
+score_leads() applies the calculate_lead_score rubric to whole columns of
+projects at once with NumPy (notes go through the shared NOTES_SCANNER,
+once per distinct note), and rescore_leads() streams every project from
+the database in chunks and bulk-updates the lead scores that changed - for
+use after the rubric or TEAM_SIZE_SCORES is tweaked.
+"""
+from typing import Dict, Any, List, Optional, Sequence
+import logging
+import time
+
+import numpy as np
+
+from app.services.challenge_matcher import (
+    TEAM_SIZE_SCORES,
+    DEFAULT_TEAM_SIZE_SCORE,
+    CHALLENGE_COUNT_SCORES,
+    REVENUE_VALUE_SCORES,
+    NOTES_SCANNER,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Team size code -> label; codes index TEAM_SIZE_SCORES in this order
+TEAM_SIZES = list(TEAM_SIZE_SCORES)
+UNKNOWN_TEAM_SIZE = -1
+
+# Rows per database round trip when rescoring
+RESCORE_CHUNK_SIZE = 5000
+
+# Team size code (last slot = unknown) -> points
+_TEAM_POINTS = np.array(
+    [TEAM_SIZE_SCORES[size] for size in TEAM_SIZES] + [DEFAULT_TEAM_SIZE_SCORE],
+    dtype=np.int32
+)
+
+
+def _tier_table(tiers: List[tuple]):
+    """Ascending minimums and points for np.searchsorted (index 0 = below all)."""
+    ascending = sorted(tiers)
+    minimums = np.array([minimum for minimum, _ in ascending[1:]], dtype=np.float64)
+    points = np.array([points for _, points in ascending], dtype=np.int32)
+    return minimums, points
+
+
+_CHALLENGE_MINIMUMS, _CHALLENGE_POINTS = _tier_table(CHALLENGE_COUNT_SCORES)
+_REVENUE_MINIMUMS, _REVENUE_POINTS = _tier_table(REVENUE_VALUE_SCORES)
+
+
+def encode_team_sizes(team_sizes: Sequence[Optional[str]]) -> np.ndarray:
+    """Team size labels -> codes into TEAM_SIZES (UNKNOWN_TEAM_SIZE if unrecognised)."""
+    codes = {size: code for code, size in enumerate(TEAM_SIZES)}
+    return np.fromiter(
+        (codes.get(size, UNKNOWN_TEAM_SIZE) for size in team_sizes),
+        dtype=np.int32,
+        count=len(team_sizes)
+    )
+
+
+def _notes_points(notes: Sequence[Optional[str]]) -> np.ndarray:
+    """Keyword points per lead, scanning each distinct note once."""
+    score = NOTES_SCANNER.score
+    cache: Dict[str, int] = {}
+    points = []
+    for note in notes:
+        value = cache.get(note)
+        if value is None:
+            value = cache[note] = sum(score(note).values())
+        points.append(value)
+    return np.array(points, dtype=np.int32)
+
+
+def score_leads(
+    team_size_codes: np.ndarray,
+    num_challenges: np.ndarray,
+    notes: Sequence[Optional[str]],
+    revenue_values: np.ndarray
+) -> np.ndarray:
+    """
+    Score many leads in one vectorized pass (same rubric as calculate_lead_score).
+
+    Args:
+        team_size_codes: Codes from encode_team_sizes
+        num_challenges: Number of challenges per lead
+        notes: Notes per lead (str array or sequence; empty or None for none)
+        revenue_values: Estimated project value per lead
+
+    Returns:
+        int32 array of scores (0-100)
+    """
+    codes = np.asarray(team_size_codes, dtype=np.int32)
+    team = _TEAM_POINTS[np.where(codes >= 0, codes, len(TEAM_SIZES))]
+
+    challenges = _CHALLENGE_POINTS[
+        np.searchsorted(_CHALLENGE_MINIMUMS, np.asarray(num_challenges, dtype=np.float64), side="right")
+    ]
+    revenue = _REVENUE_POINTS[
+        np.searchsorted(_REVENUE_MINIMUMS, np.asarray(revenue_values, dtype=np.float64), side="right")
+    ]
+
+    keywords = _notes_points(notes)
+
+    return np.clip(team + challenges + keywords + revenue, 0, 100).astype(np.int32)
+
+
+async def rescore_leads(db_session, chunk_size: int = RESCORE_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Rescore every project with the current rubric.
+
+    Projects are read in primary-key order, chunk_size at a time, and only
+    changed scores are written back (one bulk UPDATE and commit per chunk).
+
+    Returns:
+        Dict with 'scanned', 'updated' and 'seconds'
+    """
+    from sqlalchemy import select, update
+    from app.models.project import Project
+
+    start = time.monotonic()
+    scanned = updated = 0
+    last_id = None
+
+    while True:
+        query = select(
+            Project.id, Project.team_size, Project.challenges,
+            Project.notes, Project.revenue_value, Project.lead_score
+        ).order_by(Project.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(Project.id > last_id)
+
+        rows = (await db_session.execute(query)).all()
+        if not rows:
+            break
+
+        ids, team_sizes, challenges, notes, revenue, current = zip(*rows)
+        scores = score_leads(
+            encode_team_sizes(team_sizes),
+            np.fromiter((len(c or []) for c in challenges), dtype=np.int32, count=len(rows)),
+            notes,
+            np.array([float(r or 0) for r in revenue], dtype=np.float64)
+        )
+
+        current = np.array([-1 if s is None else s for s in current], dtype=np.int32)
+        changed = np.flatnonzero(scores != current)
+        if changed.size:
+            await db_session.execute(
+                update(Project),
+                [{"id": ids[i], "lead_score": int(scores[i])} for i in changed]
+            )
+            await db_session.commit()
+
+        scanned += len(rows)
+        updated += int(changed.size)
+        last_id = ids[-1]
+
+    seconds = time.monotonic() - start
+    logger.info(f"Rescored {scanned} leads in {seconds:.1f}s ({updated} changed)")
+    return {"scanned": scanned, "updated": updated, "seconds": round(seconds, 2)}
+
+
+async def rescore_all_leads() -> Dict[str, Any]:
+    """Background job: rescore every project in its own session."""
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        return await rescore_leads(db)
@@ -0,0 +1,209 @@
+"""
+LLM Resilience - Retries, circuit breaking and hedged requests for LLM endpoints.
+
+- Errors are classified: timeouts, connection failures and 408/429/5xx are
+  retried with full-jitter exponential backoff; anything else fails fast.
+- Each endpoint has a circuit breaker that opens after consecutive failures,
+  so a down backend is skipped instead of being waited on for every call.
+- Optionally, when the primary endpoint has not answered within its own
+  observed p95 latency, a second copy is sent to another endpoint and the
+  first response wins.
+"""
+from typing import Dict, Any, List, Callable, Awaitable, TypeVar
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+from app.config import settings
+from app.services.latency_model import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Hedging only kicks in once an endpoint's p95 is based on enough samples
+MIN_HEDGE_SAMPLES = 20
+
+
+class CircuitOpenError(Exception):
+    """Raised when every endpoint's circuit breaker is open."""
+    pass
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for transient failures worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+
+
+def backoff_delay(attempt: int, rng: random.Random = random) -> float:
+    """Full-jitter exponential backoff for the given (1-based) retry attempt."""
+    ceiling = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+    return rng.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed -> open after `failure_threshold` failures in a row;
+    open -> half_open after `reset_timeout` seconds, letting one trial
+    request through; the trial closes the circuit or reopens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "open" and self._clock() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            return True
+        return self.state == "closed"
+
+    @property
+    def accepting(self) -> bool:
+        """Whether allow() would let a request through, without starting a trial."""
+        if self.state == "open":
+            return self._clock() - self.opened_at >= self.reset_timeout
+        return self.state == "closed"
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = self._clock()
+
+
+class ResilientCaller:
+    """Runs an endpoint-parameterised call with retries, breakers and hedging."""
+
+    def __init__(self, endpoints: List[str], clock: Callable[[], float] = time.monotonic):
+        self.endpoints = endpoints
+        self._clock = clock
+        self.breakers = {
+            endpoint: CircuitBreaker(
+                settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                settings.LLM_CIRCUIT_RESET_SECONDS,
+                clock
+            )
+            for endpoint in endpoints
+        }
+        self.latency = {endpoint: LatencyStats() for endpoint in endpoints}
+
+    def available_endpoints(self) -> List[str]:
+        return [endpoint for endpoint in self.endpoints if self.breakers[endpoint].allow()]
+
+    def accepting(self) -> bool:
+        """Whether any endpoint would accept a request (no breaker state change)."""
+        return any(breaker.accepting for breaker in self.breakers.values())
+
+    async def call(self, fn: Callable[[str], Awaitable[T]]) -> T:
+        """
+        Call fn(endpoint), retrying transient failures.
+
+        Raises:
+            CircuitOpenError: If no endpoint is currently accepting requests
+        """
+        attempt = 0
+
+        while True:
+            endpoints = self.available_endpoints()
+            if not endpoints:
+                raise CircuitOpenError(f"All LLM endpoints unavailable: {', '.join(self.endpoints)}")
+
+            try:
+                return await self._hedged(fn, endpoints)
+            except Exception as e:
+                attempt += 1
+                if not is_retryable(e) or attempt >= settings.LLM_RETRY_MAX_ATTEMPTS:
+                    raise
+
+                delay = backoff_delay(attempt)
+                logger.warning(f"LLM request failed ({e}), retrying in {delay:.1f}s (attempt {attempt})")
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, fn: Callable[[str], Awaitable[T]], endpoint: str) -> T:
+        start = self._clock()
+        try:
+            result = await fn(endpoint)
+        except asyncio.CancelledError:
+            # A cancelled half-open trial must not leave the breaker stuck
+            if self.breakers[endpoint].state == "half_open":
+                self.breakers[endpoint].record_failure()
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                self.breakers[endpoint].record_failure()
+            raise
+
+        self.breakers[endpoint].record_success()
+        self.latency[endpoint].observe(self._clock() - start)
+        return result
+
+    def _hedge_delay(self, endpoint: str):
+        stats = self.latency[endpoint]
+        if not settings.LLM_HEDGING_ENABLED or stats.count < MIN_HEDGE_SAMPLES:
+            return None
+        return stats.p95
+
+    async def _hedged(self, fn: Callable[[str], Awaitable[T]], endpoints: List[str]) -> T:
+        primary = endpoints[0]
+        hedge_delay = self._hedge_delay(primary)
+
+        if len(endpoints) < 2 or hedge_delay is None:
+            return await self._attempt(fn, primary)
+
+        tasks = [asyncio.create_task(self._attempt(fn, primary))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done:
+                logger.info(f"Hedging request to {endpoints[1]} after {hedge_delay:.1f}s")
+                tasks.append(asyncio.create_task(self._attempt(fn, endpoints[1])))
+
+            # First successful response wins; fall back to the other if one fails
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker state and latency per endpoint, for monitoring."""
+        return {
+            endpoint: {
+                "circuit": self.breakers[endpoint].state,
+                "consecutiveFailures": self.breakers[endpoint].failures,
+                **self.latency[endpoint].to_dict(),
+            }
+            for endpoint in self.endpoints
+        }
@@ -1,113 +1,291 @@
 """
 Local LLM Service - Handles inference with locally hosted LLMs.
 Supports Ollama, vLLM, llama.cpp, and OpenAI-compatible endpoints.
+
+Requests are retried on transient failures, skip endpoints whose circuit
+breaker is open, and can be hedged to a fallback endpoint (see llm_resilience).
+
+With LOCAL_LLM_API_STYLE="chat" requests go to the chat routes
+(`/api/chat`, `/v1/chat/completions`) so the server applies the model's chat
+template, with the agent's static instructions sent as the system message;
+"completion" uses the raw completion routes with the system text prepended.
+
+Either way the static instructions come first, so consecutive requests
+share a long prefix. llama.cpp is asked to keep the prompt in its slot's KV
+cache (`cache_prompt`); Ollama reuses the loaded model's cache (kept loaded
+per tier, see model_residency) and vLLM caches prefixes server-side
+(`--enable-prefix-caching`). Usage dicts carry `prefill_seconds` and
+`cached_tokens` where the backend reports them.
 """
 import httpx
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from app.config import settings
+from app.services.inference_batcher import InferenceBatcher
+from app.services.llm_resilience import ResilientCaller
+from app.services.model_residency import model_residency
 
 logger = logging.getLogger(__name__)
 
 
+# Backends whose completion route accepts a list of prompts
+BATCHING_LLM_TYPES = {"vllm", "llamacpp", "openai-compatible"}
+
+
 class LocalLLMService:
     """Service for interacting with locally hosted LLMs."""
 
     def __init__(self):
         self.endpoint = settings.LOCAL_LLM_ENDPOINT
         self.llm_type = settings.LOCAL_LLM_TYPE
+        self.api_style = settings.LOCAL_LLM_API_STYLE
         self.timeout = settings.AI_REQUEST_TIMEOUT
 
+        # Primary endpoint first; the rest serve failover and hedged requests
+        self.endpoints = [self.endpoint] + [
+            endpoint for endpoint in settings.LOCAL_LLM_FALLBACK_ENDPOINTS
+            if endpoint != self.endpoint
+        ]
+        self.resilience = ResilientCaller(self.endpoints)
+
+        # Chat routes take one conversation per request, so only completion
+        # requests can be micro-batched
+        self.batcher = None
+        if (
+            self.api_style == "completion"
+            and self.llm_type in BATCHING_LLM_TYPES
+            and settings.LOCAL_LLM_BATCH_WINDOW_MS > 0
+        ):
+            self.batcher = InferenceBatcher(
+                self._generate_batch,
+                window_ms=settings.LOCAL_LLM_BATCH_WINDOW_MS,
+                max_batch_size=settings.LOCAL_LLM_MAX_BATCH_SIZE
+            )
+        elif self.llm_type in BATCHING_LLM_TYPES and settings.LOCAL_LLM_BATCH_WINDOW_MS > 0:
+            logger.info("Micro-batching is off: it requires LOCAL_LLM_API_STYLE=completion")
+
     async def generate(
         self,
         prompt: str,
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 4000,
+        json_schema: Optional[Dict[str, Any]] = None,
+        system: Optional[str] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
         Generate text using local LLM.
 
         Args:
-            prompt: Input prompt
+            prompt: Input prompt (the user message in chat style)
             model: Model name (e.g., "qwen2.5:72b")
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            json_schema: Optional JSON Schema; the backend constrains decoding
+                         so the output is valid JSON matching it
+            system: Optional system instructions, sent as the system message
+                    (chat) or ahead of the prompt (completion)
             **kwargs: Additional model-specific parameters
 
         Returns:
             Dict with 'text' and 'usage' keys
         """
+        # Residency re-warms wait while requests are in flight
+        model_residency.in_flight += 1
         try:
+            # Prefer an equivalent model that is already loaded over a cold load
             if self.llm_type == "ollama":
-                return await self._generate_ollama(prompt, model, temperature, max_tokens)
-            elif self.llm_type == "vllm":
-                return await self._generate_vllm(prompt, model, temperature, max_tokens)
+                model = await model_residency.resolve(model)
+
+            if self.api_style == "chat":
+                if self.llm_type not in ("ollama", "vllm", "llamacpp", "openai-compatible"):
+                    raise ValueError(f"Unsupported LLM type: {self.llm_type}")
+
+                messages = self._messages(prompt, system)
+                generate_fn = self._chat_ollama if self.llm_type == "ollama" else self._chat_openai
+
+                return await self.resilience.call(
+                    lambda endpoint: generate_fn(endpoint, messages, model, temperature, max_tokens, json_schema)
+                )
+
+            # Ollama applies the model's template to a separate system field;
+            # the raw completion servers get a single prompt
+            if self.llm_type == "ollama":
+                return await self.resilience.call(
+                    lambda endpoint: self._generate_ollama(
+                        endpoint, prompt, model, temperature, max_tokens, json_schema, system
+                    )
+                )
+
+            if system:
+                prompt = f"{system}\n{prompt}"
+
+            # Concurrent requests for the same model are sent as one batch
+            if self.batcher is not None and not kwargs:
+                return await self.batcher.submit(prompt, model, temperature, max_tokens, json_schema)
+
+            if self.llm_type == "vllm":
+                generate_fn = self._generate_vllm
             elif self.llm_type == "llamacpp":
-                return await self._generate_llamacpp(prompt, model, temperature, max_tokens)
+                generate_fn = self._generate_llamacpp
             elif self.llm_type == "openai-compatible":
-                return await self._generate_openai_compatible(prompt, model, temperature, max_tokens)
+                generate_fn = self._generate_openai_compatible
             else:
                 raise ValueError(f"Unsupported LLM type: {self.llm_type}")
 
+            return await self.resilience.call(
+                lambda endpoint: generate_fn(endpoint, prompt, model, temperature, max_tokens, json_schema)
+            )
+
         except Exception as e:
             logger.error(f"Local LLM generation failed: {e}")
             raise
+        finally:
+            model_residency.in_flight -= 1
 
-    async def _generate_ollama(
+    @staticmethod
+    def _messages(prompt: str, system: Optional[str]) -> List[Dict[str, str]]:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    async def _chat_ollama(
         self,
-        prompt: str,
+        endpoint: str,
+        messages: List[Dict[str, str]],
         model: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Generate text using Ollama."""
+        """Generate a chat response using Ollama."""
 
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.post(
-                f"{self.endpoint}/api/generate",
+                f"{endpoint}/api/chat",
                 json={
                     "model": model,
-                    "prompt": prompt,
+                    "messages": messages,
                     "stream": False,
+                    "keep_alive": model_residency.keep_alive_for(model),
                     "options": {
                         "temperature": temperature,
                         "num_predict": max_tokens,
-                    }
+                        "num_ctx": settings.LOCAL_LLM_CONTEXT_WINDOW,
+                    },
+                    **self._structured_output_fields(json_schema)
                 }
             )
             response.raise_for_status()
             data = response.json()
 
+            return {
+                "text": data.get("message", {}).get("content", ""),
+                "usage": self._ollama_usage(data)
+            }
+
+    async def _chat_openai(
+        self,
+        endpoint: str,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Generate a chat response using an OpenAI-style /v1/chat/completions route (vLLM, llama.cpp, etc.)."""
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **self._structured_output_fields(json_schema, chat=True)
+        }
+        if self.llm_type == "llamacpp":
+            payload["cache_prompt"] = True
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.post(f"{endpoint}/v1/chat/completions", json=payload)
+            response.raise_for_status()
+            data = response.json()
+
+        usage = self._openai_usage(data.get("usage") or {})
+
+        # llama.cpp also reports prefill timings on its OpenAI-style routes
+        timings = data.get("timings") or {}
+        if timings:
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            usage["prefill_seconds"] = timings.get("prompt_ms", 0.0) / 1000
+            usage["cached_tokens"] = max(0, prompt_tokens - timings.get("prompt_n", prompt_tokens))
+
+        return {
+            "text": data["choices"][0]["message"]["content"] or "",
+            "usage": usage
+        }
+
+    async def _generate_ollama(
+        self,
+        endpoint: str,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None,
+        system: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Generate text using Ollama."""
+
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": model_residency.keep_alive_for(model),
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+                "num_ctx": settings.LOCAL_LLM_CONTEXT_WINDOW,
+            },
+            **self._structured_output_fields(json_schema)
+        }
+        if system:
+            payload["system"] = system
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.post(f"{endpoint}/api/generate", json=payload)
+            response.raise_for_status()
+            data = response.json()
+
             return {
                 "text": data.get("response", ""),
-                "usage": {
-                    "prompt_tokens": data.get("prompt_eval_count", 0),
-                    "completion_tokens": data.get("eval_count", 0),
-                    "total_tokens": data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
-                }
+                "usage": self._ollama_usage(data)
             }
 
     async def _generate_vllm(
         self,
+        endpoint: str,
         prompt: str,
         model: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Generate text using vLLM OpenAI-compatible server."""
 
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.post(
-                f"{self.endpoint}/v1/completions",
+                f"{endpoint}/v1/completions",
                 json={
                     "model": model,
                     "prompt": prompt,
                     "temperature": temperature,
                     "max_tokens": max_tokens,
+                    **self._structured_output_fields(json_schema)
                 }
             )
             response.raise_for_status()
@@ -115,61 +293,60 @@ class LocalLLMService:
 
             return {
                 "text": data["choices"][0]["text"],
-                "usage": data.get("usage", {})
+                "usage": self._openai_usage(data.get("usage") or {})
             }
 
     async def _generate_llamacpp(
         self,
+        endpoint: str,
         prompt: str,
         model: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Generate text using llama.cpp server."""
 
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.post(
-                f"{self.endpoint}/completion",
+                f"{endpoint}/completion",
                 json={
                     "prompt": prompt,
                     "temperature": temperature,
                     "n_predict": max_tokens,
+                    "cache_prompt": True,
+                    **self._structured_output_fields(json_schema)
                 }
             )
             response.raise_for_status()
             data = response.json()
 
             # llama.cpp returns different format
-            text = data.get("content", "")
-            tokens_predicted = data.get("tokens_predicted", 0)
-            tokens_evaluated = data.get("tokens_evaluated", 0)
-
             return {
-                "text": text,
-                "usage": {
-                    "prompt_tokens": tokens_evaluated,
-                    "completion_tokens": tokens_predicted,
-                    "total_tokens": tokens_evaluated + tokens_predicted
-                }
+                "text": data.get("content", ""),
+                "usage": self._llamacpp_usage(data)
             }
 
     async def _generate_openai_compatible(
         self,
+        endpoint: str,
         prompt: str,
         model: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Generate text using OpenAI-compatible endpoint (Text Generation WebUI, etc.)."""
 
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.post(
-                f"{self.endpoint}/v1/completions",
+                f"{endpoint}/v1/completions",
                 json={
                     "model": model,
                     "prompt": prompt,
                     "temperature": temperature,
                     "max_tokens": max_tokens,
+                    **self._structured_output_fields(json_schema)
                 }
             )
             response.raise_for_status()
@@ -184,6 +361,178 @@ class LocalLLMService:
                 })
             }
 
+    async def _generate_batch(
+        self,
+        prompts: List[str],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate completions for several prompts in one request.
+
+        vLLM and OpenAI-compatible servers accept a list `prompt` and return
+        one choice per prompt (with its index); llama.cpp returns a list of
+        results. Usage is reported per batch, so it is split across prompts
+        in proportion to prompt and output length.
+        """
+        return await self.resilience.call(
+            lambda endpoint: self._post_batch(endpoint, prompts, model, temperature, max_tokens, json_schema)
+        )
+
+    async def _post_batch(
+        self,
+        endpoint: str,
+        prompts: List[str],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Send one batched completion request to an endpoint."""
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            if self.llm_type == "llamacpp":
+                response = await client.post(
+                    f"{endpoint}/completion",
+                    json={
+                        "prompt": prompts,
+                        "temperature": temperature,
+                        "n_predict": max_tokens,
+                        "cache_prompt": True,
+                        **self._structured_output_fields(json_schema)
+                    }
+                )
+                response.raise_for_status()
+                data = response.json()
+                if isinstance(data, dict):
+                    data = [data]
+
+                return [
+                    {"text": item.get("content", ""), "usage": self._llamacpp_usage(item)}
+                    for item in data
+                ]
+
+            response = await client.post(
+                f"{endpoint}/v1/completions",
+                json={
+                    "model": model,
+                    "prompt": prompts,
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                    **self._structured_output_fields(json_schema)
+                }
+            )
+            response.raise_for_status()
+            data = response.json()
+
+        texts = [""] * len(prompts)
+        for position, choice in enumerate(data["choices"]):
+            texts[choice.get("index", position)] = choice["text"]
+
+        usage = data.get("usage") or {}
+        prompt_chars = sum(len(p) for p in prompts) or 1
+        output_chars = sum(len(t) for t in texts) or 1
+
+        results = []
+        for prompt, text in zip(prompts, texts):
+            prompt_tokens = round(usage.get("prompt_tokens", 0) * len(prompt) / prompt_chars)
+            completion_tokens = round(usage.get("completion_tokens", 0) * len(text) / output_chars)
+            results.append({
+                "text": text,
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+            })
+
+        return results
+
+    @staticmethod
+    def _ollama_usage(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Usage from an Ollama /api/generate or /api/chat response."""
+        prompt_tokens = data.get("prompt_eval_count", 0)
+        completion_tokens = data.get("eval_count", 0)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            # Durations are reported in nanoseconds
+            "prefill_seconds": data.get("prompt_eval_duration", 0) / 1e9
+        }
+
+    @staticmethod
+    def _llamacpp_usage(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Usage from a llama.cpp /completion result.
+
+        `tokens_evaluated` is the full prompt length; `timings.prompt_n` is
+        how many of those tokens were actually computed, the rest came from
+        the slot's KV cache.
+        """
+        prompt_tokens = data.get("tokens_evaluated", 0)
+        completion_tokens = data.get("tokens_predicted", 0)
+        timings = data.get("timings") or {}
+
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        if timings:
+            usage["prefill_seconds"] = timings.get("prompt_ms", 0.0) / 1000
+            usage["cached_tokens"] = max(0, prompt_tokens - timings.get("prompt_n", prompt_tokens))
+        elif "tokens_cached" in data:
+            usage["cached_tokens"] = data["tokens_cached"]
+        return usage
+
+    @staticmethod
+    def _openai_usage(usage: Dict[str, Any]) -> Dict[str, Any]:
+        """Usage from an OpenAI-style response, with vLLM's cached prompt tokens."""
+        details = usage.get("prompt_tokens_details") or {}
+        if details.get("cached_tokens") is not None:
+            usage = {**usage, "cached_tokens": details["cached_tokens"]}
+        return usage
+
+    def _structured_output_fields(
+        self,
+        json_schema: Optional[Dict[str, Any]],
+        chat: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Request fields that constrain decoding to JSON for this backend.
+
+        LOCAL_LLM_STRUCTURED_OUTPUT="schema" enforces the agent's schema,
+        "json" only enforces syntactically valid JSON, "off" sends nothing.
+        `chat` selects the field names for OpenAI-style chat routes.
+        """
+        mode = settings.LOCAL_LLM_STRUCTURED_OUTPUT
+        if not json_schema or mode == "off":
+            return {}
+
+        if self.llm_type == "ollama":
+            return {"format": json_schema if mode == "schema" else "json"}
+        elif self.llm_type == "llamacpp":
+            if chat:
+                if mode == "schema":
+                    return {"response_format": {"type": "json_schema", "json_schema": {"schema": json_schema}}}
+                return {"response_format": {"type": "json_object"}}
+            # llama.cpp converts the schema to a GBNF grammar server-side
+            return {"json_schema": json_schema if mode == "schema" else {}}
+        elif self.llm_type == "vllm":
+            if mode == "schema":
+                return {"guided_json": json_schema}
+            return {"response_format": {"type": "json_object"}}
+        elif self.llm_type == "openai-compatible":
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+    async def stop(self) -> None:
+        """Cancel any micro-batches still queued or in flight."""
+        if self.batcher is not None:
+            await self.batcher.stop()
+
     async def health_check(self) -> bool:
         """Check if local LLM service is available."""
         try:
@@ -0,0 +1,323 @@
+"""
+Model Residency - Warm-up, keep-alive and residency-aware routing for local models.
+
+Ollama loads a model on first use and unloads it after its keep-alive
+expires, so the first request after idle (or after another tier evicted it)
+pays the full model load. This service:
+
+- preloads the LOCAL_LLM_WARMUP_TIERS models at startup and, if
+  LOCAL_LLM_RESIDENCY_CHECK_INTERVAL is set, periodically reloads any that
+  were evicted - but only while no requests are in flight, and only if the
+  model fits in LOCAL_LLM_VRAM_GB next to the models already loaded, so a
+  reload never evicts the model live requests are using,
+- assigns each tier its own keep-alive (LOCAL_LLM_KEEP_ALIVE_BY_TIER),
+- routes a request to an already-loaded model configured as equivalent for
+  the same tier (LOCAL_MODEL_EQUIVALENTS) instead of loading the requested one.
+
+Other backends serve a fixed set of models, so warm-up there is a single
+one-token request per model and routing is a no-op.
+"""
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.config import settings
+from app.services.model_tiering import PROVIDER_TIER_MODELS
+
+logger = logging.getLogger(__name__)
+
+
+# How long a /api/ps result is reused before asking Ollama again
+LOADED_MODELS_TTL = 5.0
+
+# Loading a 70B model from disk can take minutes
+WARMUP_TIMEOUT = 600
+
+
+def normalize_model_name(name: str) -> str:
+    """Ollama reports untagged models with an explicit ':latest' tag."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class ModelResidency:
+    """Tracks which local models are loaded and keeps the configured tiers warm."""
+
+    def __init__(self):
+        self.llm_type = settings.LOCAL_LLM_TYPE
+        self.endpoint = settings.LOCAL_LLM_ENDPOINT
+        self.endpoints = [self.endpoint] + [
+            endpoint for endpoint in settings.LOCAL_LLM_FALLBACK_ENDPOINTS
+            if endpoint != self.endpoint
+        ]
+
+        self._loaded: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at = 0.0
+        self._warmups: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Local generation requests in progress (see LocalLLMService.generate)
+        self.in_flight = 0
+
+    def tier_models(self) -> Dict[str, str]:
+        """Configured model for each tier."""
+        return {tier: getattr(settings, attr) for tier, attr in PROVIDER_TIER_MODELS["local"].items()}
+
+    def tier_of(self, model: str) -> Optional[str]:
+        """Tier a model is configured for (directly or as an equivalent)."""
+        model = normalize_model_name(model)
+        for tier, configured in self.tier_models().items():
+            if normalize_model_name(configured) == model:
+                return tier
+        for tier, equivalents in settings.LOCAL_MODEL_EQUIVALENTS.items():
+            if model in (normalize_model_name(name) for name in equivalents):
+                return tier
+        return None
+
+    def keep_alive_for(self, model: str) -> str:
+        """Keep-alive to send with a request for this model."""
+        tier = self.tier_of(model)
+        return settings.LOCAL_LLM_KEEP_ALIVE_BY_TIER.get(tier, settings.LOCAL_LLM_KEEP_ALIVE)
+
+    async def loaded_models(self, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Models currently loaded on the primary Ollama endpoint.
+
+        Returns:
+            Dict of normalized model name -> Ollama /api/ps entry (empty for
+            other backends or if the endpoint cannot be reached)
+        """
+        if self.llm_type != "ollama":
+            return {}
+
+        if not refresh and time.monotonic() - self._loaded_at < LOADED_MODELS_TTL:
+            return self._loaded
+
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(f"{self.endpoint}/api/ps")
+                response.raise_for_status()
+                models = response.json().get("models", [])
+        except Exception as e:
+            logger.warning(f"Could not list loaded models: {e}")
+            return self._loaded
+
+        self._loaded = {normalize_model_name(m.get("name", m.get("model", ""))): m for m in models}
+        self._loaded_at = time.monotonic()
+        return self._loaded
+
+    async def model_sizes(self) -> Dict[str, int]:
+        """
+        Size in bytes of each model on the primary Ollama endpoint.
+
+        The file size is the VRAM estimate for a model that is not loaded
+        (the KV cache comes on top, so leave headroom in LOCAL_LLM_VRAM_GB).
+        """
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(f"{self.endpoint}/api/tags")
+                response.raise_for_status()
+                models = response.json().get("models", [])
+        except Exception as e:
+            logger.warning(f"Could not list local models: {e}")
+            return {}
+
+        return {normalize_model_name(m.get("name", m.get("model", ""))): m.get("size", 0) for m in models}
+
+    async def rewarm(self) -> List[str]:
+        """
+        Reload evicted warm-up tiers that fit next to the loaded models.
+
+        Does nothing while requests are in flight, or if LOCAL_LLM_VRAM_GB
+        is not set (whether a model fits cannot be known).
+
+        Returns:
+            Models reloaded
+        """
+        budget = settings.LOCAL_LLM_VRAM_GB * 1024 ** 3
+        if self.llm_type != "ollama" or budget <= 0 or self.in_flight:
+            return []
+
+        loaded = await self.loaded_models(refresh=True)
+        used = sum(entry.get("size_vram") or entry.get("size") or 0 for entry in loaded.values())
+        tier_models = self.tier_models()
+        sizes = None
+        reloaded = []
+
+        for tier in settings.LOCAL_LLM_WARMUP_TIERS:
+            model = tier_models.get(tier)
+            if not model or normalize_model_name(model) in loaded or model in reloaded:
+                continue
+
+            if sizes is None:
+                sizes = await self.model_sizes()
+            size = sizes.get(normalize_model_name(model))
+            if not size or used + size > budget:
+                logger.info(f"Not reloading {model}: it does not fit next to the loaded models")
+                continue
+
+            # A request may have started while sizes were fetched
+            if self.in_flight:
+                break
+
+            await self.warm_up([tier])
+            used += size
+            reloaded.append(model)
+
+        return reloaded
+
+    async def resolve(self, model: str) -> str:
+        """
+        Pick the model to send a request to.
+
+        Returns the requested model if it is loaded (or residency cannot be
+        determined); otherwise an equivalent model for the same tier that is
+        already loaded, avoiding a cold load.
+        """
+        if self.llm_type != "ollama":
+            return model
+
+        tier = self.tier_of(model)
+        equivalents = settings.LOCAL_MODEL_EQUIVALENTS.get(tier, []) if tier else []
+        if not equivalents:
+            return model
+
+        loaded = await self.loaded_models()
+        if not loaded or normalize_model_name(model) in loaded:
+            return model
+
+        candidates = [self.tier_models()[tier]] + equivalents
+        for candidate in candidates:
+            if normalize_model_name(candidate) in loaded:
+                logger.info(f"Routing {model} request to loaded {tier}-tier model {candidate}")
+                return candidate
+
+        return model
+
+    async def warm_up(self, tiers: Optional[List[str]] = None, only_missing: bool = False) -> None:
+        """
+        Load the models for the given tiers (default LOCAL_LLM_WARMUP_TIERS).
+
+        Args:
+            tiers: Tiers to warm
+            only_missing: Skip models that are already loaded
+        """
+        tier_models = self.tier_models()
+        tiers = tiers if tiers is not None else settings.LOCAL_LLM_WARMUP_TIERS
+
+        # One load per distinct model, in tier order
+        models: List[str] = []
+        for tier in tiers:
+            model = tier_models.get(tier)
+            if model and model not in models:
+                models.append(model)
+
+        loaded = await self.loaded_models(refresh=True) if only_missing else {}
+
+        # Ollama loads models per server; elsewhere the warm-up request goes
+        # through the normal (failover) path once
+        endpoints = self.endpoints if self.llm_type == "ollama" else [self.endpoint]
+
+        for model in models:
+            if only_missing and normalize_model_name(model) in loaded:
+                continue
+
+            for endpoint in endpoints:
+                start = time.monotonic()
+                try:
+                    await self._load(endpoint, model)
+                except Exception as e:
+                    logger.warning(f"Warm-up of {model} on {endpoint} failed: {e}")
+                    continue
+
+                seconds = time.monotonic() - start
+                self._warmups[model] = {
+                    "endpoint": endpoint,
+                    "seconds": round(seconds, 2),
+                    "at": datetime.utcnow().isoformat()
+                }
+                logger.info(f"Warmed up {model} on {endpoint} in {seconds:.1f}s")
+
+        self._loaded_at = 0.0
+
+    async def _load(self, endpoint: str, model: str) -> None:
+        if self.llm_type == "ollama":
+            # A generate request without a prompt loads the model and returns
+            async with httpx.AsyncClient(timeout=WARMUP_TIMEOUT) as client:
+                response = await client.post(
+                    f"{endpoint}/api/generate",
+                    json={
+                        "model": model,
+                        "keep_alive": self.keep_alive_for(model),
+                        # Same context size as requests, or the first one reloads the model
+                        "options": {"num_ctx": settings.LOCAL_LLM_CONTEXT_WINDOW},
+                    }
+                )
+                response.raise_for_status()
+            return
+
+        from app.services.local_llm_service import local_llm
+        await local_llm.generate(prompt="Hi", model=model, max_tokens=1)
+
+    async def _residency_loop(self, interval: int) -> None:
+        try:
+            await self.warm_up()
+        except Exception as e:
+            logger.error(f"Model warm-up failed: {e}")
+
+        if interval <= 0 or self.llm_type != "ollama":
+            return
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.rewarm()
+            except Exception as e:
+                logger.error(f"Model residency check failed: {e}")
+
+    def start(self) -> None:
+        """Warm up the configured tiers in the background and keep them loaded."""
+        if self._task is None:
+            self._task = asyncio.create_task(
+                self._residency_loop(settings.LOCAL_LLM_RESIDENCY_CHECK_INTERVAL)
+            )
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Loaded models, tier configuration and last warm-up times, for monitoring."""
+        loaded = await self.loaded_models()
+
+        return {
+            "backend": self.llm_type,
+            "tiers": {
+                tier: {
+                    "model": model,
+                    "keepAlive": self.keep_alive_for(model),
+                    "loaded": normalize_model_name(model) in loaded,
+                    "equivalents": settings.LOCAL_MODEL_EQUIVALENTS.get(tier, []),
+                    "warmUp": tier in settings.LOCAL_LLM_WARMUP_TIERS,
+                }
+                for tier, model in self.tier_models().items()
+            },
+            "loaded": [
+                {
+                    "model": name,
+                    "sizeVram": entry.get("size_vram"),
+                    "expiresAt": entry.get("expires_at"),
+                }
+                for name, entry in loaded.items()
+            ],
+            "inFlight": self.in_flight,
+            "lastWarmUp": self._warmups,
+        }
+
+
+# Global instance
+model_residency = ModelResidency()
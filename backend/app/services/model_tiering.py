@@ -0,0 +1,240 @@
+"""
+Model Tiering - SLO-driven downgrade of agent model tiers.
+
+Each agent has a default tier (opus, sonnet or haiku). Before an agent runs,
+the policy predicts when the whole run will finish from the time already
+spent since the run was queued plus the observed p50 latency of the agents
+still to run. If that misses AGENT_RUN_SLO_SECONDS, the agent is moved down
+the tier ladder (never below its floor) to the highest tier whose predicted
+finish meets the SLO.
+
+Outputs produced by a downgraded tier are flagged on AgentOutput. With
+TIER_UPGRADE_REGENERATION enabled, a background sweep re-runs those agents
+at their default tier during off-peak hours. A failed upgrade is retried
+after TIER_UPGRADE_RETRY_HOURS, doubling per attempt, and given up after
+TIER_UPGRADE_MAX_ATTEMPTS.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.services.latency_model import latency_model
+
+logger = logging.getLogger(__name__)
+
+
+# Highest to lowest quality
+TIER_LADDER = ["opus", "sonnet", "haiku"]
+
+# Provider -> tier -> setting holding the model name
+PROVIDER_TIER_MODELS = {
+    "local": {
+        "opus": "LOCAL_OPUS_MODEL",
+        "sonnet": "LOCAL_SONNET_MODEL",
+        "haiku": "LOCAL_HAIKU_MODEL",
+    },
+    "anthropic": {
+        "opus": "CLAUDE_OPUS_MODEL",
+        "sonnet": "CLAUDE_SONNET_MODEL",
+        "haiku": "CLAUDE_HAIKU_MODEL",
+    },
+    "gemini": {
+        "opus": "GEMINI_FLASH_MODEL",
+        "sonnet": "GEMINI_FLASH_MODEL",
+        "haiku": "GEMINI_FLASH_MODEL",
+    },
+}
+
+
+def model_for_tier(provider: str, tier: str) -> str:
+    """Configured model for a provider and tier."""
+    return getattr(settings, PROVIDER_TIER_MODELS[provider][tier])
+
+
+def tiers_below(tier: str, floor: str) -> List[str]:
+    """Tiers from `tier` down to `floor`, inclusive."""
+    start = TIER_LADDER.index(tier)
+    end = max(start, TIER_LADDER.index(floor))
+    return TIER_LADDER[start:end + 1]
+
+
+def is_off_peak(now: Optional[datetime] = None) -> bool:
+    """True during OFF_PEAK_START_HOUR..OFF_PEAK_END_HOUR (server local time, may wrap midnight)."""
+    hour = (now or datetime.now()).hour
+    start, end = settings.OFF_PEAK_START_HOUR, settings.OFF_PEAK_END_HOUR
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def upgrade_due(attempts: Optional[int], last_attempt_at: Optional[datetime], now: datetime) -> bool:
+    """
+    Whether an output's next upgrade attempt is due.
+
+    The first attempt is due at once; after n failed attempts the next waits
+    TIER_UPGRADE_RETRY_HOURS * 2^(n-1). None after TIER_UPGRADE_MAX_ATTEMPTS.
+    """
+    attempts = attempts or 0
+    if attempts >= settings.TIER_UPGRADE_MAX_ATTEMPTS:
+        return False
+    if attempts == 0 or last_attempt_at is None:
+        return True
+    backoff = timedelta(hours=settings.TIER_UPGRADE_RETRY_HOURS * 2 ** (attempts - 1))
+    return now - last_attempt_at >= backoff
+
+
+class TieringPolicy:
+    """Chooses each agent's model for a run and schedules off-peak upgrades."""
+
+    def __init__(self):
+        self._pending_upgrades = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(
+        self,
+        agent,
+        remaining_agents: List[Any],
+        run_started_at: float,
+        upgrade: bool = False
+    ) -> Tuple[str, str]:
+        """
+        Pick the tier and model for an agent about to run.
+
+        Args:
+            agent: Agent about to run
+            remaining_agents: Agents that will run after it in this run
+            run_started_at: time.time() when the run was queued
+            upgrade: Force the agent's default tier (off-peak upgrade runs)
+
+        Returns:
+            (tier, model_name)
+        """
+        default = (agent.model_tier, agent.model_name)
+        if upgrade or not settings.MODEL_TIERING_ENABLED:
+            return default
+
+        elapsed = max(0.0, time.time() - run_started_at)
+        rest = sum(
+            latency_model.expected_seconds(other.agent_type, other.model_name, "p50")
+            for other in remaining_agents
+        )
+
+        floor = settings.MODEL_TIER_FLOORS.get(agent.agent_type, TIER_LADDER[-1])
+        best = None
+        for tier in tiers_below(agent.model_tier, floor):
+            model = agent.model_name if tier == agent.model_tier else model_for_tier(agent.provider, tier)
+            predicted = elapsed + latency_model.expected_seconds(agent.agent_type, model, "p50") + rest
+
+            if predicted <= settings.AGENT_RUN_SLO_SECONDS:
+                choice = (tier, model)
+                break
+            # Nothing meets the SLO yet: remember the fastest option
+            if best is None or predicted < best[0]:
+                best = (predicted, tier, model)
+        else:
+            choice = (best[1], best[2])
+
+        if choice != default:
+            logger.info(
+                f"Downgrading {agent.agent_type} agent from {agent.model_tier} to {choice[0]} "
+                f"({elapsed:.0f}s elapsed, SLO {settings.AGENT_RUN_SLO_SECONDS}s)"
+            )
+        return choice
+
+    async def queue_upgrades(self, db_session) -> int:
+        """
+        Queue default-tier regenerations for outputs produced by a downgraded
+        tier that nobody has approved or rejected yet.
+
+        Each queued upgrade is counted on the output; outputs whose upgrades
+        keep failing are retried with backoff and then left as they are.
+
+        Returns:
+            Number of regenerations queued
+        """
+        from sqlalchemy import select, func
+        from app.models.agent_output import AgentOutput
+        from app.services.job_scheduler import job_scheduler
+
+        result = await db_session.execute(
+            select(AgentOutput).where(
+                AgentOutput.downgraded.is_(True),
+                AgentOutput.status == "completed",
+                func.coalesce(AgentOutput.upgrade_attempts, 0) < settings.TIER_UPGRADE_MAX_ATTEMPTS
+            )
+        )
+
+        now = datetime.utcnow()
+        queued = 0
+        for output in result.scalars().all():
+            key = (str(output.project_id), output.agent_type)
+            if key in self._pending_upgrades or not upgrade_due(output.upgrade_attempts, output.last_upgrade_at, now):
+                continue
+
+            output.upgrade_attempts = (output.upgrade_attempts or 0) + 1
+            output.last_upgrade_at = now
+            await db_session.commit()
+
+            project_id, agent_type = key
+            self._pending_upgrades.add(key)
+            job_scheduler.submit(
+                self._run_upgrade,
+                priority=0,
+                name=f"upgrade:{project_id}:{agent_type}",
+                project_id=project_id,
+                agent_type=agent_type
+            )
+            queued += 1
+
+        if queued:
+            logger.info(f"Queued {queued} off-peak tier upgrade regenerations")
+        return queued
+
+    async def _run_upgrade(self, project_id: str, agent_type: str) -> None:
+        from app.api.intake import run_agents_for_project
+
+        try:
+            await run_agents_for_project(project_id, agent_types=[agent_type], upgrade=True)
+        finally:
+            self._pending_upgrades.discard((project_id, agent_type))
+
+    async def _upgrade_loop(self, interval: int) -> None:
+        from app.database import AsyncSessionLocal
+
+        while True:
+            await asyncio.sleep(interval)
+            if not is_off_peak():
+                continue
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.queue_upgrades(db)
+            except Exception as e:
+                logger.error(f"Failed to queue tier upgrades: {e}")
+
+    def start(self) -> None:
+        """Start the off-peak upgrade sweep (if TIER_UPGRADE_REGENERATION is enabled)."""
+        if settings.TIER_UPGRADE_REGENERATION and self._task is None:
+            self._task = asyncio.create_task(self._upgrade_loop(settings.TIER_UPGRADE_CHECK_INTERVAL))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Policy configuration and pending upgrades, for monitoring."""
+        return {
+            "enabled": settings.MODEL_TIERING_ENABLED,
+            "sloSeconds": settings.AGENT_RUN_SLO_SECONDS,
+            "floors": settings.MODEL_TIER_FLOORS,
+            "upgradeRegeneration": settings.TIER_UPGRADE_REGENERATION,
+            "offPeak": is_off_peak(),
+            "pendingUpgrades": len(self._pending_upgrades),
+        }
+
+
+# Global instance
+tiering_policy = TieringPolicy()
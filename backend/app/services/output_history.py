@@ -0,0 +1,209 @@
+"""
+Output History - Version history for agent outputs, stored as deltas.
+
+Each successful agent run records a version of the project's AgentOutput
+in `agent_output_versions`. The AgentOutput row itself is the current
+version (its `current_version` points at the version it holds), so reading
+a project's outputs never touches the history.
+
+content_html and content_markdown are stored zlib-compressed, either in
+full (a base version) or as a delta against the most recent base (see
+text_delta). A new base is written every AGENT_OUTPUT_BASE_INTERVAL
+versions, or when the deltas would not be smaller than the full texts, so
+rebuilding any version reads at most two rows: the version and its base.
+The JSON content is small and is stored in full on every version.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+from app.config import settings
+from app.utils.text_delta import compress, decompress, make_delta, apply_delta
+
+logger = logging.getLogger(__name__)
+
+
+def _size(*data: Optional[bytes]) -> int:
+    return sum(len(d) for d in data if d is not None)
+
+
+def _delta(base_text: Optional[str], text: Optional[str]) -> Tuple[bool, Optional[bytes]]:
+    """(possible, delta) for one field against its base text."""
+    if text is None:
+        return True, None
+    if base_text is None:
+        return False, None
+    return True, make_delta(base_text, text)
+
+
+class OutputHistory:
+    """Records and rebuilds AgentOutput versions."""
+
+    async def _version_row(self, db_session, output_id, version: int):
+        from sqlalchemy import select
+        from app.models.agent_output_version import AgentOutputVersion
+
+        return (await db_session.execute(
+            select(AgentOutputVersion).where(
+                AgentOutputVersion.output_id == output_id,
+                AgentOutputVersion.version == version
+            )
+        )).scalar_one_or_none()
+
+    async def record(self, db_session, output) -> int:
+        """
+        Add the output's current content as its next version.
+
+        The version is added to the session and output.current_version set;
+        the caller commits both together.
+
+        Args:
+            db_session: Database session
+            output: AgentOutput holding the new content
+
+        Returns:
+            The new version number
+        """
+        from sqlalchemy import select
+        from app.models.agent_output_version import AgentOutputVersion
+
+        latest = (await db_session.execute(
+            select(AgentOutputVersion)
+            .where(AgentOutputVersion.output_id == output.id)
+            .order_by(AgentOutputVersion.version.desc())
+            .limit(1)
+        )).scalar_one_or_none()
+        version = latest.version + 1 if latest else 1
+
+        base_version = version
+        html_data = compress(output.content_html)
+        markdown_data = compress(output.content_markdown)
+
+        if latest is not None and version - latest.base_version < settings.AGENT_OUTPUT_BASE_INTERVAL:
+            base = latest if latest.is_base else await self._version_row(db_session, output.id, latest.base_version)
+            if base is not None:
+                html_ok, html_delta = _delta(decompress(base.content_html_data), output.content_html)
+                markdown_ok, markdown_delta = _delta(decompress(base.content_markdown_data), output.content_markdown)
+                if html_ok and markdown_ok and _size(html_delta, markdown_delta) < _size(html_data, markdown_data):
+                    base_version = base.version
+                    html_data, markdown_data = html_delta, markdown_delta
+
+        db_session.add(AgentOutputVersion(
+            output_id=output.id,
+            version=version,
+            base_version=base_version,
+            content=output.content,
+            content_html_data=html_data,
+            content_markdown_data=markdown_data,
+            tokens_used=output.tokens_used,
+            provider=output.provider,
+            model_name=output.model_name,
+            model_tier=output.model_tier
+        ))
+        output.current_version = version
+
+        logger.debug(
+            f"Recorded {output.agent_type} version {version} for project {output.project_id} "
+            f"({'base' if base_version == version else f'delta on {base_version}'}, "
+            f"{_size(html_data, markdown_data)} bytes)"
+        )
+        return version
+
+    async def load(self, db_session, output_id, version: int) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild one version of an output.
+
+        Args:
+            db_session: Database session
+            output_id: AgentOutput id
+            version: Version number
+
+        Returns:
+            Dict with the version's content, content_html, content_markdown
+            and metadata, or None if there is no such version
+        """
+        row = await self._version_row(db_session, output_id, version)
+        if row is None:
+            return None
+
+        content_html = decompress(row.content_html_data)
+        content_markdown = decompress(row.content_markdown_data)
+
+        if not row.is_base:
+            base = await self._version_row(db_session, output_id, row.base_version)
+            if base is None:
+                raise ValueError(f"Base version {row.base_version} of output {output_id} is missing")
+            if row.content_html_data is not None:
+                content_html = apply_delta(decompress(base.content_html_data), row.content_html_data)
+            if row.content_markdown_data is not None:
+                content_markdown = apply_delta(decompress(base.content_markdown_data), row.content_markdown_data)
+
+        return {
+            "version": row.version,
+            "content": row.content,
+            "content_html": content_html,
+            "content_markdown": content_markdown,
+            "tokens_used": row.tokens_used,
+            "provider": row.provider,
+            "model_name": row.model_name,
+            "model_tier": row.model_tier,
+            "created_at": row.created_at,
+        }
+
+    async def list_versions(self, db_session, output_id) -> List[Dict[str, Any]]:
+        """Metadata of every version of an output, newest first (no content)."""
+        from sqlalchemy import select, func
+        from app.models.agent_output_version import AgentOutputVersion
+
+        rows = (await db_session.execute(
+            select(
+                AgentOutputVersion.version,
+                AgentOutputVersion.base_version,
+                AgentOutputVersion.tokens_used,
+                AgentOutputVersion.provider,
+                AgentOutputVersion.model_name,
+                AgentOutputVersion.model_tier,
+                AgentOutputVersion.created_at,
+                (
+                    func.coalesce(func.length(AgentOutputVersion.content_html_data), 0)
+                    + func.coalesce(func.length(AgentOutputVersion.content_markdown_data), 0)
+                ).label("stored_bytes")
+            )
+            .where(AgentOutputVersion.output_id == output_id)
+            .order_by(AgentOutputVersion.version.desc())
+        )).all()
+
+        return [dict(row._mapping) for row in rows]
+
+    async def restore(self, db_session, output, version: int) -> bool:
+        """
+        Make an earlier version the output's current one.
+
+        The content is copied back onto the AgentOutput and its approval
+        cleared; the history is unchanged, and the next run records the
+        version after the latest one.
+
+        Returns:
+            Whether the version exists
+        """
+        restored = await self.load(db_session, output.id, version)
+        if restored is None:
+            return False
+
+        output.content = restored["content"]
+        output.content_html = restored["content_html"]
+        output.content_markdown = restored["content_markdown"]
+        output.tokens_used = restored["tokens_used"]
+        output.provider = restored["provider"]
+        output.model_name = restored["model_name"]
+        output.model_tier = restored["model_tier"]
+        output.current_version = version
+        output.status = "completed"
+        output.approved_by = None
+        output.approved_at = None
+        output.rejection_reason = None
+        output.error = None
+        return True
+
+
+# Global instance
+output_history = OutputHistory()
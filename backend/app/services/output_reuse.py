@@ -0,0 +1,256 @@
+"""
+Output Reuse - Cross-project reuse of agent model responses.
+
+Agents that opt in (non-empty `reuse_fields`, and a TTL in
+AGENT_OUTPUT_REUSE_TTL_HOURS) have each request canonicalised: the prompt
+line carrying each of those fields - e.g. "Client: <business name>" - has
+the project's value replaced by a [[placeholder]], and the canonical request
+is hashed into a fingerprint. Two leads with the same challenges and team
+size then have the same fingerprint for the dashboard agent, whatever their
+business is called. Values are only replaced on those lines; the same words
+elsewhere in the prompt stay as they are.
+
+Model output is free text, so it is never searched for values to replace.
+A response is stored, in `reusable_outputs`, only if the values appear
+nowhere in it except in the agent's `reuse_output_fields` - top-level
+string fields of a JSON response, like the dashboard's appName - where
+they are stored as placeholders. A request whose fingerprint has a stored
+response younger than the agent's TTL gets that response back, with the
+new project's values filled into those fields, instead of a model call.
+"""
+from typing import Dict, Any, Iterator, List, Optional
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+import re
+
+from app.utils.json_extract import extract_json, JSONExtractionError
+
+logger = logging.getLogger(__name__)
+
+# Part of every fingerprint; bumped when the canonical form changes, so
+# responses stored in an older form are never matched
+CANONICAL_FORM_VERSION = 2
+
+
+def _placeholder(name: str) -> str:
+    return f"[[{name}]]"
+
+
+def canonicalize_prompt(prompt: str, labels: Dict[str, str], values: Dict[str, str]) -> Optional[str]:
+    """
+    Replace each value on its labelled prompt line with its placeholder.
+
+    Args:
+        prompt: Prompt built from the project
+        labels: Field name -> text preceding the value on its line
+        values: Field name -> the project's value
+
+    Returns:
+        Canonical prompt, or None if a field's line is missing or its value
+        is empty (the request is then not reused)
+    """
+    for name, label in labels.items():
+        value = values.get(name)
+        if not value:
+            return None
+        line = re.compile(rf"^{re.escape(label)}{re.escape(value)}$", re.MULTILINE)
+        if not line.search(prompt):
+            return None
+        prompt = line.sub(lambda _: f"{label}{_placeholder(name)}", prompt)
+    return prompt
+
+
+def _strings(value: Any) -> Iterator[str]:
+    """Every string (keys included) in a parsed JSON value."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield key
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def _mentions(strings: Iterator[str], values: Dict[str, str]) -> bool:
+    """Whether any value occurs, ignoring case, in any of the strings."""
+    wanted = [value.casefold() for value in values.values() if value]
+    return any(value in string.casefold() for string in strings for value in wanted)
+
+
+def canonicalize_response(text: str, values: Dict[str, str], output_fields: List[str]) -> Optional[str]:
+    """
+    The form of a response to store for reuse, if it can be reused.
+
+    Without output_fields the response is stored verbatim, and only if it
+    does not mention the values at all. Otherwise it must be a JSON object;
+    values in its output_fields become placeholders, and it must not
+    mention them anywhere else.
+
+    Args:
+        text: Model response
+        values: Field name -> the project's value
+        output_fields: Top-level response fields that may carry the values
+
+    Returns:
+        Text to store, or None if the response is specific to the project
+    """
+    if not output_fields:
+        return None if _mentions(iter([text]), values) else text
+
+    try:
+        data = extract_json(text)
+    except JSONExtractionError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    rest = {key: item for key, item in data.items() if key not in output_fields}
+    if _mentions(_strings(rest), values):
+        return None
+
+    for key in output_fields:
+        if isinstance(data.get(key), str):
+            for name, value in values.items():
+                data[key] = data[key].replace(value, _placeholder(name))
+            if _mentions(iter([data[key]]), values):
+                return None
+        elif key in data and _mentions(_strings(data[key]), values):
+            return None
+
+    return json.dumps(data, ensure_ascii=False)
+
+
+def substitute(text: str, values: Dict[str, str], output_fields: List[str]) -> str:
+    """
+    Fill a stored response's placeholders with the project's values.
+
+    Args:
+        text: Response stored by canonicalize_response()
+        values: Field name -> the project's value
+        output_fields: Top-level response fields holding placeholders
+    """
+    if not output_fields:
+        return text
+
+    data = json.loads(text)
+    for key in output_fields:
+        if isinstance(data.get(key), str):
+            for name, value in values.items():
+                data[key] = data[key].replace(_placeholder(name), value)
+    return json.dumps(data, ensure_ascii=False)
+
+
+def request_fingerprint(agent_type: str, tier: str, **request: Any) -> str:
+    """SHA-256 over an agent's canonical request (prompt, system, schema, sampling)."""
+    payload = json.dumps(
+        {"canonical_form": CANONICAL_FORM_VERSION, "agent_type": agent_type, "tier": tier, **request},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class OutputReuseStore:
+    """Stored canonical responses, keyed by request fingerprint."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.tokens_saved = 0
+
+    async def get(self, fingerprint: str, max_age_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Stored response for a fingerprint, if younger than max_age_seconds.
+
+        Returns:
+            Dict with 'text' (canonical), 'provider', 'model_name' and
+            'tokens_used', or None
+        """
+        from sqlalchemy import select, update
+        from app.database import AsyncSessionLocal
+        from app.models.reusable_output import ReusableOutput
+
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(ReusableOutput).where(
+                    ReusableOutput.fingerprint == fingerprint,
+                    ReusableOutput.created_at >= datetime.utcnow() - timedelta(seconds=max_age_seconds)
+                )
+            )).scalar_one_or_none()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            await db.execute(
+                update(ReusableOutput)
+                .where(ReusableOutput.fingerprint == fingerprint)
+                .values(hits=ReusableOutput.hits + 1)
+            )
+            await db.commit()
+
+        self.hits += 1
+        self.tokens_saved += row.tokens_used or 0
+        return {
+            "text": row.text,
+            "provider": row.provider,
+            "model_name": row.model_name,
+            "tokens_used": row.tokens_used,
+        }
+
+    async def put(
+        self,
+        fingerprint: str,
+        agent_type: str,
+        text: str,
+        provider: Optional[str],
+        model_name: Optional[str],
+        tokens_used: int
+    ) -> None:
+        """Store (or replace, restarting its TTL) the canonical response for a fingerprint."""
+        from sqlalchemy.dialects.postgresql import insert
+        from sqlalchemy.sql import func
+        from app.database import AsyncSessionLocal
+        from app.models.reusable_output import ReusableOutput
+
+        values = {
+            "agent_type": agent_type,
+            "text": text,
+            "provider": provider,
+            "model_name": model_name,
+            "tokens_used": tokens_used,
+        }
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                insert(ReusableOutput)
+                .values(fingerprint=fingerprint, hits=0, **values)
+                .on_conflict_do_update(
+                    index_elements=[ReusableOutput.fingerprint],
+                    set_={**values, "hits": 0, "created_at": func.now()}
+                )
+            )
+            await db.commit()
+
+        self.stored += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Hit/miss counts since startup, for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 3) if lookups else None,
+            "stored": self.stored,
+            "tokensSaved": self.tokens_saved,
+        }
+
+
+# Global instance
+output_reuse = OutputReuseStore()
@@ -0,0 +1,102 @@
+"""
+Prefill Stats - Per-agent prompt prefill timing and prefix-cache hit rates.
+
+Local backends report how long prompt evaluation (prefill) took and, where
+supported, how many prompt tokens were served from the KV cache instead of
+being recomputed. From the cost per evaluated token we estimate how much
+prefill time the cached prefix saved for each agent.
+"""
+from typing import Dict, Any, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Smoothing factor for the prefill EWMAs
+PREFILL_EWMA_ALPHA = 0.2
+
+
+def _ewma(current: Optional[float], sample: float) -> float:
+    if current is None:
+        return sample
+    return current + PREFILL_EWMA_ALPHA * (sample - current)
+
+
+class AgentPrefillStats:
+    """Prefill accounting for a single agent."""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.prefill_seconds = 0.0
+        self.ewma_prefill_seconds: Optional[float] = None
+        # EWMA of prefill seconds per evaluated (uncached) prompt token
+        self.seconds_per_token: Optional[float] = None
+        self.saved_seconds = 0.0
+
+    def observe(self, prompt_tokens: int, cached_tokens: int, prefill_seconds: float) -> None:
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+        self.prefill_seconds += prefill_seconds
+        self.ewma_prefill_seconds = _ewma(self.ewma_prefill_seconds, prefill_seconds)
+
+        evaluated = prompt_tokens - cached_tokens
+        if evaluated > 0 and prefill_seconds > 0:
+            self.seconds_per_token = _ewma(self.seconds_per_token, prefill_seconds / evaluated)
+
+        if cached_tokens and self.seconds_per_token is not None:
+            self.saved_seconds += cached_tokens * self.seconds_per_token
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "promptTokens": self.prompt_tokens,
+            "cachedTokens": self.cached_tokens,
+            "cacheHitRate": round(self.cached_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+            "prefillSeconds": round(self.prefill_seconds, 2),
+            "ewmaPrefillSeconds": round(self.ewma_prefill_seconds or 0.0, 3),
+            "savedSeconds": round(self.saved_seconds, 2),
+            "savedSecondsPerRequest": round(self.saved_seconds / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class PrefillTracker:
+    """Registry of AgentPrefillStats keyed by agent type."""
+
+    def __init__(self):
+        self._stats: Dict[str, AgentPrefillStats] = {}
+
+    def record(self, agent_type: str, usage: Dict[str, Any]) -> None:
+        """
+        Record the prefill figures from a local LLM usage dict.
+
+        Args:
+            agent_type: Agent that made the request
+            usage: Usage dict with 'prompt_tokens' and, when the backend
+                   reports them, 'cached_tokens' and 'prefill_seconds'
+        """
+        if "prefill_seconds" not in usage and "cached_tokens" not in usage:
+            return
+
+        stats = self._stats.setdefault(agent_type, AgentPrefillStats())
+        stats.observe(
+            prompt_tokens=int(usage.get("prompt_tokens", 0)),
+            cached_tokens=int(usage.get("cached_tokens", 0)),
+            prefill_seconds=float(usage.get("prefill_seconds", 0.0))
+        )
+
+    def get(self, agent_type: str) -> Optional[AgentPrefillStats]:
+        return self._stats.get(agent_type)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-agent prefill statistics, for monitoring."""
+        return [
+            {"agentType": agent_type, **stats.to_dict()}
+            for agent_type, stats in sorted(self._stats.items())
+        ]
+
+
+# Global instance
+prefill_tracker = PrefillTracker()
@@ -0,0 +1,237 @@
+"""
+Proposal Renderer - Builds a client proposal from HTML templates.
+
+Used by the proposal agent for leads whose matched systems are well
+covered by standard copy (simple complexity by default): the proposal is
+assembled from a page template and one block per matched category, filled
+with the project's match result and pricing, in well under a millisecond.
+Only the opening summary can optionally be written by a model.
+
+Templates use {{name}} slots. They are compiled once at import into
+literal chunks and slots, so rendering is an escape and a join. Values are
+HTML-escaped unless the slot name ends in _html.
+"""
+from typing import Dict, Any, List, Optional, Tuple, Union
+import html
+import math
+import re
+
+_SLOT = re.compile(r"\{\{(\w+)\}\}")
+
+
+class CompiledHtml:
+    """An HTML template split at its {{slots}}."""
+
+    def __init__(self, template: str):
+        self._parts: List[Union[str, Tuple[str]]] = []
+        position = 0
+        for match in _SLOT.finditer(template):
+            self._parts.append(template[position:match.start()])
+            self._parts.append((match.group(1),))
+            position = match.end()
+        self._parts.append(template[position:])
+
+    def render(self, **values: Any) -> str:
+        """Fill the slots (missing values render empty)."""
+        chunks = []
+        for part in self._parts:
+            if isinstance(part, str):
+                chunks.append(part)
+            else:
+                name = part[0]
+                value = values.get(name, "")
+                chunks.append(str(value) if name.endswith("_html") else html.escape(str(value)))
+        return "".join(chunks)
+
+
+# Standard copy per matched category
+CATEGORY_COPY = {
+    "enquiry_capture": {
+        "title": "Enquiry Capture System",
+        "does": "Every enquiry from your website, Facebook, email and WhatsApp lands in one place, gets an instant reply, and pings your phone.",
+        "features": ["Instant auto-reply to every new enquiry", "All enquiries logged in one list", "Text alert to you for each new lead"],
+        "saves": "No more lost leads, and around 3 hours a week of checking inboxes",
+    },
+    "quote_generation": {
+        "title": "Quick Quote Builder",
+        "does": "Turns your measurements and notes into a professional, priced quote you can send the same day.",
+        "features": ["Quote templates with your pricing", "Branded PDF quotes in minutes", "Every quote tracked in one place"],
+        "saves": "Around 4-5 hours a week of evening paperwork",
+    },
+    "follow_up": {
+        "title": "Automatic Follow-Ups",
+        "does": "Politely chases quotes and enquiries that have gone quiet, so you don't have to.",
+        "features": ["Timed follow-up emails and texts", "Stops as soon as the customer replies", "Alerts you when a quote is opened"],
+        "saves": "More quotes turned into jobs, with none of the awkward chasing",
+    },
+    "job_management": {
+        "title": "Job Tracker",
+        "does": "Follows every booked job from deposit to sign-off, so nothing slips through the cracks.",
+        "features": ["Pipeline view of every job", "Reminders for site visits and deliveries", "Automatic customer reminders"],
+        "saves": "Around 2 hours a week of chasing where jobs are up to",
+    },
+    "scheduling": {
+        "title": "Smart Scheduling",
+        "does": "Keeps your diary, your team and your customers on the same calendar.",
+        "features": ["Shared calendar for you and your team", "Booking confirmations sent automatically", "No more double bookings"],
+        "saves": "Around 2-3 hours a week of juggling the diary",
+    },
+    "client_communication": {
+        "title": "Customer Update System",
+        "does": "Sends customers updates at each stage of their job automatically, so they stop ringing to ask.",
+        "features": ["Stage-by-stage text and email updates", "Simple customer status page", "Updates triggered from your job list"],
+        "saves": "Fewer interruptions on site and happier customers",
+    },
+    "invoicing": {
+        "title": "Automatic Invoicing",
+        "does": "Creates and sends the invoice as soon as a job is marked complete, with card payment built in.",
+        "features": ["Invoices generated from the job details", "Online card payments", "Nothing left un-invoiced"],
+        "saves": "Faster payment and around 2 hours a week of admin",
+    },
+    "payments": {
+        "title": "Payment Chasing",
+        "does": "Sends friendly, then firmer, reminders for overdue invoices until they're paid.",
+        "features": ["Scheduled payment reminders", "Overdue invoice tracking", "Escalation for late payers"],
+        "saves": "Better cash flow without the awkward conversations",
+    },
+    "marketing": {
+        "title": "Review Collector",
+        "does": "Asks every happy customer for a Google review at the right moment.",
+        "features": ["Review requests after each completed job", "Direct link to your Google profile", "Testimonials collected for your website"],
+        "saves": "A steady stream of reviews that wins you more work",
+    },
+    "reporting": {
+        "title": "Business Dashboard",
+        "does": "Shows your enquiries, quotes, jobs and money in on one simple screen, with a daily summary email.",
+        "features": ["Live dashboard of your key numbers", "Daily digest email", "Weekly trends at a glance"],
+        "saves": "A clear view of the business without digging through spreadsheets",
+    },
+}
+
+DEFAULT_COPY = {
+    "does": "A custom automation built around how you work today.",
+    "features": ["Built and tested for your business", "Connected to the tools you already use"],
+    "saves": "Hours of repetitive admin every week",
+}
+
+
+_PAGE = CompiledHtml("""<html>
+<body style="font-family: Arial, sans-serif; color: #1f2933; line-height: 1.6; max-width: 680px; margin: 0 auto; padding: 24px;">
+<h1 style="color: #0b3d91;">Your Automation Plan - {{business_name}}</h1>
+<p>Hi {{first_name}},</p>
+<h2 style="color: #0b3d91;">Summary</h2>
+{{summary_html}}
+<h2 style="color: #0b3d91;">Understanding Your Business</h2>
+<p>From what you told us, these are the things costing you time and work right now:</p>
+<ul>{{challenges_html}}</ul>
+<h2 style="color: #0b3d91;">What We'll Build</h2>
+{{systems_html}}
+<h2 style="color: #0b3d91;">Implementation Plan</h2>
+<ul>{{plan_html}}</ul>
+<p>All we need from you is access to the accounts we'll connect and a short call at the start.</p>
+<h2 style="color: #0b3d91;">Investment</h2>
+<table style="width: 100%; border-collapse: collapse;">{{pricing_html}}
+<tr><td style="padding: 8px; font-weight: bold; border-top: 2px solid #0b3d91;">Total</td><td style="padding: 8px; text-align: right; font-weight: bold; border-top: 2px solid #0b3d91;">{{total}}</td></tr>
+</table>
+<p>Payment terms: 50% upfront, 50% on completion.</p>
+<h2 style="color: #0b3d91;">Why DeepFlow AI</h2>
+<ul><li>We specialise in trade businesses</li><li>Everything is custom-built around how you work</li><li>Ongoing support once you're up and running</li></ul>
+<h2 style="color: #0b3d91;">Next Steps</h2>
+<ol><li>Book a short discovery call</li><li>Share access to the systems we'll connect</li><li>Agree a kickoff date - you'll see results within {{weeks}}</li></ol>
+<p>Best regards,<br>The DeepFlow AI Team</p>
+</body>
+</html>""")
+
+_SYSTEM = CompiledHtml("""<h3 style="margin-bottom: 4px;">{{number}}. {{title}}</h3>
+<p style="margin-top: 0;">{{does}} This tackles: <em>{{challenge}}</em>.</p>
+<ul>{{features_html}}</ul>
+<p><strong>Expected result:</strong> {{saves}}</p>
+""")
+
+_PRICE_ROW = CompiledHtml(
+    '<tr><td style="padding: 8px; border-bottom: 1px solid #e4e7eb;">{{title}}</td>'
+    '<td style="padding: 8px; text-align: right; border-bottom: 1px solid #e4e7eb;">{{price}}</td></tr>'
+)
+
+_ITEM = CompiledHtml("<li>{{text}}</li>")
+_PARAGRAPH = CompiledHtml("<p>{{text}}</p>")
+
+
+def _money(value: float) -> str:
+    return f"£{value:,.0f}"
+
+
+def _weeks(weeks: int) -> str:
+    return f"{weeks} week" if weeks == 1 else f"{weeks} weeks"
+
+
+def _copy(category: str) -> Dict[str, Any]:
+    return CATEGORY_COPY.get(category) or {**DEFAULT_COPY, "title": category.replace("_", " ").title()}
+
+
+def default_summary(project, matched_templates: List[Dict[str, Any]], weeks: int) -> str:
+    """Standard opening summary, used when no model writes one."""
+    titles = [_copy(t["category"])["title"] for t in matched_templates]
+    if not titles:
+        systems = "a set of automations"
+    elif len(titles) == 1:
+        systems = f"a {titles[0]}"
+    else:
+        systems = ", ".join(titles[:-1]) + f" and {titles[-1]}"
+
+    return (
+        f"Thanks for telling us about {project.business_name}. You're losing time to admin that "
+        f"shouldn't need you, so we'll build {systems} around how you already work. Within "
+        f"{_weeks(weeks)} the repetitive jobs run themselves and you get your evenings back."
+    )
+
+
+def render_proposal(project, context: Dict[str, Any], summary: Optional[str] = None) -> str:
+    """
+    Render a proposal from the match result.
+
+    Args:
+        project: Project instance
+        context: Agent context (matched_templates, total_value, estimated_weeks)
+        summary: Opening summary paragraph (plain text); default_summary if None
+
+    Returns:
+        Proposal HTML
+    """
+    matched_templates = context.get("matched_templates", [])
+    weeks = int(context.get("estimated_weeks") or 1)
+    total_value = float(context.get("total_value") or 0)
+
+    systems, prices = [], []
+    for number, template in enumerate(matched_templates, 1):
+        copy = _copy(template["category"])
+        systems.append(_SYSTEM.render(
+            number=number,
+            title=copy["title"],
+            does=copy["does"],
+            challenge=template["challenge"],
+            features_html="".join(_ITEM.render(text=feature) for feature in copy["features"]),
+            saves=copy["saves"],
+        ))
+        prices.append(_PRICE_ROW.render(title=copy["title"], price=_money(float(template["base_price"]))))
+
+    # Systems go live in urgency order, spread evenly over the timeline
+    plan = []
+    for index, template in enumerate(matched_templates):
+        week = max(1, math.ceil((index + 1) * weeks / len(matched_templates)))
+        plan.append(_ITEM.render(text=f"Week {week}: {_copy(template['category'])['title']} live"))
+    plan.append(_ITEM.render(text=f"Week {weeks}: Final testing, handover and training"))
+
+    paragraphs = (summary or default_summary(project, matched_templates, weeks)).split("\n\n")
+
+    return _PAGE.render(
+        business_name=project.business_name,
+        first_name=((project.client_name or "").split() or ["there"])[0],
+        summary_html="".join(_PARAGRAPH.render(text=p.strip()) for p in paragraphs if p.strip()),
+        challenges_html="".join(_ITEM.render(text=c) for c in project.challenges or []),
+        systems_html="".join(systems),
+        plan_html="".join(plan),
+        pricing_html="".join(prices),
+        total=_money(total_value),
+        weeks=_weeks(weeks),
+    )
@@ -0,0 +1,254 @@
+"""
+Provider Router - Single entry point for agent LLM requests.
+
+Every agent sends its requests here with its model tier and the API
+provider it would use; the router picks the provider from LLM_MODE:
+
+- "local": the local server's model for the tier,
+- "api": the agent's API provider (Anthropic or Gemini),
+- "hybrid": local first, overflowing to the API provider when the predicted
+  local queue wait exceeds HYBRID_MAX_LOCAL_WAIT_SECONDS, the agent's local
+  p95 latency exceeds HYBRID_MAX_LOCAL_LATENCY_SECONDS, the local circuit
+  breakers are open, or the local request fails (including a prompt too
+  long for the local context window).
+
+max_tokens is capped to fit each model's context window before sending,
+and usage a backend does not report is counted with the model's tokenizer.
+
+Requests, failures, overflows, tokens, cost and latency are accounted per
+(provider, model).
+"""
+from typing import Dict, Any, Optional, Tuple
+import logging
+import time
+
+from app.config import settings
+from app.services.latency_model import latency_model, LatencyStats
+from app.services.model_tiering import model_for_tier
+from app.services.prefill_stats import prefill_tracker
+from app.services.token_counter import token_counter
+
+logger = logging.getLogger(__name__)
+
+
+# Anthropic bills prompt tokens read from the cache at a tenth of the input price
+CACHED_INPUT_PRICE_FACTOR = 0.1
+
+
+def request_cost(model: str, usage: Dict[str, Any]) -> float:
+    """
+    Cost in USD of one request, from API_PRICING_PER_MTOK.
+
+    Models without a price (local models) cost nothing.
+    """
+    pricing = settings.API_PRICING_PER_MTOK.get(model)
+    if not pricing:
+        return 0.0
+
+    prompt_tokens = usage.get("prompt_tokens", 0)
+    cached_tokens = min(usage.get("cached_tokens", 0), prompt_tokens)
+    completion_tokens = usage.get("completion_tokens", 0)
+
+    input_cost = (prompt_tokens - cached_tokens + cached_tokens * CACHED_INPUT_PRICE_FACTOR) * pricing["input"]
+    output_cost = completion_tokens * pricing["output"]
+    return (input_cost + output_cost) / 1_000_000
+
+
+class ProviderStats:
+    """Request, token, cost and latency accounting for one (provider, model)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.overflows = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.latency = LatencyStats(alpha=settings.LATENCY_EWMA_ALPHA)
+
+    def observe(self, seconds: float, usage: Dict[str, Any], cost: float) -> None:
+        self.requests += 1
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.completion_tokens += usage.get("completion_tokens", 0)
+        self.cost_usd += cost
+        self.latency.observe(seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "overflows": self.overflows,
+            "promptTokens": self.prompt_tokens,
+            "completionTokens": self.completion_tokens,
+            "costUsd": round(self.cost_usd, 4),
+            "latency": self.latency.to_dict(),
+        }
+
+
+class ProviderRouter:
+    """Routes agent requests to the local server or an API provider."""
+
+    def __init__(self):
+        self.mode = settings.LLM_MODE
+        self._stats: Dict[Tuple[str, str], ProviderStats] = {}
+        # All local requests, for the queue-wait prediction
+        self._local_latency = LatencyStats(alpha=settings.LATENCY_EWMA_ALPHA)
+        self._local_in_flight = 0
+
+    def primary_provider(self, api_provider: str) -> str:
+        """Provider an agent's requests go to first."""
+        return api_provider if self.mode == "api" else "local"
+
+    def _stats_for(self, provider: str, model: str) -> ProviderStats:
+        key = (provider, model)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = ProviderStats()
+        return stats
+
+    def predicted_local_wait(self) -> float:
+        """Seconds a new local request is expected to queue behind those in flight."""
+        if not self._local_latency.ewma:
+            return 0.0
+        parallelism = max(1, settings.LOCAL_LLM_PARALLELISM)
+        queued = max(0, self._local_in_flight - parallelism + 1)
+        return queued * self._local_latency.ewma / parallelism
+
+    def overflow_reason(self, agent_type: str, local_model: str) -> Optional[str]:
+        """
+        Why a hybrid-mode request should skip the local server, if it should.
+
+        Returns:
+            Reason string, or None to try local first
+        """
+        from app.services.local_llm_service import local_llm
+
+        if not local_llm.resilience.accepting():
+            return "local endpoints unavailable"
+
+        wait = self.predicted_local_wait()
+        if wait > settings.HYBRID_MAX_LOCAL_WAIT_SECONDS:
+            return f"predicted local queue wait {wait:.0f}s"
+
+        stats = latency_model.get(agent_type, local_model)
+        if (
+            stats is not None
+            and stats.count >= settings.HYBRID_MIN_LATENCY_SAMPLES
+            and stats.p95 > settings.HYBRID_MAX_LOCAL_LATENCY_SECONDS
+        ):
+            return f"local p95 {stats.p95:.0f}s"
+
+        return None
+
+    async def generate(
+        self,
+        agent_type: str,
+        tier: str,
+        api_provider: str,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        json_schema: Optional[Dict[str, Any]] = None,
+        system: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate text for an agent on the provider chosen by LLM_MODE.
+
+        Args:
+            agent_type: Agent making the request
+            tier: Model tier ("opus", "sonnet", "haiku")
+            api_provider: "anthropic" or "gemini" - used in API mode and for overflow
+            prompt: Input prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            json_schema: Optional JSON Schema for structured output
+            system: System instructions
+
+        Returns:
+            Dict with 'text', 'usage', 'provider' and 'model' keys
+        """
+        request = {
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "json_schema": json_schema,
+            "system": system,
+        }
+
+        if self.mode != "hybrid":
+            return await self._call(self.primary_provider(api_provider), tier, agent_type, request)
+
+        reason = self.overflow_reason(agent_type, model_for_tier("local", tier))
+        if reason is None:
+            try:
+                return await self._call("local", tier, agent_type, request)
+            except Exception as e:
+                reason = f"local request failed: {e}"
+
+        logger.info(f"Overflowing {agent_type} request to {api_provider} ({reason})")
+        self._stats_for(api_provider, model_for_tier(api_provider, tier)).overflows += 1
+        return await self._call(api_provider, tier, agent_type, request)
+
+    async def _call(
+        self,
+        provider: str,
+        tier: str,
+        agent_type: str,
+        request: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        model = model_for_tier(provider, tier)
+        stats = self._stats_for(provider, model)
+
+        # Refuse locally rather than send a request the model would reject
+        request = {
+            **request,
+            "max_tokens": token_counter.fit_max_tokens(
+                request["prompt"], provider, model, request["max_tokens"], request["system"]
+            )
+        }
+        start = time.monotonic()
+
+        try:
+            if provider == "local":
+                from app.services.local_llm_service import local_llm
+
+                self._local_in_flight += 1
+                try:
+                    result = await local_llm.generate(model=model, **request)
+                finally:
+                    self._local_in_flight -= 1
+                prefill_tracker.record(agent_type, result["usage"])
+            else:
+                from app.services.api_llm_service import api_llm
+
+                result = await api_llm.generate(model=model, provider=provider, **request)
+        except Exception:
+            stats.failures += 1
+            raise
+
+        seconds = time.monotonic() - start
+        token_counter.complete_usage(
+            result["usage"], provider, model, request["prompt"], result["text"], request["system"]
+        )
+        stats.observe(seconds, result["usage"], request_cost(model, result["usage"]))
+        if provider == "local":
+            self._local_latency.observe(seconds)
+
+        return {**result, "provider": provider, "model": model}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-provider accounting and the current local queue, for monitoring."""
+        return {
+            "mode": self.mode,
+            "localInFlight": self._local_in_flight,
+            "predictedLocalWaitSeconds": round(self.predicted_local_wait(), 1),
+            "providers": [
+                {"provider": provider, "modelName": model, **stats.to_dict()}
+                for (provider, model), stats in sorted(self._stats.items())
+            ],
+            "totalCostUsd": round(sum(stats.cost_usd for stats in self._stats.values()), 4),
+        }
+
+
+# Global instance
+provider_router = ProviderRouter()
@@ -0,0 +1,250 @@
+"""
+Rate Limiter - Provider-level token-bucket scheduling for hosted LLM APIs.
+
+Every API call acquires from two buckets for its provider/model: one for
+requests per minute and one for tokens per minute, charged with an estimate
+before sending and corrected with actual usage afterwards. Callers queue in
+FIFO order and are spaced out to stay under quota, instead of bursting into
+429s. The Redis backend shares the budgets across worker processes.
+"""
+from typing import Dict, Any, Optional, Tuple, Callable
+import asyncio
+import logging
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Redis bucket keys expire after this long without requests
+REDIS_BUCKET_TTL_SECONDS = 3600
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` per second."""
+
+    def __init__(self, capacity: float, rate: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.rate = rate
+        self._clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+        self.paused_until = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` can be consumed (0 if available now)."""
+        self._refill()
+        pause = max(0.0, self.paused_until - self._clock())
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        if self.tokens >= amount:
+            return pause
+        return max(pause, (amount - self.tokens) / self.rate)
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount  # May go negative when correcting with actual usage
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, self._clock() + seconds)
+
+
+class RateLimiter:
+    """In-process scheduler holding request and token buckets per provider/model."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._buckets: Dict[Tuple[str, str], Tuple[TokenBucket, TokenBucket]] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    @staticmethod
+    def limits_for(provider: str, model: str) -> Dict[str, int]:
+        """Per-model limits override per-provider limits."""
+        limits = settings.API_RATE_LIMITS
+        return limits.get(f"{provider}:{model}") or limits.get(provider) or {}
+
+    def _get(self, provider: str, model: str) -> Optional[Tuple[TokenBucket, TokenBucket]]:
+        key = (provider, model)
+        if key not in self._buckets:
+            limits = self.limits_for(provider, model)
+            if not limits:
+                return None
+            rpm = limits.get("rpm", 60)
+            tpm = limits.get("tpm", 100000)
+            self._buckets[key] = (
+                TokenBucket(rpm, rpm / 60, self._clock),
+                TokenBucket(tpm, tpm / 60, self._clock)
+            )
+            self._locks[key] = asyncio.Lock()
+        return self._buckets[key]
+
+    async def acquire(self, provider: str, model: str, estimated_tokens: int) -> None:
+        """Wait until one request and `estimated_tokens` tokens fit the budget."""
+        buckets = self._get(provider, model)
+        if buckets is None:
+            return
+        requests, tokens = buckets
+
+        # Lock is FIFO: waiters are served in arrival order
+        async with self._locks[(provider, model)]:
+            while True:
+                wait = max(requests.time_until(1), tokens.time_until(estimated_tokens))
+                if wait <= 0:
+                    break
+                logger.debug(f"Rate limiter delaying {provider}:{model} request by {wait:.2f}s")
+                await asyncio.sleep(wait)
+
+            requests.consume(1)
+            tokens.consume(estimated_tokens)
+
+    async def settle(self, provider: str, model: str, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once actual usage is known."""
+        buckets = self._get(provider, model)
+        if buckets is not None and actual_tokens:
+            buckets[1].consume(actual_tokens - estimated_tokens)
+
+    async def backoff(self, provider: str, model: str, seconds: float) -> None:
+        """Pause a provider/model after a 429."""
+        buckets = self._get(provider, model)
+        if buckets is not None:
+            for bucket in buckets:
+                bucket.pause(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current bucket levels for monitoring."""
+        snapshot = {}
+        for (provider, model), (requests, tokens) in self._buckets.items():
+            requests._refill()
+            tokens._refill()
+            snapshot[f"{provider}:{model}"] = {
+                "requestsAvailable": round(requests.tokens, 2),
+                "requestsPerMinute": requests.capacity,
+                "tokensAvailable": round(tokens.tokens),
+                "tokensPerMinute": tokens.capacity,
+            }
+        return snapshot
+
+
+# Atomically refills both buckets and consumes from them only if both have
+# capacity; otherwise returns the seconds to wait. Uses the Redis server clock
+# so every process agrees on time.
+_REDIS_ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local wait = 0
+local levels = {}
+
+for i = 1, 2 do
+    local capacity = tonumber(ARGV[(i - 1) * 3 + 1])
+    local rate = tonumber(ARGV[(i - 1) * 3 + 2])
+    local amount = math.min(tonumber(ARGV[(i - 1) * 3 + 3]), capacity)
+    local data = redis.call('HMGET', KEYS[i], 'tokens', 'ts', 'paused_until')
+    local tokens = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    local paused_until = tonumber(data[3]) or 0
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    levels[i] = tokens
+    if paused_until > now then
+        wait = math.max(wait, paused_until - now)
+    end
+    if tokens < amount then
+        wait = math.max(wait, (amount - tokens) / rate)
+    end
+end
+
+for i = 1, 2 do
+    local amount = tonumber(ARGV[(i - 1) * 3 + 3])
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - amount
+    end
+    redis.call('HSET', KEYS[i], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[i], tonumber(ARGV[7]))
+end
+
+return tostring(wait)
+"""
+
+# Pauses both buckets for ARGV[1] seconds from now on the Redis server clock
+# (never shortening a longer pause already in place)
+_REDIS_BACKOFF_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local paused_until = now + tonumber(ARGV[1])
+
+for i = 1, #KEYS do
+    local current = tonumber(redis.call('HGET', KEYS[i], 'paused_until')) or 0
+    if paused_until > current then
+        redis.call('HSET', KEYS[i], 'paused_until', paused_until)
+    end
+    redis.call('EXPIRE', KEYS[i], tonumber(ARGV[2]))
+end
+
+return 1
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Token buckets stored in Redis, shared by every worker process."""
+
+    def __init__(self, redis_url: str):
+        super().__init__()
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(redis_url)
+        self._acquire_script = self._redis.register_script(_REDIS_ACQUIRE_SCRIPT)
+        self._backoff_script = self._redis.register_script(_REDIS_BACKOFF_SCRIPT)
+
+    @staticmethod
+    def _keys(provider: str, model: str) -> Tuple[str, str]:
+        prefix = f"deepflow:ratelimit:{provider}:{model}"
+        return f"{prefix}:requests", f"{prefix}:tokens"
+
+    async def acquire(self, provider: str, model: str, estimated_tokens: int) -> None:
+        limits = self.limits_for(provider, model)
+        if not limits:
+            return
+        rpm = limits.get("rpm", 60)
+        tpm = limits.get("tpm", 100000)
+
+        while True:
+            wait = float(await self._acquire_script(
+                keys=list(self._keys(provider, model)),
+                args=[rpm, rpm / 60, 1, tpm, tpm / 60, estimated_tokens, REDIS_BUCKET_TTL_SECONDS]
+            ))
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def settle(self, provider: str, model: str, estimated_tokens: int, actual_tokens: int) -> None:
+        if actual_tokens and self.limits_for(provider, model):
+            _, tokens_key = self._keys(provider, model)
+            await self._redis.hincrbyfloat(tokens_key, "tokens", estimated_tokens - actual_tokens)
+
+    async def backoff(self, provider: str, model: str, seconds: float) -> None:
+        await self._backoff_script(
+            keys=list(self._keys(provider, model)),
+            args=[seconds, REDIS_BUCKET_TTL_SECONDS]
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the limiter for the configured backend."""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        try:
+            return RedisRateLimiter(settings.REDIS_URL)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable, using in-process limiter: {e}")
+    return RateLimiter()
+
+
+# Global instance
+rate_limiter = create_rate_limiter()
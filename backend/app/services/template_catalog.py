@@ -0,0 +1,236 @@
+"""
+Template Catalog - Keeps challenge matching in sync with `workflow_templates`.
+
+The active templates are loaded into a MatchIndex (see challenge_matcher),
+including the similarity vectors free-text challenges and notes are
+matched with, so matching a lead never touches the database. The catalog
+is reloaded when its version changes:
+
+- immediately on a Postgres NOTIFY on TEMPLATE_CATALOG_CHANNEL, e.g.
+  `NOTIFY workflow_templates_changed` after editing templates by hand,
+- otherwise within TEMPLATE_CATALOG_REFRESH_INTERVAL, by comparing the
+  template count and latest `updated_at` with the loaded version.
+
+A reload builds the new index completely and then swaps it in, so matches
+see either the old catalog or the new one, never a mix. Until templates
+exist in the database the built-in CHALLENGE_MAPPINGS are used.
+"""
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+
+from app.config import settings
+from app.services.challenge_matcher import (
+    CHALLENGE_MAPPINGS,
+    MAX_PRECOMPUTED_CHALLENGES,
+    active_catalog,
+    reset_catalog,
+    set_catalog,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Urgency for challenges the built-in mappings don't know
+DEFAULT_URGENCY = "medium"
+
+
+def build_mappings(templates: List[Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Group active templates by the challenges they solve.
+
+    Each challenge's templates are ordered most used (then most successful)
+    first; the first is the primary template, whose category, price and
+    hours the challenge is quoted with.
+
+    Args:
+        templates: Rows with the WorkflowTemplate matching/pricing columns
+
+    Returns:
+        Challenge -> config, in the shape of CHALLENGE_MAPPINGS plus
+        'estimated_hours' and 'description'
+    """
+    by_challenge: Dict[str, List[Any]] = {}
+    for template in templates:
+        for challenge in template.challenges or []:
+            by_challenge.setdefault(challenge, []).append(template)
+
+    mappings = {}
+    for challenge, candidates in by_challenge.items():
+        candidates.sort(key=lambda t: (-(t.usage_count or 0), -float(t.success_rate or 0), t.name))
+        primary = candidates[0]
+        builtin = CHALLENGE_MAPPINGS.get(challenge, {})
+
+        if primary.base_price is not None:
+            base_price = float(primary.base_price)
+        else:
+            base_price = settings.TEMPLATE_TIER_PRICES.get(primary.pricing_tier, builtin.get("base_price", 0))
+
+        mappings[challenge] = {
+            "templates": [t.slug or t.name for t in candidates],
+            # What free-text challenges and notes are matched against
+            "description": " ".join(
+                f"{t.name} {t.description} {' '.join(t.tags or [])}" for t in candidates
+            ),
+            "category": primary.category,
+            "urgency": builtin.get("urgency", DEFAULT_URGENCY),
+            "base_price": base_price,
+            "estimated_hours": float(primary.estimated_hours),
+        }
+
+    return mappings
+
+
+class TemplateCatalog:
+    """Loads the active templates and reloads them when they change."""
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.loaded_at: Optional[datetime] = None
+        self._changed = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def current_version(self, db_session) -> str:
+        """Cheap fingerprint of the table: template count and latest update."""
+        from sqlalchemy import select, func
+        from app.models.workflow_template import WorkflowTemplate
+
+        count, updated_at = (await db_session.execute(
+            select(func.count(WorkflowTemplate.id), func.max(WorkflowTemplate.updated_at))
+        )).one()
+        return f"{count}:{updated_at.isoformat() if updated_at else '-'}"
+
+    async def load(self, db_session, version: Optional[str] = None) -> None:
+        """
+        Load the active templates and swap them in for matching.
+
+        Args:
+            db_session: Database session
+            version: Version being loaded (read from the table if not given)
+        """
+        from sqlalchemy import select
+        from app.models.workflow_template import WorkflowTemplate
+
+        if version is None:
+            version = await self.current_version(db_session)
+
+        # Only the columns matching needs - not the workflow JSON
+        rows = (await db_session.execute(
+            select(
+                WorkflowTemplate.name, WorkflowTemplate.slug, WorkflowTemplate.description,
+                WorkflowTemplate.tags, WorkflowTemplate.category,
+                WorkflowTemplate.challenges, WorkflowTemplate.estimated_hours,
+                WorkflowTemplate.pricing_tier, WorkflowTemplate.base_price,
+                WorkflowTemplate.usage_count, WorkflowTemplate.success_rate
+            ).where(WorkflowTemplate.is_active.is_(True))
+        )).all()
+
+        mappings = build_mappings(rows)
+        if mappings:
+            index = await asyncio.to_thread(set_catalog, mappings, version)
+            logger.info(
+                f"Loaded template catalog {version}: {len(rows)} templates "
+                f"for {len(index.mappings)} challenges"
+            )
+        else:
+            reset_catalog()
+            logger.info("No active workflow templates, matching with built-in mappings")
+
+        self.version = version
+        self.loaded_at = datetime.utcnow()
+
+    async def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the catalog if its version changed (or if forced).
+
+        Returns:
+            Whether the catalog was reloaded
+        """
+        from app.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            version = await self.current_version(db)
+            if not force and version == self.version:
+                return False
+            await self.load(db, version)
+        return True
+
+    def notify_changed(self) -> None:
+        """Reload the catalog as soon as possible."""
+        self._changed.set()
+
+    async def _refresh_loop(self, interval: int) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=interval or None)
+            except asyncio.TimeoutError:
+                pass
+
+            notified = self._changed.is_set()
+            self._changed.clear()
+            try:
+                await self.refresh(force=notified)
+            except Exception as e:
+                logger.error(f"Failed to refresh template catalog: {e}")
+
+    async def _listen(self, channel: str) -> None:
+        from app.database import engine
+
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    listener = raw.driver_connection
+                    closed = asyncio.get_running_loop().create_future()
+
+                    await listener.add_listener(channel, lambda *args: self.notify_changed())
+                    listener.add_termination_listener(
+                        lambda *args: closed.done() or closed.set_result(None)
+                    )
+                    logger.info(f"Listening for template changes on '{channel}'")
+
+                    # Catch changes made while (re)connecting
+                    self.notify_changed()
+                    await closed
+                logger.warning("Template change listener disconnected, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Template change listener failed: {e}")
+            await asyncio.sleep(settings.TEMPLATE_CATALOG_REFRESH_INTERVAL or 60)
+
+    def start(self) -> None:
+        """Start the refresh loop and the NOTIFY listener (as configured)."""
+        if self._tasks:
+            return
+
+        interval = settings.TEMPLATE_CATALOG_REFRESH_INTERVAL
+        channel = settings.TEMPLATE_CATALOG_CHANNEL
+        if interval or channel:
+            self._tasks.append(asyncio.create_task(self._refresh_loop(interval)))
+        if channel:
+            self._tasks.append(asyncio.create_task(self._listen(channel)))
+
+    async def stop(self) -> None:
+        """Stop the refresh loop and listener."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Loaded catalog version, for monitoring."""
+        index = active_catalog()
+        return {
+            "version": index.version,
+            "source": "builtin" if index.version == "builtin" else "database",
+            "loadedAt": self.loaded_at,
+            "challenges": len(index.mappings),
+            "templates": len({slug for config in index.mappings.values() for slug in config["templates"]}),
+            "precomputed": len(index.mappings) <= MAX_PRECOMPUTED_CHALLENGES,
+        }
+
+
+# Global instance
+template_catalog = TemplateCatalog()
@@ -0,0 +1,247 @@
+"""
+Token Counter - Tokenizer-based token counts and context-window sizing.
+
+Tokenizers are loaded once per model family and cached:
+
+- local models: the Hugging Face tokenizer configured for the model's
+  family in TOKENIZER_FAMILIES (hub repo or path to a tokenizer.json),
+- Claude: the tokenizer bundled with the anthropic SDK (it predates
+  Claude 3, so its counts are treated as approximate).
+
+Gemini has no local tokenizer; its responses report usage themselves.
+Anything without a loaded tokenizer falls back to ~4 characters per token,
+and the counts are then treated as approximate when sizing requests.
+
+Tokenizers are loaded by load() (run in a thread at startup), never on the
+request path, so counting never blocks on a download.
+"""
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import asyncio
+import logging
+import math
+import re
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Fallback when no tokenizer is loaded for a model's family
+CHARS_PER_TOKEN = 4
+
+# Chat template tokens (role markers, turn separators) added per message
+MESSAGE_OVERHEAD_TOKENS = 8
+
+# Local model name patterns -> family (models in a family share a tokenizer)
+MODEL_FAMILY_PATTERNS = [
+    (re.compile(r"qwen-?2"), "qwen2"),
+    (re.compile(r"llama-?3"), "llama3"),
+    (re.compile(r"gemma-?2"), "gemma2"),
+    (re.compile(r"mistral|mixtral"), "mistral"),
+]
+
+# Families whose tokenizer only approximates the model's
+APPROXIMATE_FAMILIES = {"claude"}
+
+# Cached (family, text) counts; agent system prompts repeat on every request
+COUNT_CACHE_SIZE = 256
+
+
+class ContextWindowExceededError(ValueError):
+    """Raised when a prompt leaves no room for output in the model's context window."""
+    pass
+
+
+def model_family(provider: str, model: str) -> Optional[str]:
+    """Tokenizer family for a model, or None if unknown."""
+    if provider == "anthropic":
+        return "claude"
+    if provider == "gemini":
+        return "gemini"
+
+    name = model.lower()
+    for pattern, family in MODEL_FAMILY_PATTERNS:
+        if pattern.search(name):
+            return family
+    return None
+
+
+def context_window(provider: str, model: str) -> int:
+    """Context window in tokens (MODEL_CONTEXT_WINDOWS, else the provider default)."""
+    if model in settings.MODEL_CONTEXT_WINDOWS:
+        return settings.MODEL_CONTEXT_WINDOWS[model]
+    if provider == "local":
+        return settings.LOCAL_LLM_CONTEXT_WINDOW
+    return settings.MODEL_CONTEXT_WINDOWS.get(provider, settings.LOCAL_LLM_CONTEXT_WINDOW)
+
+
+def estimate_count(text: str) -> int:
+    """Approximate token count (~4 characters per token)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class TokenCounter:
+    """Counts tokens with cached per-family tokenizers."""
+
+    def __init__(self):
+        self._tokenizers: Dict[str, Any] = {}
+        self._counts: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_exact(self, provider: str, model: str) -> bool:
+        """Whether counts for this model come from its own tokenizer."""
+        family = model_family(provider, model)
+        return self._tokenizers.get(family) is not None and family not in APPROXIMATE_FAMILIES
+
+    def count(self, text: str, provider: str, model: str) -> int:
+        """
+        Count the tokens in a piece of text.
+
+        Args:
+            text: Text to count
+            provider: "local", "anthropic" or "gemini"
+            model: Model name
+
+        Returns:
+            Token count (approximate if no tokenizer is loaded for the model)
+        """
+        if not text:
+            return 0
+
+        family = model_family(provider, model)
+        if self._tokenizers.get(family) is None:
+            return estimate_count(text)
+        return self._count_cached(family, text)
+
+    def _count_cached(self, family: str, text: str) -> int:
+        key = (family, text)
+        if key in self._counts:
+            self._counts.move_to_end(key)
+            return self._counts[key]
+
+        count = len(self._tokenizers[family].encode(text, add_special_tokens=False).ids)
+        self._counts[key] = count
+        if len(self._counts) > COUNT_CACHE_SIZE:
+            self._counts.popitem(last=False)
+        return count
+
+    def fit_max_tokens(
+        self,
+        prompt: str,
+        provider: str,
+        model: str,
+        max_tokens: int,
+        system: Optional[str] = None
+    ) -> int:
+        """
+        Cap max_tokens so prompt plus output fit the model's context window.
+
+        Approximate prompt counts get TOKEN_COUNT_SAFETY_MARGIN added first.
+
+        Returns:
+            max_tokens, reduced if the window is too small for all of it
+
+        Raises:
+            ContextWindowExceededError: If fewer than MIN_OUTPUT_TOKENS would remain
+        """
+        prompt_tokens = self.count(prompt, provider, model) + MESSAGE_OVERHEAD_TOKENS
+        if system:
+            prompt_tokens += self.count(system, provider, model) + MESSAGE_OVERHEAD_TOKENS
+
+        if not self.is_exact(provider, model):
+            prompt_tokens = math.ceil(prompt_tokens * (1 + settings.TOKEN_COUNT_SAFETY_MARGIN))
+
+        window = context_window(provider, model)
+        available = window - prompt_tokens
+        if available < min(max_tokens, settings.MIN_OUTPUT_TOKENS):
+            raise ContextWindowExceededError(
+                f"Prompt of ~{prompt_tokens} tokens leaves {max(0, available)} of "
+                f"{window} for output on {model}"
+            )
+
+        if available < max_tokens:
+            logger.info(f"Reducing max_tokens from {max_tokens} to {available} to fit {model} context window")
+            return available
+        return max_tokens
+
+    def complete_usage(
+        self,
+        usage: Dict[str, Any],
+        provider: str,
+        model: str,
+        prompt: str,
+        text: str,
+        system: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Fill in prompt/completion counts a backend did not report.
+
+        Returns:
+            The usage dict, with 'prompt_tokens', 'completion_tokens' and
+            'total_tokens' set
+        """
+        if not usage.get("prompt_tokens"):
+            usage["prompt_tokens"] = self.count(prompt, provider, model) + self.count(system or "", provider, model)
+        if not usage.get("completion_tokens"):
+            usage["completion_tokens"] = self.count(text, provider, model)
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return usage
+
+    def load(self) -> None:
+        """Load the tokenizers for the configured models (blocking; may download)."""
+        from app.services.model_tiering import PROVIDER_TIER_MODELS
+
+        families = set()
+        for provider, tiers in PROVIDER_TIER_MODELS.items():
+            for attr in tiers.values():
+                family = model_family(provider, getattr(settings, attr))
+                if family and family != "gemini":
+                    families.add(family)
+
+        for family in sorted(families):
+            if family not in self._tokenizers:
+                self._tokenizers[family] = self._load_tokenizer(family)
+
+    def _load_tokenizer(self, family: str) -> Optional[Any]:
+        try:
+            if family == "claude":
+                from anthropic import Anthropic
+                return Anthropic(api_key=settings.ANTHROPIC_API_KEY or "unused").get_tokenizer()
+
+            source = settings.TOKENIZER_FAMILIES.get(family)
+            if not source:
+                return None
+
+            from tokenizers import Tokenizer
+            if source.endswith(".json"):
+                return Tokenizer.from_file(source)
+            return Tokenizer.from_pretrained(source)
+
+        except Exception as e:
+            logger.warning(f"Could not load {family} tokenizer, estimating token counts: {e}")
+            return None
+
+    async def _load_in_background(self) -> None:
+        await asyncio.to_thread(self.load)
+        # Drop counts made with earlier tokenizers (on the event loop, where
+        # counting happens, not in the loading thread)
+        self._counts.clear()
+        loaded = sorted(family for family, tokenizer in self._tokenizers.items() if tokenizer is not None)
+        logger.info(f"Loaded tokenizers: {', '.join(loaded) or 'none'}")
+
+    def start(self) -> None:
+        """Load tokenizers in a worker thread; counts are estimated until then."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._load_in_background())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Loaded tokenizer families, for monitoring."""
+        return {
+            "families": {family: tokenizer is not None for family, tokenizer in self._tokenizers.items()},
+            "localContextWindow": settings.LOCAL_LLM_CONTEXT_WINDOW,
+        }
+
+
+# Global instance
+token_counter = TokenCounter()
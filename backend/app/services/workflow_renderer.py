@@ -0,0 +1,262 @@
+"""
+Workflow Renderer - Builds a project's n8n workflows from workflow templates.
+
+Template workflow JSON marks project-specific values with placeholders:
+
+    {"parameters": {"subject": "New enquiry for [[business_name]]",
+                    "sources": "[[enquiry_sources]]"}}
+
+A placeholder inside a string is replaced by the parameter's text (lists
+are joined with ", "); a string that is only a placeholder is replaced by
+the parameter value itself, so lists stay lists. Parameters are listed in
+PROJECT_PARAMETERS; unknown or empty ones are left in place and reported.
+
+Each template is compiled once into a substitution plan - its JSON text
+split at the placeholders - cached per template version, so rendering is a
+string join and one json.loads. Matched templates without a database
+template are returned as gaps for the workflow agent to design.
+"""
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Union
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+# Placeholder parameters, from the project's intake fields
+PROJECT_PARAMETERS = [
+    "business_name",
+    "client_name",
+    "client_email",
+    "client_phone",
+    "team_size",
+    "enquiry_sources",
+    "admin_method",
+]
+
+# Compiled plans kept (templates x versions)
+MAX_CACHED_PLANS = 256
+
+# A whole JSON string value that is one placeholder, or a placeholder
+# within a string (object keys are always substituted as text)
+_PLACEHOLDER = re.compile(r'"\[\[(\w+)\]\]"(?!\s*:)|\[\[(\w+)\]\]')
+
+# n8n node types that are plumbing rather than an integration
+CORE_NODE_TYPES = {
+    "code", "function", "functionItem", "if", "merge", "noOp", "set",
+    "splitInBatches", "switch", "wait", "itemLists", "dateTime",
+}
+
+
+def project_parameters(project) -> Dict[str, Any]:
+    """Placeholder values for a project."""
+    return {name: getattr(project, name, None) for name in PROJECT_PARAMETERS}
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(item) for item in value)
+    return str(value)
+
+
+class CompiledTemplate:
+    """A template's workflow JSON, split at its placeholders."""
+
+    def __init__(self, workflow_json: Dict[str, Any]):
+        """
+        Compile the substitution plan.
+
+        Args:
+            workflow_json: Template workflow (n8n JSON)
+        """
+        text = json.dumps(workflow_json, ensure_ascii=False)
+        # Literal JSON text, or (parameter, whole string, placeholder text)
+        self._parts: List[Union[str, Tuple[str, bool, str]]] = []
+        position = 0
+
+        for match in _PLACEHOLDER.finditer(text):
+            self._parts.append(text[position:match.start()])
+            whole = match.group(1) is not None
+            self._parts.append((match.group(1) or match.group(2), whole, match.group(0)))
+            position = match.end()
+        self._parts.append(text[position:])
+
+        self.parameters = sorted({part[0] for part in self._parts if isinstance(part, tuple)})
+
+    def render(self, parameters: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Substitute parameters into the workflow.
+
+        Returns:
+            (workflow JSON, parameters left unfilled)
+        """
+        chunks = []
+        missing = []
+        for part in self._parts:
+            if isinstance(part, str):
+                chunks.append(part)
+                continue
+
+            name, whole, placeholder = part
+            value = parameters.get(name)
+            if value is None or value == "" or value == []:
+                chunks.append(placeholder)
+                if name not in missing:
+                    missing.append(name)
+            elif whole:
+                chunks.append(json.dumps(value, ensure_ascii=False))
+            else:
+                # Escaped for the surrounding JSON string, without its quotes
+                chunks.append(json.dumps(_as_text(value), ensure_ascii=False)[1:-1])
+
+        return json.loads("".join(chunks)), missing
+
+
+def _integration_name(node_type: str) -> Optional[str]:
+    name = node_type.rsplit(".", 1)[-1]
+    if name in CORE_NODE_TYPES:
+        return None
+    name = re.sub(r"Trigger$", "", name)
+    return re.sub(r"(?<!^)(?=[A-Z])", " ", name[:1].upper() + name[1:])
+
+
+def describe_workflow(template, workflow: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Summarise a rendered workflow in the workflow agent's output format.
+
+    Args:
+        template: WorkflowTemplate the workflow was rendered from
+        workflow: Rendered n8n JSON
+
+    Returns:
+        Workflow specification (name, purpose, trigger, steps, integrations)
+    """
+    nodes = workflow.get("nodes", [])
+    triggers = [n for n in nodes if re.search(r"trigger|webhook", n.get("type", ""), re.IGNORECASE)]
+    trigger = triggers[0] if triggers else (nodes[0] if nodes else None)
+    steps = [n for n in nodes if n is not trigger]
+
+    integrations = []
+    for node in nodes:
+        name = _integration_name(node.get("type", ""))
+        if name and name not in integrations:
+            integrations.append(name)
+
+    return {
+        "name": template.name,
+        "purpose": template.description,
+        "trigger": trigger.get("name", "") if trigger else "",
+        "steps": [f"{i}. {node.get('name', '')}" for i, node in enumerate(steps, 1)],
+        "integrations": integrations,
+        "estimated_build_time": f"{float(template.estimated_hours):g} hours",
+        "template_slug": template.slug or template.name,
+        "source": "template",
+    }
+
+
+class WorkflowRenderer:
+    """Renders matched templates into ProjectWorkflow rows."""
+
+    def __init__(self, max_plans: int = MAX_CACHED_PLANS):
+        self.max_plans = max_plans
+        self._plans: "OrderedDict[Tuple[str, str], CompiledTemplate]" = OrderedDict()
+        self.compiled = 0
+
+    def plan_for(self, template) -> CompiledTemplate:
+        """Compiled plan for a template (cached until the template changes)."""
+        key = (str(template.id), str(template.updated_at))
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            return plan
+
+        plan = self._plans[key] = CompiledTemplate(template.n8n_workflow_json)
+        self.compiled += 1
+        if len(self._plans) > self.max_plans:
+            self._plans.popitem(last=False)
+        return plan
+
+    async def render_for_project(
+        self,
+        db_session,
+        project,
+        matched_templates: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Render each matched template that has an active database template.
+
+        The project's draft workflows are replaced; approved or deployed ones
+        are kept, and no new draft is added for their templates. Changes are
+        flushed, not committed: the caller commits them (the workflow agent
+        does so with its output).
+
+        Args:
+            db_session: Database session
+            project: Project instance
+            matched_templates: Matched templates from the project's match result
+
+        Returns:
+            Dict with 'workflows' (specifications of the rendered workflows)
+            and 'gaps' (matched templates with no database template)
+        """
+        from sqlalchemy import select, delete, or_
+        from app.models.workflow_template import WorkflowTemplate
+        from app.models.project_workflow import ProjectWorkflow
+
+        slugs = [t["template_slug"] for t in matched_templates if t.get("template_slug")]
+        templates = {}
+        if slugs:
+            rows = (await db_session.execute(
+                select(WorkflowTemplate).where(
+                    WorkflowTemplate.is_active.is_(True),
+                    or_(WorkflowTemplate.slug.in_(slugs), WorkflowTemplate.name.in_(slugs))
+                )
+            )).scalars().all()
+            for row in rows:
+                templates.setdefault(row.slug or row.name, row)
+                templates.setdefault(row.name, row)
+
+        await db_session.execute(
+            delete(ProjectWorkflow).where(
+                ProjectWorkflow.project_id == project.id,
+                ProjectWorkflow.status == "draft"
+            )
+        )
+        kept = set((await db_session.execute(
+            select(ProjectWorkflow.template_id).where(ProjectWorkflow.project_id == project.id)
+        )).scalars().all())
+
+        parameters = project_parameters(project)
+        workflows, gaps = [], []
+
+        for matched in matched_templates:
+            template = templates.get(matched.get("template_slug"))
+            if template is None:
+                gaps.append(matched)
+                continue
+
+            rendered, missing = self.plan_for(template).render(parameters)
+            if missing:
+                logger.info(f"{template.name} rendered for project {project.id} without {', '.join(missing)}")
+
+            if template.id not in kept:
+                db_session.add(ProjectWorkflow(
+                    project_id=project.id,
+                    template_id=template.id,
+                    customized_workflow_json=rendered,
+                    workflow_name=f"{project.business_name} - {template.name}"
+                ))
+            workflows.append(describe_workflow(template, rendered))
+
+        await db_session.flush()
+        return {"workflows": workflows, "gaps": gaps}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plan cache size, for monitoring."""
+        return {"cachedPlans": len(self._plans), "compiled": self.compiled}
+
+
+# Global instance
+workflow_renderer = WorkflowRenderer()
@@ -0,0 +1,323 @@
+"""
+JSON extraction and repair for LLM responses.
+
+Pulls the first balanced JSON object out of a model response in a single
+pass, tolerating prose or markdown fences around it, and repairs output cut
+off at max_tokens by closing open strings, arrays and objects. The same
+scanner drives IncrementalJSONParser, which consumes a streamed response
+chunk by chunk without rescanning what it has already seen.
+
+Well-formed objects are decoded directly from the first brace; the scanner
+only runs for prose containing stray braces or truncated output, and jumps
+between structural characters with a compiled regex so long runs of plain
+text are skipped at C speed.
+"""
+from typing import Any, Dict, List, Optional
+import json
+import re
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON object can be recovered from a response."""
+    pass
+
+
+# Characters that change scanner state outside and inside strings
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRUCTURAL_OR_COMMA = re.compile(r'[{}\[\]",]')
+_IN_STRING = re.compile(r'["\\]')
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+_DECODER = json.JSONDecoder()
+
+# Repair gives up after trimming back this many trailing values
+_MAX_REPAIR_ATTEMPTS = 32
+
+
+class _Scanner:
+    """
+    Incremental bracket/string state machine over a growing buffer.
+
+    Tracks where the first object starts, the stack of open brackets and
+    whether the cursor is inside a string. When `track_boundaries` is set it
+    also records the positions of commas and openers, which repair uses to
+    trim back to the last complete value.
+    """
+
+    __slots__ = ("start", "end", "pos", "stack", "in_string", "boundaries", "track_boundaries")
+
+    def __init__(self, track_boundaries: bool = False):
+        self.start = -1
+        self.end = -1
+        self.pos = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.boundaries: List[int] = []
+        self.track_boundaries = track_boundaries
+
+    @property
+    def complete(self) -> bool:
+        return self.end >= 0
+
+    def scan(self, text: str) -> None:
+        """Advance over text[self.pos:], stopping when the object closes."""
+        pos = self.pos
+        length = len(text)
+
+        # Skip leading prose up to the first object
+        if self.start < 0:
+            start = text.find("{", pos)
+            if start < 0:
+                self.pos = length
+                return
+            self.start = start
+            self.stack.append("{")
+            if self.track_boundaries:
+                self.boundaries.append(start)
+            pos = start + 1
+
+        while pos < length:
+            if self.in_string:
+                match = _IN_STRING.search(text, pos)
+                if match is None:
+                    pos = length
+                    break
+                if match.group() == "\\":
+                    if match.end() >= length:
+                        # Escape split across chunks: resume at the backslash
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self.in_string = False
+                pos = match.end()
+                continue
+
+            pattern = _STRUCTURAL_OR_COMMA if self.track_boundaries else _STRUCTURAL
+            match = pattern.search(text, pos)
+            if match is None:
+                pos = length
+                break
+
+            char = match.group()
+            pos = match.end()
+
+            if char == '"':
+                self.in_string = True
+            elif char == ",":
+                self.boundaries.append(match.start())
+            elif char in "{[":
+                self.stack.append(char)
+                if self.track_boundaries:
+                    self.boundaries.append(match.start())
+            else:
+                if self.stack and _CLOSERS[self.stack[-1]] == char:
+                    self.stack.pop()
+                if not self.stack:
+                    self.end = pos
+                    break
+
+        self.pos = pos
+
+
+def _close(fragment: str) -> str:
+    """Close an unterminated fragment: end the open string and brackets."""
+    scanner = _Scanner()
+    scanner.scan(fragment)
+
+    text = fragment
+    if scanner.in_string:
+        if text.endswith("\\"):
+            text = text[:-1]
+        text += '"'
+
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+
+    return text + "".join(_CLOSERS[opener] for opener in reversed(scanner.stack))
+
+
+def repair_json(fragment: str) -> Any:
+    """
+    Parse a truncated JSON object, dropping any trailing incomplete value.
+
+    Args:
+        fragment: Text starting at the object's opening brace
+
+    Returns:
+        Parsed value
+
+    Raises:
+        JSONExtractionError: If nothing parseable remains
+    """
+    scanner = _Scanner(track_boundaries=True)
+    scanner.scan(fragment)
+    boundaries = scanner.boundaries
+
+    candidate = fragment
+    for _ in range(_MAX_REPAIR_ATTEMPTS):
+        try:
+            return json.loads(_close(candidate))
+        except ValueError:
+            pass
+
+        # Trim back to the previous comma (dropping it) or opener (keeping it)
+        while boundaries and boundaries[-1] >= len(candidate):
+            boundaries.pop()
+        if not boundaries:
+            break
+        cut = boundaries.pop()
+        candidate = candidate[:cut] if candidate[cut] == "," else candidate[:cut + 1]
+
+    raise JSONExtractionError("Could not repair truncated JSON")
+
+
+def extract_json(text: str, repair: bool = True) -> Any:
+    """
+    Extract the first JSON object from an LLM response.
+
+    Handles bare JSON, JSON inside ```json fences, and JSON surrounded by
+    prose, in one pass over the text.
+
+    Args:
+        text: Model response
+        repair: Recover objects truncated at max_tokens
+
+    Returns:
+        Parsed object
+
+    Raises:
+        JSONExtractionError: If no object can be recovered
+    """
+    start = text.find("{")
+    if start < 0:
+        raise JSONExtractionError("No JSON object found in response")
+
+    while start >= 0:
+        # Fast path: a well-formed object decodes in C, and raw_decode
+        # ignores whatever follows it
+        try:
+            value, _ = _DECODER.raw_decode(text, start)
+            return value
+        except ValueError:
+            pass
+
+        scanner = _Scanner()
+        scanner.pos = start
+        scanner.scan(text)
+
+        if not scanner.complete:
+            break
+
+        # Balanced but not JSON (e.g. "{name}" in prose): try the next brace
+        start = text.find("{", start + 1)
+
+    if start < 0:
+        raise JSONExtractionError("No valid JSON object found in response")
+
+    if not repair:
+        raise JSONExtractionError("JSON object in response is truncated")
+
+    fragment = text[start:].rstrip()
+    if fragment.endswith("```"):
+        fragment = fragment[:-3]
+    return repair_json(fragment)
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object from a streamed response as chunks arrive.
+
+    Each feed() only scans the new text. `complete` turns true as soon as the
+    object closes, so a caller can stop reading (or cancel generation) at
+    that point; partial() returns the repaired object parsed so far.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._scanner = _Scanner()
+
+    @property
+    def complete(self) -> bool:
+        return self._scanner.complete
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Add a chunk of the response.
+
+        Returns:
+            True once the object is complete
+        """
+        if not self._scanner.complete:
+            self._text += chunk
+            self._scanner.scan(self._text)
+        return self._scanner.complete
+
+    def result(self) -> Any:
+        """The complete object, or the repaired prefix if the stream was cut short."""
+        if self._scanner.complete:
+            try:
+                return json.loads(self._text[self._scanner.start:self._scanner.end])
+            except ValueError as e:
+                raise JSONExtractionError(f"Invalid JSON object in response: {e}")
+        return extract_json(self._text, repair=True)
+
+    def partial(self) -> Optional[Any]:
+        """Best-effort parse of what has arrived so far (None if nothing yet)."""
+        if self._scanner.start < 0:
+            return None
+        try:
+            return self.result()
+        except JSONExtractionError:
+            return None
+
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def validate_json(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Validate a value against the JSON Schema subset used by agent schemas
+    (type, properties, required, items, enum, minimum, maximum).
+
+    Returns:
+        List of error messages (empty if valid)
+    """
+    errors = []
+
+    expected = schema.get("type")
+    if expected and not _TYPE_CHECKS[expected](value):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} not in {schema['enum']}")
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if "minimum" in schema and value < schema["minimum"]:
+            errors.append(f"{path}: {value} < minimum {schema['minimum']}")
+        if "maximum" in schema and value > schema["maximum"]:
+            errors.append(f"{path}: {value} > maximum {schema['maximum']}")
+
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing required property '{key}'")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate_json(value[key], subschema, f"{path}.{key}"))
+
+    if isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate_json(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
@@ -0,0 +1,182 @@
+"""
+Keyword Scanner - Weighted keyword and phrase matching over free text.
+
+A KeywordScanner is built once from groups of weighted terms and then
+scores any number of texts:
+
+    scanner = KeywordScanner({
+        "urgency": {"terms": {"urgent": 3, "asap": 3}, "max_points": 10},
+        "growth": {"terms": {"scale up": 5, "hire": 2}, "word_boundary": True},
+    })
+    scanner.score("We need to scale up ASAP")  # {"urgency": 3, "growth": 5}
+
+Text is lowercased once. Plain terms match anywhere, like `term in text`.
+Terms with word_boundary only match whole words. Multi-word phrases allow
+any whitespace between their words.
+
+Plain terms are located with str.find: CPython's substring search is
+vectorised, so a handful of them is cheaper than any regex pass even on
+long text. Word-boundary terms and phrases are compiled into one
+alternation regex, so all of them are found in a single pass however many
+are configured.
+"""
+from typing import Dict, Any, List, NamedTuple, Optional
+import re
+
+
+class KeywordTerm(NamedTuple):
+    """A configured term."""
+    text: str
+    group: str
+    weight: float
+    word_boundary: bool
+
+
+class KeywordMatch(NamedTuple):
+    """First occurrence of a term in a text."""
+    term: str
+    group: str
+    weight: float
+    start: int
+    end: int
+
+
+def _term_pattern(text: str, word_boundary: bool) -> str:
+    pattern = r"\s+".join(re.escape(word) for word in text.split())
+    return rf"\b{pattern}\b" if word_boundary else pattern
+
+
+class KeywordScanner:
+    """Finds weighted terms from several groups in a text."""
+
+    def __init__(self, groups: Dict[str, Dict[str, Any]]):
+        """
+        Compile the scanner.
+
+        Args:
+            groups: Group name -> {
+                        "terms": {term: weight, or term: {"weight": w, "word_boundary": b}},
+                        "max_points": cap on the group's score (optional),
+                        "word_boundary": default for the group's terms (default False)
+                    }
+        """
+        self.max_points: Dict[str, Optional[float]] = {}
+        self.terms: List[KeywordTerm] = []
+
+        for group, config in groups.items():
+            self.max_points[group] = config.get("max_points")
+            default_boundary = config.get("word_boundary", False)
+
+            for text, spec in config["terms"].items():
+                if isinstance(spec, dict):
+                    weight = spec.get("weight", 1)
+                    word_boundary = spec.get("word_boundary", default_boundary)
+                else:
+                    weight, word_boundary = spec, default_boundary
+
+                text = " ".join(text.lower().split())
+                # A phrase matches across any whitespace, so it needs the regex
+                word_boundary = word_boundary or " " in text
+                self.terms.append(KeywordTerm(text, group, weight, word_boundary))
+
+        self._plain = [i for i, term in enumerate(self.terms) if not term.word_boundary]
+        # Flattened for score(), which runs once per note
+        self._plain_scoring = [(self.terms[i].text, self.terms[i].group, self.terms[i].weight) for i in self._plain]
+        self._caps = [(group, cap) for group, cap in self.max_points.items() if cap is not None]
+        self._regex_terms = [i for i, term in enumerate(self.terms) if term.word_boundary]
+        self._regex: Optional[re.Pattern] = None
+        self._patterns: Dict[int, re.Pattern] = {}
+        self._shadowed: Dict[int, List[int]] = {}
+
+        if self._regex_terms:
+            # Longest first, so the longer of two terms starting at the same
+            # position wins; the shorter is then checked via _shadowed
+            ordered = sorted(self._regex_terms, key=lambda i: len(self.terms[i].text), reverse=True)
+            alternation = "|".join(
+                f"(?P<t{i}>{_term_pattern(self.terms[i].text, True)})" for i in ordered
+            )
+            # Zero-width lookahead reports a match at every position, so terms
+            # that overlap each other are all found
+            self._regex = re.compile(f"(?=(?:{alternation}))")
+
+            for i in self._regex_terms:
+                self._patterns[i] = re.compile(_term_pattern(self.terms[i].text, True))
+                self._shadowed[i] = [
+                    j for j in self._regex_terms
+                    if j != i and self.terms[i].text.startswith(self.terms[j].text)
+                ]
+
+    def scan(self, text: Optional[str]) -> List[KeywordMatch]:
+        """
+        Find every configured term that occurs in the text.
+
+        Returns:
+            One KeywordMatch per term found (its first occurrence), in
+            configuration order
+        """
+        if not text:
+            return []
+
+        lower = text.lower()
+        found: Dict[int, KeywordMatch] = {}
+
+        for i in self._plain:
+            term = self.terms[i]
+            start = lower.find(term.text)
+            if start >= 0:
+                found[i] = KeywordMatch(term.text, term.group, term.weight, start, start + len(term.text))
+
+        if self._regex is not None and len(found) < len(self.terms):
+            for match in self._regex.finditer(lower):
+                i = int(match.lastgroup[1:])
+                self._record(found, i, match.start(), match.end(match.lastgroup))
+
+                for j in self._shadowed[i]:
+                    if j not in found:
+                        shorter = self._patterns[j].match(lower, match.start())
+                        if shorter:
+                            self._record(found, j, shorter.start(), shorter.end())
+
+        return [found[i] for i in sorted(found)]
+
+    def _record(self, found: Dict[int, KeywordMatch], i: int, start: int, end: int) -> None:
+        if i not in found:
+            term = self.terms[i]
+            found[i] = KeywordMatch(term.text, term.group, term.weight, start, end)
+
+    def score(self, text: Optional[str]) -> Dict[str, float]:
+        """
+        Score a text: per group, the summed weights of the distinct terms
+        found, capped at the group's max_points.
+
+        Returns:
+            Group name -> points (every group is present)
+        """
+        points = dict.fromkeys(self.max_points, 0)
+        if not text:
+            return points
+
+        lower = text.lower()
+        for term_text, group, weight in self._plain_scoring:
+            if term_text in lower:
+                points[group] += weight
+
+        if self._regex is not None:
+            for i in self._regex_matches(lower):
+                term = self.terms[i]
+                points[term.group] += term.weight
+
+        for group, cap in self._caps:
+            if points[group] > cap:
+                points[group] = cap
+        return points
+
+    def _regex_matches(self, lower: str) -> List[int]:
+        found = set()
+        for match in self._regex.finditer(lower):
+            i = int(match.lastgroup[1:])
+            found.add(i)
+            for j in self._shadowed[i]:
+                if j not in found and self._patterns[j].match(lower, match.start()):
+                    found.add(j)
+        return sorted(found)
@@ -0,0 +1,172 @@
+"""
+Similarity Index - Offline cosine-similarity search over short texts.
+
+Documents and queries are embedded as hashed TF-IDF vectors: word
+unigrams plus character trigrams of each word (so "enquiry" still matches
+"enquiries"), hashed into n_features buckets with CRC32 - stable across
+processes, unlike hash(). Term frequencies are log-scaled, weighted by IDF
+over the documents and L2-normalised, so a dot product is the cosine
+similarity.
+
+Document vectors are computed once, when the index is built. A query is
+vectorised into its few non-zero features and scored against every
+document with one gather and one matrix-vector product.
+
+    index = SimilarityIndex({"quotes": "Quotes take too long to send", ...})
+    index.search("it takes ages to get a quote out", k=1)  # [("quotes", 0.44)]
+"""
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import math
+import re
+import zlib
+
+import numpy as np
+
+
+DEFAULT_N_FEATURES = 1 << 12
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Too common in challenge wording to tell documents apart
+STOP_WORDS = frozenset(
+    "a an and are as at be but by do for from have i in is it me my of on or so "
+    "that the their them they this to too up us was we what with our you your".split()
+)
+
+
+@lru_cache(maxsize=8192)
+def _word_features(word: str, n_features: int) -> Tuple[int, ...]:
+    padded = f"<{word}>"
+    features = [f"w:{word}"] + [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return tuple(zlib.crc32(feature.encode()) % n_features for feature in features)
+
+
+def hashed_counts(text: str, n_features: int = DEFAULT_N_FEATURES) -> Dict[int, int]:
+    """Feature bucket -> count for a text."""
+    counts: Dict[int, int] = {}
+    for word in _WORD.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        for feature in _word_features(word, n_features):
+            counts[feature] = counts.get(feature, 0) + 1
+    return counts
+
+
+class SimilarityIndex:
+    """Cosine-similarity search over a fixed set of documents."""
+
+    def __init__(self, documents: Dict[str, str], n_features: int = DEFAULT_N_FEATURES):
+        """
+        Vectorise the documents.
+
+        Args:
+            documents: Key -> text
+            n_features: Hash buckets (vector dimension)
+        """
+        self.keys = list(documents)
+        self.n_features = n_features
+
+        counts = [hashed_counts(text, n_features) for text in documents.values()]
+
+        df = np.zeros(n_features, dtype=np.float32)
+        for doc in counts:
+            df[list(doc)] += 1
+        # Smoothed IDF, as if one extra document contained every feature
+        self.idf = (np.log((1 + len(counts)) / (1 + df)) + 1).astype(np.float32)
+
+        # Stored feature-major, so scoring a query gathers only its features' rows
+        self._vectors = np.zeros((n_features, len(self.keys)), dtype=np.float32)
+        for column, doc in enumerate(counts):
+            if not doc:
+                continue
+            features, values = self._weights(doc)
+            self._vectors[features, column] = values
+
+    def _weights(self, counts: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalised TF-IDF weights of a text's features."""
+        features = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        values = np.fromiter(
+            (1 + math.log(count) for count in counts.values()), dtype=np.float32, count=len(counts)
+        ) * self.idf[features]
+        return features, values / np.linalg.norm(values)
+
+    def similarities(self, text: str) -> np.ndarray:
+        """Cosine similarity of a text to every document, in key order."""
+        counts = hashed_counts(text, self.n_features)
+        if not counts or not self.keys:
+            return np.zeros(len(self.keys), dtype=np.float32)
+
+        features, values = self._weights(counts)
+        return values @ self._vectors[features]
+
+    def similarities_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Cosine similarity of each text to every document.
+
+        All texts' feature rows are gathered at once and summed per text
+        with np.add.reduceat, rather than one product per text.
+
+        Returns:
+            (len(texts), len(keys)) array
+        """
+        result = np.zeros((len(texts), len(self.keys)), dtype=np.float32)
+        if not self.keys:
+            return result
+
+        rows, features, values = [], [], []
+        for row, text in enumerate(texts):
+            counts = hashed_counts(text, self.n_features)
+            if counts:
+                text_features, text_values = self._weights(counts)
+                rows.append(row)
+                features.append(text_features)
+                values.append(text_values)
+        if not rows:
+            return result
+
+        starts = np.cumsum([0] + [len(f) for f in features[:-1]])
+        gathered = np.concatenate(values)[:, None] * self._vectors[np.concatenate(features)]
+        result[rows] = np.add.reduceat(gathered, starts, axis=0)
+        return result
+
+    def top_k(self, scores: np.ndarray, k: int = 1, min_similarity: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Best documents by score.
+
+        Args:
+            scores: Score per document, in key order
+            k: Maximum number of results
+            min_similarity: Drop results below this score
+
+        Returns:
+            Up to k (key, score) pairs with a positive score, best first
+        """
+        if not scores.size or k <= 0:
+            return []
+
+        if k < scores.size:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(scores.size)
+        top = top[np.argsort(scores[top])[::-1]]
+
+        return [
+            (self.keys[i], float(scores[i]))
+            for i in top
+            if scores[i] > 0 and scores[i] >= min_similarity
+        ]
+
+    def search(self, text: str, k: int = 1, min_similarity: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Most similar documents to a text.
+
+        Args:
+            text: Query text
+            k: Maximum number of results
+            min_similarity: Drop results below this cosine similarity
+
+        Returns:
+            Up to k (key, similarity) pairs, most similar first
+        """
+        return self.top_k(self.similarities(text), k, min_similarity)
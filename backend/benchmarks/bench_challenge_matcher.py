@@ -0,0 +1,43 @@
+"""
+Benchmark - Challenge matching.
+
+Compares one-by-one matching (_match_challenges, the previous
+implementation) with the precomputed bitmask table behind
+match_challenges_to_templates, for small, typical and full challenge sets.
+
+Run from backend/:
+    python -m benchmarks.bench_challenge_matcher
+"""
+import timeit
+
+from app.services.challenge_matcher import (
+    CHALLENGE_MAPPINGS,
+    _match_challenges,
+    match_challenges_to_templates,
+)
+
+ITERATIONS = 20000
+
+
+def main():
+    challenges = list(CHALLENGE_MAPPINGS)
+    cases = {
+        "1 challenge": challenges[:1],
+        "4 challenges": challenges[2:6],
+        "all 10": challenges,
+    }
+
+    print(f"{ITERATIONS} iterations\n")
+    print(f"{'case':<16}{'loop':>12}{'table':>12}{'speedup':>10}")
+
+    for name, selected in cases.items():
+        loop = timeit.timeit(lambda: _match_challenges(selected), number=ITERATIONS)
+        table = timeit.timeit(lambda: match_challenges_to_templates(selected), number=ITERATIONS)
+        print(
+            f"{name:<16}{loop / ITERATIONS * 1e6:>10.2f}us{table / ITERATIONS * 1e6:>10.2f}us"
+            f"{loop / table:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
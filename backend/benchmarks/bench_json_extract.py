@@ -0,0 +1,85 @@
+"""
+Benchmark - JSON extraction from agent responses.
+
+Compares the previous per-agent parsing (json.loads, then splitting on
+markdown fences) with extract_json and IncrementalJSONParser on responses
+sized like real Workflow/Progress agent output (~8KB of JSON).
+
+Run from backend/:
+    python -m benchmarks.bench_json_extract
+"""
+import json
+import timeit
+
+from app.utils.json_extract import extract_json, IncrementalJSONParser
+
+ITERATIONS = 2000
+STREAM_CHUNK = 16
+
+
+def _payload():
+    return {
+        "workflows": [
+            {
+                "name": f"Workflow_{i}",
+                "purpose": "Capture enquiries from the website form, enrich them and route to the right owner. " * 2,
+                "trigger": {"type": "webhook", "config": {"path": f"/hooks/{i}", "method": "POST"}},
+                "steps": [
+                    {"order": s, "node": "HTTP Request", "description": f"Step {s} calls the {{service}} API and maps fields"}
+                    for s in range(6)
+                ],
+                "estimatedHours": 4 + i
+            }
+            for i in range(8)
+        ]
+    }
+
+
+def _legacy_parse(response_text):
+    """The parsing block previously copy-pasted across agents."""
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError:
+        if "```json" in response_text:
+            json_str = response_text.split("```json")[1].split("```")[0].strip()
+            return json.loads(json_str)
+        elif "```" in response_text:
+            json_str = response_text.split("```")[1].split("```")[0].strip()
+            return json.loads(json_str)
+        raise ValueError("Could not parse JSON from response")
+
+
+def _incremental(text):
+    parser = IncrementalJSONParser()
+    for i in range(0, len(text), STREAM_CHUNK):
+        if parser.feed(text[i:i + STREAM_CHUNK]):
+            break
+    return parser.result()
+
+
+def main():
+    body = json.dumps(_payload(), indent=2)
+    responses = {
+        "bare": body,
+        "fenced": "Here is the workflow plan:\n\n```json\n" + body + "\n```\n\nLet me know if you need changes.",
+        "truncated": body[: int(len(body) * 0.9)],
+    }
+
+    print(f"Response size: {len(body)} chars, {ITERATIONS} iterations\n")
+    print(f"{'case':<12}{'legacy':>14}{'extract_json':>16}{'incremental':>16}")
+
+    for name, text in responses.items():
+        row = [name]
+        for fn in (_legacy_parse, extract_json, _incremental):
+            try:
+                fn(text)
+            except ValueError:
+                row.append("fails")
+                continue
+            seconds = timeit.timeit(lambda: fn(text), number=ITERATIONS)
+            row.append(f"{seconds / ITERATIONS * 1e6:.1f}us")
+        print(f"{row[0]:<12}{row[1]:>14}{row[2]:>16}{row[3]:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark - Lead notes keyword scoring.
+
+Compares the previous inline scoring (lowercase, then one `in` test per
+keyword), NOTES_SCANNER, and a single case-insensitive alternation regex
+over the same keywords, on a short note and a long pasted one.
+
+Run from backend/:
+    python -m benchmarks.bench_keyword_scanner
+"""
+import re
+import timeit
+
+from app.services.challenge_matcher import NOTES_KEYWORD_GROUPS, NOTES_SCANNER
+
+ITERATIONS = 2000
+
+URGENCY = list(NOTES_KEYWORD_GROUPS["urgency"]["terms"])
+REVENUE = list(NOTES_KEYWORD_GROUPS["revenue"]["terms"])
+ALTERNATION = re.compile(
+    "(?=(" + "|".join(re.escape(term) for term in URGENCY + REVENUE) + "))", re.IGNORECASE
+)
+
+
+def _inline(notes):
+    """The scoring block previously inlined in calculate_lead_score."""
+    notes_lower = notes.lower()
+    urgency_count = sum(1 for keyword in URGENCY if keyword in notes_lower)
+    revenue_count = sum(1 for keyword in REVENUE if keyword in notes_lower)
+    return min(10, urgency_count * 3) + min(10, revenue_count * 3)
+
+
+def _scanner(notes):
+    return sum(NOTES_SCANNER.score(notes).values())
+
+
+def _regex(notes):
+    found = {match.group(1).lower() for match in ALTERNATION.finditer(notes)}
+    return min(10, 3 * len(found.intersection(URGENCY))) + min(10, 3 * len(found.intersection(REVENUE)))
+
+
+def main():
+    notes = {
+        "short": "We're losing jobs every week, urgent help needed",
+        "long (5KB)": (
+            "Small workshop, mostly kitchens and wardrobes. Quotes are done on paper in the evenings. " * 60
+            + "Looking for growth, need this ASAP."
+        ),
+    }
+
+    print(f"{ITERATIONS} iterations\n")
+    print(f"{'case':<14}{'inline':>12}{'scanner':>12}{'regex':>12}")
+
+    for name, text in notes.items():
+        assert _inline(text) == _scanner(text) == _regex(text)
+        row = [
+            timeit.timeit(lambda: fn(text), number=ITERATIONS) / ITERATIONS * 1e6
+            for fn in (_inline, _scanner, _regex)
+        ]
+        print(f"{name:<14}" + "".join(f"{value:>10.1f}us" for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark - Lead scoring.
+
+Scores 100k synthetic leads one at a time with calculate_lead_score and in
+one vectorized pass with score_leads.
+
+Run from backend/:
+    python -m benchmarks.bench_lead_scoring
+"""
+import random
+import time
+
+import numpy as np
+
+from app.services.challenge_matcher import calculate_lead_score
+from app.services.lead_scoring import TEAM_SIZES, encode_team_sizes, score_leads
+
+LEADS = 100_000
+
+NOTES = [
+    "",
+    "We're losing jobs every week, urgent help needed",
+    "Looking to grow revenue significantly, need automation ASAP",
+    "Small workshop, mostly kitchens and wardrobes. Quotes are done on paper in the evenings.",
+]
+
+
+def main():
+    rng = random.Random(1)
+    team_sizes = [rng.choice(TEAM_SIZES) for _ in range(LEADS)]
+    challenges = [rng.randint(1, 10) for _ in range(LEADS)]
+    # Distinct notes, as in real intake data
+    notes = [f"{rng.choice(NOTES)} (ref {i})" for i in range(LEADS)]
+    revenue = [rng.choice([1000, 2500, 5000, 8000, 12000]) for _ in range(LEADS)]
+
+    start = time.perf_counter()
+    expected = [calculate_lead_score(*lead) for lead in zip(team_sizes, challenges, notes, revenue)]
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = score_leads(
+        encode_team_sizes(team_sizes),
+        np.array(challenges, dtype=np.int32),
+        notes,
+        np.array(revenue, dtype=np.float64)
+    )
+    vectorized = time.perf_counter() - start
+
+    assert scores.tolist() == expected
+    print(f"{LEADS} leads")
+    print(f"scalar      {scalar * 1000:8.1f}ms")
+    print(f"vectorized  {vectorized * 1000:8.1f}ms  ({scalar / vectorized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
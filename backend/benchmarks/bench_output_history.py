@@ -0,0 +1,52 @@
+"""
+Benchmark - Agent output history storage.
+
+Simulates regenerating a proposal: each version rewrites the summary and
+one system's copy. Compares storing every version in full (compressed)
+with a base plus deltas, and times building and applying a delta.
+
+Run from backend/:
+    python -m benchmarks.bench_output_history
+"""
+from types import SimpleNamespace
+import timeit
+
+from app.services.challenge_matcher import CHALLENGE_MAPPINGS, match_challenges_to_templates
+from app.services.proposal_renderer import render_proposal
+from app.utils.text_delta import compress, make_delta, apply_delta
+
+VERSIONS = 10
+ITERATIONS = 200
+
+
+def main():
+    project = SimpleNamespace(
+        client_name="Sam Taylor", business_name="Oak & Pine Joinery", challenges=list(CHALLENGE_MAPPINGS)[:5]
+    )
+    context = match_challenges_to_templates(project.challenges)
+    versions = [
+        render_proposal(project, context, summary=f"Summary draft {n}: we'll save you {n + 3} hours a week.")
+        .replace("Around 4-5 hours", f"Around {n + 4} hours")
+        for n in range(VERSIONS)
+    ]
+    base = versions[0]
+
+    raw = sum(len(v.encode()) for v in versions)
+    full = sum(len(compress(v)) for v in versions)
+    deltas = len(compress(base)) + sum(len(make_delta(base, v)) for v in versions[1:])
+
+    print(f"{VERSIONS} versions of a {len(base) / 1024:.1f}KB proposal\n")
+    print(f"Uncompressed:     {raw:>7,} bytes")
+    print(f"Compressed full:  {full:>7,} bytes")
+    print(f"Base + deltas:    {deltas:>7,} bytes  ({full / deltas:.1f}x smaller)\n")
+
+    target = versions[-1]
+    delta = make_delta(base, target)
+    make = timeit.timeit(lambda: make_delta(base, target), number=ITERATIONS) / ITERATIONS
+    apply = timeit.timeit(lambda: apply_delta(base, delta), number=ITERATIONS) / ITERATIONS
+    print(f"make_delta:  {make * 1e3:.2f}ms")
+    print(f"apply_delta: {apply * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
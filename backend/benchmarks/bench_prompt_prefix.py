@@ -0,0 +1,90 @@
+"""
+Benchmark - Prefill time saved by prompt prefix reuse on the local LLM.
+
+For each agent, sends prompts for two different projects to the configured
+local backend (LOCAL_LLM_ENDPOINT / LOCAL_LLM_TYPE) with a one-token
+completion, so the request time is almost entirely prefill. The first
+request warms the agent's static prefix; the second shares it and only
+evaluates the project details. A prompt with the project details placed
+before the instructions (the previous layout) is sent as a control.
+
+Uses LOCAL_LLM_API_STYLE, so it can be run once per style to compare chat
+and completion routes. Requires a running local LLM server. Run from backend/:
+    python -m benchmarks.bench_prompt_prefix
+"""
+import asyncio
+import time
+
+from app.agents.overview_agent import OverviewAgent
+from app.agents.proposal_agent import ProposalAgent
+from app.agents.workflow_agent import WorkflowAgent
+from app.agents.dashboard_agent import DashboardAgent
+from app.agents.progress_agent import ProgressAgent
+from app.agents.build_guide_agent import BuildGuideAgent
+from app.models.project import Project
+from app.services.local_llm_service import local_llm
+from app.config import settings
+
+TEMPLATES = [
+    {"category": "enquiry_capture", "challenge": "I miss enquiries", "base_price": 1500},
+    {"category": "quote_generation", "challenge": "Quotes take too long", "base_price": 2500},
+]
+
+
+def _project(name: str, team_size: str, challenges: list) -> Project:
+    return Project(
+        client_name=f"{name} Owner",
+        client_email=f"owner@{name.lower().replace(' ', '')}.co.uk",
+        business_name=name,
+        team_size=team_size,
+        enquiry_sources=["Email", "Facebook", "Website form"],
+        challenges=challenges,
+        admin_method="Paper notebook",
+        notes="Losing a few jobs a week to slow replies."
+    )
+
+
+PROJECTS = [
+    _project("Oak & Ash Joinery", "2-3 people", ["I miss enquiries or forget to reply", "Quoting takes hours"]),
+    _project("Birchwood Kitchens", "4+ people", ["Scheduling is chaotic", "Invoices go out late", "I miss enquiries"]),
+]
+
+
+def _prompt(agent, project: Project) -> str:
+    if isinstance(agent, OverviewAgent):
+        return agent._build_prompt(project)
+    if isinstance(agent, ProposalAgent):
+        return agent._build_prompt(project, TEMPLATES, 4000, 3)
+    if isinstance(agent, BuildGuideAgent):
+        return agent._build_prompt(project, TEMPLATES, "medium", 24)
+    if isinstance(agent, ProgressAgent):
+        return agent._build_prompt(project, "medium", 24)
+    return agent._build_prompt(project, TEMPLATES)
+
+
+async def _prefill(prompt: str, system: str = None) -> float:
+    start = time.perf_counter()
+    result = await local_llm.generate(
+        prompt=prompt, model=settings.LOCAL_HAIKU_MODEL, max_tokens=1, system=system
+    )
+    return result["usage"].get("prefill_seconds", time.perf_counter() - start)
+
+
+async def main():
+    agents = [OverviewAgent(), ProposalAgent(), WorkflowAgent(), DashboardAgent(), ProgressAgent(), BuildGuideAgent()]
+
+    print(f"Backend: {settings.LOCAL_LLM_TYPE} at {settings.LOCAL_LLM_ENDPOINT}\n")
+    print(f"{'agent':<14}{'cold':>10}{'warm':>10}{'details-first':>16}{'saved':>10}")
+
+    for agent in agents:
+        cold = await _prefill(_prompt(agent, PROJECTS[0]), agent.prompt_prefix)
+        warm = await _prefill(_prompt(agent, PROJECTS[1]), agent.prompt_prefix)
+
+        # Control: same content, project details first (cache miss on the prefix)
+        control = await _prefill(_prompt(agent, PROJECTS[0]) + "\n" + agent.prompt_prefix)
+
+        print(f"{agent.agent_type:<14}{cold:>9.3f}s{warm:>9.3f}s{control:>15.3f}s{control - warm:>9.3f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,35 @@
+"""
+Benchmark - Template proposal rendering.
+
+Times render_proposal for simple (1-2 challenge) and larger match results;
+this is the whole cost of a fast-path proposal when no summary model is
+used.
+
+Run from backend/:
+    python -m benchmarks.bench_proposal_renderer
+"""
+from types import SimpleNamespace
+import timeit
+
+from app.services.challenge_matcher import CHALLENGE_MAPPINGS, match_challenges_to_templates
+from app.services.proposal_renderer import render_proposal
+
+ITERATIONS = 5000
+
+
+def main():
+    challenges = list(CHALLENGE_MAPPINGS)
+    print(f"{ITERATIONS} iterations\n")
+
+    for count in (1, 2, 5, 10):
+        project = SimpleNamespace(
+            client_name="Sam Taylor", business_name="Oak & Pine Joinery", challenges=challenges[:count]
+        )
+        context = match_challenges_to_templates(project.challenges)
+        seconds = timeit.timeit(lambda: render_proposal(project, context), number=ITERATIONS) / ITERATIONS
+        size = len(render_proposal(project, context))
+        print(f"{count:>2} challenges: {seconds * 1e6:>7.1f}us  ({size / 1024:.1f}KB)")
+
+
+if __name__ == "__main__":
+    main()
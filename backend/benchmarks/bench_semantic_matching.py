@@ -0,0 +1,61 @@
+"""
+Benchmark - Semantic matching of free-text challenges and notes.
+
+Times match_challenges_to_templates for an intake with only catalog
+challenges, with notes, and with free-text challenges plus notes, and the
+cost of building the similarity index (paid once per catalog load) for the
+built-in catalog and a 500-template one.
+
+Run from backend/:
+    python -m benchmarks.bench_semantic_matching
+"""
+import random
+import time
+import timeit
+
+from app.services.challenge_matcher import CHALLENGE_MAPPINGS, match_challenges_to_templates
+from app.utils.similarity_index import SimilarityIndex
+
+ITERATIONS = 5000
+
+NOTES = (
+    "We're a family-run roofing firm and growing fast, need this ASAP. "
+    "Lots of missed calls while we're up on roofs, and customers keep ringing "
+    "to ask when we'll turn up. Turnover is around £400k."
+)
+
+
+def _synthetic_catalog(size):
+    words = " ".join(CHALLENGE_MAPPINGS).lower().split() + [
+        "crm", "email", "sms", "calendar", "stripe", "xero", "portal", "report", "lead", "booking"
+    ]
+    rng = random.Random(3)
+    return {f"template {i}": " ".join(rng.choices(words, k=40)) for i in range(size)}
+
+
+def main():
+    challenges = list(CHALLENGE_MAPPINGS)[:3]
+    free_text = ["It takes ages to get a quote out", "customers don't pay on time"]
+    cases = {
+        "catalog challenges": lambda: match_challenges_to_templates(challenges),
+        "+ notes": lambda: match_challenges_to_templates(challenges, notes=NOTES),
+        "free text + notes": lambda: match_challenges_to_templates(free_text, notes=NOTES),
+    }
+
+    print(f"{ITERATIONS} iterations\n")
+    for name, fn in cases.items():
+        seconds = timeit.timeit(fn, number=ITERATIONS) / ITERATIONS
+        print(f"{name:<22}{seconds * 1e6:>10.1f}us per intake")
+
+    print()
+    for size in (len(CHALLENGE_MAPPINGS), 500):
+        documents = _synthetic_catalog(size)
+        start = time.perf_counter()
+        index = SimilarityIndex(documents)
+        built = time.perf_counter() - start
+        seconds = timeit.timeit(lambda: index.search(NOTES, k=3), number=1000) / 1000
+        print(f"{size:>4} documents: build {built * 1e3:.1f}ms, search {seconds * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
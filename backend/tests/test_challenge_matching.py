@@ -2,10 +2,18 @@
 Tests for challenge matching engine.
 """
 import pytest
+import random
 from decimal import Decimal
 
 from app.services.challenge_matcher import (
+    CHALLENGE_MAPPINGS,
+    MatchIndex,
+    _match_challenges,
+    set_catalog,
+    reset_catalog,
     match_challenges_to_templates,
+    match_project,
+    is_current_match,
     calculate_complexity,
     calculate_lead_score,
     calculate_hours,
@@ -149,5 +157,202 @@ def test_urgency_sorting():
     assert result["matched_templates"][0]["urgency"] == "high"
 
 
+def _baseline_match(challenges):
+    """match_challenges_to_templates as originally written (one by one, stable urgency sort)."""
+    matched_templates = []
+    total_value = Decimal('0')
+    categories = set()
+
+    for challenge in challenges:
+        config = CHALLENGE_MAPPINGS.get(challenge)
+        if not config:
+            continue
+
+        primary_template_slug = config["templates"][0] if config["templates"] else None
+
+        matched_templates.append({
+            "challenge": challenge,
+            "category": config["category"],
+            "urgency": config["urgency"],
+            "base_price": config["base_price"],
+            "template_slug": primary_template_slug,
+            "all_templates": config["templates"]
+        })
+
+        total_value += Decimal(str(config["base_price"]))
+        categories.add(config["category"])
+
+    complexity = calculate_complexity(
+        num_challenges=len(challenges),
+        num_categories=len(categories),
+        total_value=float(total_value)
+    )
+
+    urgency_order = {"high": 3, "medium": 2, "low": 1}
+    matched_templates.sort(
+        key=lambda x: urgency_order.get(x["urgency"], 0),
+        reverse=True
+    )
+
+    estimated_hours = calculate_hours(matched_templates)
+    estimated_weeks = calculate_weeks(estimated_hours, complexity)
+
+    return {
+        "matched_templates": matched_templates,
+        "total_value": float(total_value),
+        "complexity": complexity,
+        "estimated_hours": estimated_hours,
+        "estimated_weeks": estimated_weeks,
+        "categories": list(categories)
+    }
+
+
+def _assert_matches_baseline(challenges):
+    result = match_challenges_to_templates(challenges)
+    expected = _baseline_match(challenges)
+
+    assert result["matched_templates"] == expected["matched_templates"], challenges
+    assert result["total_value"] == expected["total_value"]
+    assert result["complexity"] == expected["complexity"]
+    assert result["estimated_hours"] == expected["estimated_hours"]
+    assert result["estimated_weeks"] == expected["estimated_weeks"]
+    assert sorted(result["categories"]) == sorted(expected["categories"])
+
+
+def _subset(mask):
+    return [challenge for i, challenge in enumerate(CHALLENGE_MAPPINGS) if mask & (1 << i)]
+
+
+def test_table_matches_baseline_for_all_subsets():
+    """Test the precomputed table against the original matcher for all 1024 challenge sets."""
+    for mask in range(1 << len(CHALLENGE_MAPPINGS)):
+        _assert_matches_baseline(_subset(mask))
+
+
+def test_permuted_selections_match_baseline():
+    """Test that templates of equal urgency stay in the order the client picked them."""
+    rng = random.Random(7)
+    for mask in range(1 << len(CHALLENGE_MAPPINGS)):
+        challenges = _subset(mask)
+        rng.shuffle(challenges)
+        _assert_matches_baseline(challenges)
+
+    challenges = list(CHALLENGE_MAPPINGS)
+    _assert_matches_baseline(challenges[::-1])
+
+
+def test_duplicate_and_unknown_challenges_match_baseline():
+    """Test that repeated and unknown challenges still count as before."""
+    challenges = [
+        "Quotes take too long to send",
+        "I miss enquiries or forget to reply",
+        "Something else",
+        "Quotes take too long to send",
+        "I miss enquiries or forget to reply"
+    ]
+
+    _assert_matches_baseline(challenges)
+    _assert_matches_baseline(challenges[::-1])
+    assert match_challenges_to_templates(challenges)["total_value"] == 12000
+
+
+def test_result_is_a_copy():
+    """Test that modifying a result does not change later results."""
+    challenges = ["Quotes take too long to send"]
+    result = match_challenges_to_templates(challenges)
+    result["matched_templates"][0]["base_price"] = 0
+    result["categories"].append("other")
+
+    again = match_challenges_to_templates(challenges)
+    assert again["matched_templates"][0]["base_price"] == 3500
+    assert again["categories"] == ["quote_generation"]
+
+
+def _catalog(size):
+    return {
+        f"Challenge {i}": {
+            "templates": [f"template_{i}"],
+            "category": f"category_{i % 3}",
+            "urgency": "high" if i % 2 else "low",
+            "base_price": 1000 + 100 * i,
+            "estimated_hours": 5 + i,
+        }
+        for i in range(size)
+    }
+
+
+def test_set_catalog_swaps_matching():
+    """Test that matching uses the catalog set last, and reset restores the built-in one."""
+    try:
+        set_catalog(_catalog(3), version="v2")
+        result = match_challenges_to_templates(["Challenge 1", "Challenge 2"])
+
+        assert [t["template_slug"] for t in result["matched_templates"]] == ["template_1", "template_2"]
+        assert result["total_value"] == 2300
+        # Template hours (6 + 7) plus 20% integration overhead
+        assert result["estimated_hours"] == 15
+        assert match_challenges_to_templates(["Quotes take too long to send"])["matched_templates"] == []
+    finally:
+        reset_catalog()
+
+    assert match_challenges_to_templates(["Quotes take too long to send"])["total_value"] == 3500
+
+
+def test_large_catalog_fills_table_lazily():
+    """Test that catalogs too big to precompute still match like the loop."""
+    catalog = _catalog(20)
+    index = MatchIndex(catalog, version="big")
+    challenges = ["Challenge 4", "Challenge 11", "Challenge 19"]
+
+    assert index.match(challenges) == _match_challenges(challenges, catalog)
+    assert index.match(challenges[::-1]) == _match_challenges(challenges[::-1], catalog)
+
+
+def test_free_text_challenge_is_matched():
+    """Test that a typed challenge is matched to the catalog challenge it describes."""
+    result = match_challenges_to_templates(["It takes ages to get a quote out to customers"])
+
+    assert [t["challenge"] for t in result["matched_templates"]] == ["Quotes take too long to send"]
+    assert result["total_value"] == 3500
+
+
+def test_free_text_duplicate_of_selection_is_dropped():
+    """Test that free text describing an already selected challenge isn't charged twice."""
+    result = match_challenges_to_templates(["Quotes take too long to send", "quoting is slow"])
+    assert result["total_value"] == 3500
+
+
+def test_notes_suggest_templates():
+    """Test that notes suggest unselected challenges without pricing them."""
+    notes = "Business is growing. Customers ring all day asking for updates on their job."
+    result = match_challenges_to_templates(["Quotes take too long to send"], notes=notes)
+
+    assert [s["challenge"] for s in result["suggested_templates"]] == ["Customers keep messaging for updates"]
+    assert result["total_value"] == 3500
+    assert "suggested_templates" not in match_challenges_to_templates(["Quotes take too long to send"])
+
+
+def test_match_project_is_storable_and_versioned():
+    """Test that a project's match result is JSON-serialisable and records its version."""
+    import json
+
+    result = match_project(["Quotes take too long to send"], "Customers ring asking for updates")
+
+    assert json.loads(json.dumps(result)) == result
+    assert result["matcher_version"].endswith("/builtin")
+    assert result["matched_templates"][0]["template_slug"] == "ai_quote_generator"
+
+
+def test_stored_match_is_current_until_inputs_change():
+    """Test that a stored match is reused for the same inputs only."""
+    challenges = ["Quotes take too long to send"]
+    stored = match_project(challenges, None)
+
+    assert is_current_match(stored, list(challenges), "")
+    assert not is_current_match(stored, challenges + ["Chasing payments is awkward"], None)
+    assert not is_current_match(stored, challenges, "New notes")
+    assert not is_current_match(None, challenges, None)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,218 @@
+"""
+Tests for inference micro-batching.
+"""
+import asyncio
+
+import pytest
+
+from app.services.inference_batcher import InferenceBatcher
+
+
+def test_concurrent_requests_share_one_batch():
+    """Test that concurrent same-model requests are sent together."""
+    calls = []
+
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        calls.append(list(prompts))
+        return [{"text": p.upper(), "usage": {}} for p in prompts]
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=10, max_batch_size=8)
+        return await asyncio.gather(*[
+            batcher.submit(f"prompt {i}", "model-a", 0.7, 100) for i in range(3)
+        ])
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert [r["text"] for r in results] == ["PROMPT 0", "PROMPT 1", "PROMPT 2"]
+
+
+def test_different_models_are_not_batched_together():
+    """Test that requests are grouped per model."""
+    calls = []
+
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        calls.append((model, len(prompts)))
+        return [{"text": model, "usage": {}} for _ in prompts]
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=10, max_batch_size=8)
+        return await asyncio.gather(
+            batcher.submit("a", "model-a", 0.7, 100),
+            batcher.submit("b", "model-b", 0.7, 100),
+        )
+
+    results = asyncio.run(run())
+
+    assert sorted(calls) == [("model-a", 1), ("model-b", 1)]
+    assert [r["text"] for r in results] == ["model-a", "model-b"]
+
+
+def test_full_batch_flushes_immediately():
+    """Test that reaching max_batch_size does not wait for the window."""
+    calls = []
+
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        calls.append(len(prompts))
+        return [{"text": p, "usage": {}} for p in prompts]
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=60_000, max_batch_size=2)
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.submit("a", "m", 0.7, 100), batcher.submit("b", "m", 0.7, 100)),
+            timeout=1
+        )
+
+    asyncio.run(run())
+
+    assert calls == [2]
+
+
+def test_batch_errors_propagate_to_every_caller():
+    """Test that a failed batch request fails each waiting caller."""
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        raise RuntimeError("backend unavailable")
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=10, max_batch_size=8)
+        return await asyncio.gather(
+            batcher.submit("a", "m", 0.7, 100),
+            batcher.submit("b", "m", 0.7, 100),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_different_schemas_are_not_batched_together():
+    """Test that structured-output requests are grouped per schema."""
+    calls = []
+
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        calls.append(json_schema)
+        return [{"text": "{}", "usage": {}} for _ in prompts]
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=10, max_batch_size=8)
+        return await asyncio.gather(
+            batcher.submit("a", "m", 0.7, 100, json_schema={"type": "object"}),
+            batcher.submit("b", "m", 0.7, 100, json_schema={"type": "object"}),
+            batcher.submit("c", "m", 0.7, 100),
+        )
+
+    asyncio.run(run())
+
+    assert sorted(calls, key=str) == [None, {"type": "object"}]
+
+
+def test_cancelled_caller_is_not_sent():
+    """Test that a caller cancelled before dispatch is dropped from its batch."""
+    calls = []
+
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        calls.append(list(prompts))
+        return [{"text": p, "usage": {}} for p in prompts]
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=50, max_batch_size=8)
+        cancelled = asyncio.create_task(batcher.submit("a", "m", 0.7, 100))
+        kept = asyncio.create_task(batcher.submit("b", "m", 0.7, 100))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    result = asyncio.run(run())
+
+    assert calls == [["b"]]
+    assert result["text"] == "b"
+
+
+def test_cancelled_callers_do_not_fill_a_batch():
+    """Test that cancelled callers no longer count towards max_batch_size."""
+    calls = []
+
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        calls.append(list(prompts))
+        return [{"text": p, "usage": {}} for p in prompts]
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=50, max_batch_size=2)
+        timed_out = asyncio.create_task(asyncio.wait_for(batcher.submit("a", "m", 0.7, 100), timeout=0.001))
+        await asyncio.sleep(0.01)
+        assert timed_out.done()
+        return await asyncio.gather(batcher.submit("b", "m", 0.7, 100), batcher.submit("c", "m", 0.7, 100))
+
+    asyncio.run(run())
+
+    assert calls == [["b", "c"]]
+
+
+def test_cancelling_the_only_caller_cancels_the_flush():
+    """Test that an emptied batch is never sent."""
+    calls = []
+
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        calls.append(list(prompts))
+        return [{"text": p, "usage": {}} for p in prompts]
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=10, max_batch_size=8)
+        task = asyncio.create_task(batcher.submit("a", "m", 0.7, 100))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.sleep(0.03)
+        return batcher
+
+    batcher = asyncio.run(run())
+
+    assert calls == []
+    assert not batcher._pending and not batcher._timers
+
+
+def test_in_flight_batches_are_tracked_until_done():
+    """Test that the batcher holds a reference to each batch in flight."""
+    release = asyncio.Event()
+
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        await release.wait()
+        return [{"text": p, "usage": {}} for p in prompts]
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=1, max_batch_size=8)
+        caller = asyncio.create_task(batcher.submit("a", "m", 0.7, 100))
+        await asyncio.sleep(0.02)
+        in_flight = len(batcher._tasks)
+        release.set()
+        await caller
+        await asyncio.sleep(0)
+        return in_flight, len(batcher._tasks)
+
+    assert asyncio.run(run()) == (1, 0)
+
+
+def test_stop_cancels_queued_and_in_flight_callers():
+    """Test that stop() leaves no caller waiting forever."""
+    async def batch_fn(prompts, model, temperature, max_tokens, json_schema):
+        await asyncio.sleep(60)
+
+    async def run():
+        batcher = InferenceBatcher(batch_fn, window_ms=1, max_batch_size=8)
+        in_flight = asyncio.create_task(batcher.submit("a", "m", 0.7, 100))
+        await asyncio.sleep(0.02)
+        queued = asyncio.create_task(batcher.submit("b", "other", 0.7, 100))
+        await asyncio.sleep(0)
+        await batcher.stop()
+        results = await asyncio.wait_for(asyncio.gather(in_flight, queued, return_exceptions=True), timeout=1)
+        return results, batcher
+
+    results, batcher = asyncio.run(run())
+
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    assert not batcher._tasks and not batcher._pending and not batcher._timers
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
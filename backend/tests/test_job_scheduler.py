@@ -0,0 +1,88 @@
+"""
+Tests for priority scheduling with aging.
+"""
+import asyncio
+
+from app.services.job_scheduler import PriorityJobScheduler, calculate_job_priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(clock):
+    """Scheduler gaining one priority point per minute of waiting."""
+    scheduler = PriorityJobScheduler(clock=clock)
+    scheduler._aging_rate = 1 / 60
+    scheduler.concurrency = 1
+    return scheduler
+
+
+def _drain(scheduler):
+    """Run every queued job on one worker."""
+    async def run():
+        scheduler.start()
+        while scheduler.pending or scheduler.active:
+            await asyncio.sleep(0)
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+
+def test_higher_priority_runs_first():
+    """Test ordering of jobs submitted at the same time."""
+    scheduler = _scheduler(FakeClock())
+    order = []
+
+    async def job(label):
+        order.append(label)
+
+    for label, priority in [("low", 10), ("high", 90), ("mid", 50)]:
+        scheduler.submit(job, priority=priority, name=label, label=label)
+    _drain(scheduler)
+
+    assert order == ["high", "mid", "low"]
+
+
+def test_waiting_job_ages_past_newer_higher_priority_job():
+    """Test that a low-priority job overtakes once it has waited long enough."""
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    order = []
+
+    async def job(label):
+        order.append(label)
+
+    scheduler.submit(job, priority=10, name="old-low", label="old-low")
+    clock.now += 81 * 60  # 81 points of aging
+    scheduler.submit(job, priority=90, name="new-high", label="new-high")
+    _drain(scheduler)
+
+    assert order == ["old-low", "new-high"]
+
+
+def test_depth_ahead_counts_queued_jobs_that_would_run_first():
+    """Test the queue position estimate for a new job."""
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+
+    async def job():
+        pass
+
+    scheduler.submit(job, priority=80, name="a")
+    scheduler.submit(job, priority=20, name="b")
+
+    assert scheduler.depth_ahead(50) == 1
+    clock.now += 31 * 60
+    assert scheduler.depth_ahead(50) == 2
+
+
+def test_priority_adds_urgency_bonus():
+    """Test the lead score plus per-challenge urgency points."""
+    matched = [{"urgency": "high"}, {"urgency": "medium"}, {"urgency": "low"}]
+
+    assert calculate_job_priority(60, matched) == 67.0
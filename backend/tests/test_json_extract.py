@@ -0,0 +1,125 @@
+"""
+Tests for JSON extraction and repair of LLM responses.
+"""
+import json
+
+import pytest
+
+from app.utils.json_extract import (
+    extract_json,
+    validate_json,
+    IncrementalJSONParser,
+    JSONExtractionError
+)
+
+
+def test_extract_bare_json():
+    """Test parsing a response that is just JSON."""
+    assert extract_json('{"lead_score": 85}') == {"lead_score": 85}
+
+
+def test_extract_from_code_fence_with_prose():
+    """Test extracting JSON wrapped in a fence with text around it."""
+    text = 'Here is the analysis:\n```json\n{"quick_wins": ["a", "b"]}\n```\nLet me know!'
+    assert extract_json(text) == {"quick_wins": ["a", "b"]}
+
+
+def test_extract_ignores_trailing_prose_with_braces():
+    """Test that text after the object is ignored even if it has braces."""
+    text = '{"a": 1} and then {"b": 2}'
+    assert extract_json(text) == {"a": 1}
+
+
+def test_stray_brace_in_leading_prose():
+    """Test that a balanced non-JSON brace in prose is skipped."""
+    assert extract_json('Placeholders use {name}. Result: {"a": 1}') == {"a": 1}
+    assert extract_json('Result {\n"a": {"b": 1}}') == {"a": {"b": 1}}
+
+
+def test_braces_and_quotes_inside_strings():
+    """Test that brackets and escaped quotes inside strings don't affect nesting."""
+    text = '{"steps": ["1. Use {name}", "2. Say \\"hi\\" ]"], "done": true}'
+    assert extract_json(text) == {"steps": ["1. Use {name}", '2. Say "hi" ]'], "done": True}
+
+
+def test_repair_truncated_string_and_brackets():
+    """Test repairing output cut off inside a string."""
+    text = '{"workflows": [{"name": "Enquiry_Capture", "purpose": "Capture le'
+    assert extract_json(text) == {
+        "workflows": [{"name": "Enquiry_Capture", "purpose": "Capture le"}]
+    }
+
+
+def test_repair_drops_incomplete_trailing_value():
+    """Test that a dangling key or partial literal is dropped."""
+    assert extract_json('{"a": [1, 2], "b": ') == {"a": [1, 2]}
+    assert extract_json('{"a": [1, 2], "b": tru') == {"a": [1, 2]}
+    assert extract_json('{"a": [1, 2], "b"') == {"a": [1, 2]}
+
+
+def test_repair_can_be_disabled():
+    """Test that truncated output raises when repair is off."""
+    with pytest.raises(JSONExtractionError):
+        extract_json('{"a": [1, 2', repair=False)
+
+
+def test_no_json_raises():
+    """Test that a response without an object raises."""
+    with pytest.raises(JSONExtractionError):
+        extract_json("I'm sorry, I can't help with that.")
+
+
+def test_incremental_parser_matches_full_parse():
+    """Test feeding a response in small chunks."""
+    payload = {"tasks": [{"title": f"Task {i}", "estimatedHours": i} for i in range(20)]}
+    text = "Sure:\n```json\n" + json.dumps(payload) + "\n```"
+
+    parser = IncrementalJSONParser()
+    completed_at = None
+    for i in range(0, len(text), 7):
+        if parser.feed(text[i:i + 7]) and completed_at is None:
+            completed_at = i
+
+    assert parser.complete
+    assert completed_at is not None
+    assert parser.result() == payload
+
+
+def test_incremental_parser_partial():
+    """Test reading a partial object mid-stream."""
+    parser = IncrementalJSONParser()
+    parser.feed('{"tasks": [{"title": "A"}, {"title": "B"')
+
+    assert not parser.complete
+    assert parser.partial() == {"tasks": [{"title": "A"}, {"title": "B"}]}
+
+
+def test_incremental_parser_escape_split_across_chunks():
+    """Test a backslash escape split between two chunks."""
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": "x\\')
+    parser.feed('"y"}')
+
+    assert parser.result() == {"a": 'x"y'}
+
+
+def test_validate_json():
+    """Test validation against an agent-style schema."""
+    schema = {
+        "type": "object",
+        "properties": {
+            "lead_score": {"type": "integer", "minimum": 0, "maximum": 100},
+            "complexity": {"type": "string", "enum": ["simple", "medium", "complex"]},
+            "quick_wins": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["lead_score", "complexity"]
+    }
+
+    assert validate_json({"lead_score": 80, "complexity": "simple", "quick_wins": ["x"]}, schema) == []
+
+    errors = validate_json({"lead_score": 120, "quick_wins": [1]}, schema)
+    assert len(errors) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
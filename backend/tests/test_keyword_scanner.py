@@ -0,0 +1,59 @@
+"""
+Tests for the weighted keyword scanner.
+"""
+from app.utils.keyword_scanner import KeywordScanner
+
+
+def _scanner():
+    return KeywordScanner({
+        "urgency": {"terms": {"urgent": 3, "asap": 3, "miss": 3, "losing": 3}, "max_points": 5},
+        "growth": {
+            "terms": {"hire": 2, "scale up": 5, "scale": {"weight": 1, "word_boundary": True}},
+            "word_boundary": True,
+        },
+    })
+
+
+def test_plain_terms_match_substrings_case_insensitively():
+    """Test that plain terms behave like `term in text.lower()`."""
+    points = _scanner().score("We keep MISSING calls")
+    assert points == {"urgency": 3, "growth": 0}
+
+
+def test_group_cap():
+    """Test that a group's points are capped at max_points."""
+    points = _scanner().score("Urgent! ASAP! We're losing work")
+    assert points["urgency"] == 5
+
+
+def test_word_boundary_terms():
+    """Test that word-boundary terms only match whole words."""
+    scanner = _scanner()
+    assert scanner.score("We are hiring soon")["growth"] == 0
+    assert scanner.score("We want to hire two joiners")["growth"] == 2
+
+
+def test_phrases_and_overlapping_terms():
+    """Test phrase matching across whitespace and a term that prefixes a phrase."""
+    matches = _scanner().scan("Time to scale\n  up the workshop")
+    assert {match.term for match in matches} == {"scale up", "scale"}
+    assert _scanner().score("Time to scale up")["growth"] == 6
+
+
+def test_each_term_counted_once():
+    """Test that repeated terms only score once."""
+    assert _scanner().score("urgent urgent urgent")["urgency"] == 3
+
+
+def test_match_positions():
+    """Test that matches report their first occurrence."""
+    text = "Need to hire, asap"
+    matches = {match.term: match for match in _scanner().scan(text)}
+    assert text[matches["hire"].start:matches["hire"].end] == "hire"
+    assert text[matches["asap"].start:matches["asap"].end] == "asap"
+
+
+def test_empty_text():
+    """Test that empty or missing notes score nothing."""
+    assert _scanner().score(None) == {"urgency": 0, "growth": 0}
+    assert _scanner().scan("") == []
@@ -0,0 +1,102 @@
+"""
+Tests for rolling agent latency statistics.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.latency_model import LatencyStats, LatencyModel, DEFAULT_AGENT_SECONDS
+
+
+def test_first_sample_seeds_every_estimate():
+    """Test that the first observation initialises EWMA and quantiles."""
+    stats = LatencyStats(alpha=0.2)
+    stats.observe(40)
+
+    assert (stats.ewma, stats.p50, stats.p95, stats.count) == (40, 40, 40, 1)
+
+
+def test_ewma_weights_the_newest_sample_by_alpha():
+    """Test the exponentially weighted moving average."""
+    stats = LatencyStats(alpha=0.2)
+    stats.observe(10)
+    stats.observe(20)
+
+    assert stats.ewma == pytest.approx(12.0)
+
+
+def test_quantiles_converge_on_a_stable_distribution():
+    """Test that p50/p95 settle near the true quantiles and stay ordered."""
+    stats = LatencyStats(alpha=0.05)
+    rng = random.Random(7)
+    for _ in range(20000):
+        stats.observe(rng.uniform(0, 100))
+
+    assert stats.p50 == pytest.approx(50, abs=10)
+    assert stats.p95 == pytest.approx(95, abs=10)
+    assert stats.p50 <= stats.p95
+
+
+def test_negative_samples_are_clamped():
+    """Test that clock glitches never produce negative estimates."""
+    stats = LatencyStats()
+    stats.observe(-5)
+
+    assert stats.ewma == 0
+
+
+def test_unknown_pairs_use_the_default():
+    """Test the fallback before any sample has been seen."""
+    model = LatencyModel()
+
+    assert model.expected_seconds("proposal", "model-a") == DEFAULT_AGENT_SECONDS
+
+
+def test_predict_completion_costs_queue_at_p50_and_own_run_at_p95():
+    """Test the completion estimate for a queued run."""
+    model = LatencyModel()
+    model._stats[("proposal", "m")] = LatencyStats(ewma=10, p50=10, p95=30, count=5)
+    model._stats[("overview", "m")] = LatencyStats(ewma=5, p50=5, p95=15, count=5)
+    agents = [("proposal", "m"), ("overview", "m")]
+
+    before = datetime.utcnow()
+    predicted = model.predict_completion(agents, queue_depth=4, concurrency=2)
+
+    # Wait 15s x 4 / 2 = 30s, plus own run at p95 = 45s
+    expected = before + timedelta(seconds=75)
+    assert expected <= predicted <= expected + timedelta(seconds=1)
+
+
+class _FailingSession:
+    """Minimal session whose commit fails."""
+
+    def __init__(self):
+        self.added = []
+
+    async def execute(self, statement):
+        class _Result:
+            def scalars(self):
+                return self
+
+            def all(self):
+                return []
+        return _Result()
+
+    def add(self, row):
+        self.added.append(row)
+
+    async def commit(self):
+        raise RuntimeError("database unavailable")
+
+
+def test_failed_persist_is_retried():
+    """Test that stats stay dirty when the commit fails."""
+    model = LatencyModel()
+    model.record("proposal", "model-a", 12)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(model.persist(_FailingSession()))
+
+    assert model._dirty
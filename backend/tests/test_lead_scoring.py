@@ -0,0 +1,47 @@
+"""
+Tests for vectorized batch lead scoring.
+"""
+import random
+
+import numpy as np
+
+from app.services.challenge_matcher import calculate_lead_score, NOTES_KEYWORD_GROUPS
+from app.services.lead_scoring import TEAM_SIZES, encode_team_sizes, score_leads
+
+
+def _random_leads(count, seed=3):
+    rng = random.Random(seed)
+    keywords = [term for group in NOTES_KEYWORD_GROUPS.values() for term in group["terms"]]
+    words = keywords + ["ASAP", "Growth", "jobs", "team", "quotes"]
+    team_sizes = [rng.choice(TEAM_SIZES + ["Unknown", None]) for _ in range(count)]
+    challenges = [rng.randint(0, 10) for _ in range(count)]
+    notes = [" ".join(rng.choices(words, k=rng.randint(0, 6))) for _ in range(count)]
+    revenue = [rng.choice([0, 2999, 3000, 5000, 6999, 7000, 9999.5, 10000, 25000]) for _ in range(count)]
+    return team_sizes, challenges, notes, revenue
+
+
+def test_batch_matches_scalar_scoring():
+    """Test that the vectorized scores equal calculate_lead_score for every lead."""
+    team_sizes, challenges, notes, revenue = _random_leads(2000)
+
+    scores = score_leads(
+        encode_team_sizes(team_sizes),
+        np.array(challenges),
+        np.array(notes, dtype=str),
+        np.array(revenue, dtype=np.float64)
+    )
+
+    expected = [
+        calculate_lead_score(team_size, num, note, value)
+        for team_size, num, note, value in zip(team_sizes, challenges, notes, revenue)
+    ]
+    assert scores.tolist() == expected
+
+
+def test_encode_unknown_team_size():
+    """Test that unrecognised team sizes get the default score."""
+    codes = encode_team_sizes(["Just me", "Unknown", None])
+    assert codes.tolist() == [0, -1, -1]
+
+    scores = score_leads(codes, np.array([1, 1, 1]), np.array(["", "", ""]), np.array([0.0, 0.0, 0.0]))
+    assert scores.tolist() == [calculate_lead_score("Just me", 1, "", 0)] * 3
@@ -0,0 +1,223 @@
+"""
+Tests for LLM retries, circuit breaking and hedging.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services.latency_model import LatencyStats
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCaller,
+    backoff_delay,
+    is_retryable,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 500.0
+
+    def __call__(self):
+        return self.now
+
+
+class CeilingRandom:
+    """Returns the top of the jitter range, exposing the backoff ceiling."""
+
+    def uniform(self, low, high):
+        return high
+
+
+def _status_error(code):
+    request = httpx.Request("POST", "http://llm.local/api/chat")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(code, request=request))
+
+
+@pytest.fixture
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_ATTEMPTS", 3)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    """Test closed -> open at the failure threshold."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    """Test that failures must be consecutive to open the circuit."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_lets_one_trial_through_after_timeout():
+    """Test open -> half_open after reset_timeout, and the trial outcomes."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+
+    clock.now += 29
+    assert not breaker.accepting
+    clock.now += 1
+    assert breaker.accepting
+    assert breaker.state == "open"  # accepting never starts a trial
+
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # only one trial at a time
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.opened_at == clock.now
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_backoff_ceiling_doubles_up_to_the_maximum(monkeypatch):
+    """Test the full-jitter ceiling per attempt."""
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 1.0)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 20.0)
+
+    ceilings = [backoff_delay(attempt, CeilingRandom()) for attempt in range(1, 7)]
+
+    assert ceilings == [1.0, 2.0, 4.0, 8.0, 16.0, 20.0]
+
+
+def test_backoff_is_jittered_within_the_ceiling(monkeypatch):
+    """Test that delays fall anywhere between zero and the ceiling."""
+    import random
+
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 1.0)
+    rng = random.Random(3)
+    delays = [backoff_delay(3, rng) for _ in range(200)]
+
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert min(delays) < 1.0 and max(delays) > 3.0
+
+
+def test_error_classification():
+    """Test which failures are retried."""
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert is_retryable(httpx.ReadTimeout("slow"))
+    assert is_retryable(_status_error(429))
+    assert is_retryable(_status_error(503))
+    assert not is_retryable(_status_error(400))
+    assert not is_retryable(ValueError("bad json"))
+
+
+def test_transient_failures_are_retried(no_retry_delay):
+    """Test that a retryable error is retried until it succeeds."""
+    caller = ResilientCaller(["http://a"], clock=FakeClock())
+    attempts = []
+
+    async def fn(endpoint):
+        attempts.append(endpoint)
+        if len(attempts) < 3:
+            raise httpx.ConnectError("refused")
+        return "ok"
+
+    assert asyncio.run(caller.call(fn)) == "ok"
+    assert len(attempts) == 3
+
+
+def test_permanent_failures_fail_fast(no_retry_delay):
+    """Test that a non-retryable error is raised without retrying."""
+    caller = ResilientCaller(["http://a"], clock=FakeClock())
+    attempts = []
+
+    async def fn(endpoint):
+        attempts.append(endpoint)
+        raise _status_error(400)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(caller.call(fn))
+    assert len(attempts) == 1
+    assert caller.breakers["http://a"].failures == 0
+
+
+def test_open_circuits_fail_over_then_raise(no_retry_delay, monkeypatch):
+    """Test that open endpoints are skipped, and that none open raises."""
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 1)
+    caller = ResilientCaller(["http://a", "http://b"], clock=FakeClock())
+    caller.breakers["http://a"].record_failure()
+
+    async def fn(endpoint):
+        return endpoint
+
+    assert asyncio.run(caller.call(fn)) == "http://b"
+
+    caller.breakers["http://b"].record_failure()
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(caller.call(fn))
+
+
+def _trained(p95, count=50):
+    return LatencyStats(ewma=p95, p50=p95, p95=p95, count=count)
+
+
+def test_hedge_waits_for_the_primary_p95(monkeypatch):
+    """Test that hedging uses the primary's p95 once enough samples exist."""
+    monkeypatch.setattr(settings, "LLM_HEDGING_ENABLED", True)
+    caller = ResilientCaller(["http://a", "http://b"])
+
+    assert caller._hedge_delay("http://a") is None
+    caller.latency["http://a"] = _trained(2.5, count=5)
+    assert caller._hedge_delay("http://a") is None
+    caller.latency["http://a"] = _trained(2.5)
+    assert caller._hedge_delay("http://a") == 2.5
+
+    monkeypatch.setattr(settings, "LLM_HEDGING_ENABLED", False)
+    assert caller._hedge_delay("http://a") is None
+
+
+def test_slow_primary_is_hedged_to_the_fallback(monkeypatch):
+    """Test that the fallback's answer wins when the primary exceeds its p95."""
+    monkeypatch.setattr(settings, "LLM_HEDGING_ENABLED", True)
+    caller = ResilientCaller(["http://a", "http://b"])
+    caller.latency["http://a"] = _trained(0.01)
+    called = []
+
+    async def fn(endpoint):
+        called.append(endpoint)
+        if endpoint == "http://a":
+            await asyncio.sleep(5)
+        return endpoint
+
+    start = time.monotonic()
+    assert asyncio.run(caller.call(fn)) == "http://b"
+    assert time.monotonic() - start < 1
+    assert called == ["http://a", "http://b"]
+
+
+def test_fast_primary_is_not_hedged(monkeypatch):
+    """Test that no second request is sent when the primary answers in time."""
+    monkeypatch.setattr(settings, "LLM_HEDGING_ENABLED", True)
+    caller = ResilientCaller(["http://a", "http://b"])
+    caller.latency["http://a"] = _trained(1.0)
+    called = []
+
+    async def fn(endpoint):
+        called.append(endpoint)
+        return endpoint
+
+    assert asyncio.run(caller.call(fn)) == "http://a"
+    assert called == ["http://a"]
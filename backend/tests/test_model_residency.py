@@ -0,0 +1,69 @@
+"""
+Tests for reloading evicted local model tiers.
+"""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.model_residency import ModelResidency
+
+GB = 1024 ** 3
+
+
+@pytest.fixture
+def residency(monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_LLM_WARMUP_TIERS", ["haiku", "opus"])
+    monkeypatch.setattr(settings, "LOCAL_HAIKU_MODEL", "small:14b")
+    monkeypatch.setattr(settings, "LOCAL_OPUS_MODEL", "large:72b")
+    monkeypatch.setattr(settings, "LOCAL_LLM_VRAM_GB", 64)
+
+    residency = ModelResidency()
+    residency.llm_type = "ollama"
+    residency.warmed = []
+    residency.loaded = {}
+
+    async def loaded_models(refresh=False):
+        return residency.loaded
+
+    async def model_sizes():
+        return {"small:14b": 9 * GB, "large:72b": 47 * GB}
+
+    async def warm_up(tiers=None, only_missing=False):
+        residency.warmed.extend(tiers)
+
+    residency.loaded_models = loaded_models
+    residency.model_sizes = model_sizes
+    residency.warm_up = warm_up
+    return residency
+
+
+def test_evicted_tier_is_reloaded_when_it_fits(residency):
+    """Test that a missing tier is reloaded next to the loaded ones."""
+    residency.loaded = {"small:14b": {"size_vram": 10 * GB}}
+
+    assert asyncio.run(residency.rewarm()) == ["large:72b"]
+    assert residency.warmed == ["opus"]
+
+
+def test_tier_that_does_not_fit_is_not_reloaded(residency, monkeypatch):
+    """Test that a reload never evicts the loaded models."""
+    monkeypatch.setattr(settings, "LOCAL_LLM_VRAM_GB", 48)
+    residency.loaded = {"small:14b": {"size_vram": 10 * GB}}
+
+    assert asyncio.run(residency.rewarm()) == []
+    assert residency.warmed == []
+
+
+def test_no_reload_while_requests_are_in_flight(residency):
+    """Test that re-warming waits for an idle server."""
+    residency.in_flight = 1
+
+    assert asyncio.run(residency.rewarm()) == []
+
+
+def test_no_reload_without_a_vram_budget(residency, monkeypatch):
+    """Test that reloads are off when the fit cannot be checked."""
+    monkeypatch.setattr(settings, "LOCAL_LLM_VRAM_GB", 0)
+
+    assert asyncio.run(residency.rewarm()) == []
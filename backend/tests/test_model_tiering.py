@@ -0,0 +1,36 @@
+"""
+Tests for off-peak tier upgrade retries.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.services.model_tiering import upgrade_due
+
+NOW = datetime(2026, 1, 10, 23, 0)
+
+
+@pytest.fixture(autouse=True)
+def retry_settings(monkeypatch):
+    monkeypatch.setattr(settings, "TIER_UPGRADE_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "TIER_UPGRADE_RETRY_HOURS", 12)
+
+
+def test_first_upgrade_is_due_immediately():
+    """Test outputs that were never upgraded (including legacy NULL counts)."""
+    assert upgrade_due(0, None, NOW)
+    assert upgrade_due(None, None, NOW)
+
+
+def test_failed_upgrades_back_off_exponentially():
+    """Test the wait doubling after each failed attempt."""
+    assert not upgrade_due(1, NOW - timedelta(hours=11), NOW)
+    assert upgrade_due(1, NOW - timedelta(hours=12), NOW)
+    assert not upgrade_due(2, NOW - timedelta(hours=23), NOW)
+    assert upgrade_due(2, NOW - timedelta(hours=24), NOW)
+
+
+def test_upgrades_stop_after_max_attempts():
+    """Test that an output that keeps failing is left alone."""
+    assert not upgrade_due(3, NOW - timedelta(days=30), NOW)
@@ -0,0 +1,70 @@
+"""
+Tests for cross-project output reuse helpers.
+"""
+import json
+
+from app.services.output_reuse import canonicalize_prompt, canonicalize_response, substitute, request_fingerprint
+
+LABELS = {"business_name": "Client: "}
+
+
+def _prompt(business_name, challenge="Quotes take too long"):
+    return f"Client: {business_name}\nTeam Size: 2-3 people\n\nChallenges:\n- {challenge}\n"
+
+
+def test_same_inputs_share_a_fingerprint_across_businesses():
+    """Test that only the labelled field differs between two leads' prompts."""
+    first = canonicalize_prompt(_prompt("Oak & Pine Joinery"), LABELS, {"business_name": "Oak & Pine Joinery"})
+    second = canonicalize_prompt(_prompt("Smith Kitchens"), LABELS, {"business_name": "Smith Kitchens"})
+
+    assert first == second
+    assert request_fingerprint("dashboard", "haiku", prompt=first) == request_fingerprint("dashboard", "haiku", prompt=second)
+    assert request_fingerprint("dashboard", "haiku", prompt=first) != request_fingerprint("dashboard", "sonnet", prompt=first)
+
+
+def test_values_outside_their_line_are_left_alone():
+    """Test that the value is only replaced on its labelled line."""
+    prompt = _prompt("Oak", challenge="Oak orders get lost")
+    canonical = canonicalize_prompt(prompt, LABELS, {"business_name": "Oak"})
+
+    assert canonical == _prompt("[[business_name]]", challenge="Oak orders get lost")
+
+
+def test_prompt_without_the_line_is_not_reused():
+    """Test that a missing line or empty value disables reuse."""
+    assert canonicalize_prompt("Team Size: 2-3 people\n", LABELS, {"business_name": "Oak"}) is None
+    assert canonicalize_prompt(_prompt(""), LABELS, {"business_name": ""}) is None
+
+
+def test_free_text_is_stored_only_without_the_value():
+    """Test that responses without output fields are stored verbatim or not at all."""
+    values = {"business_name": "Bespoke"}
+
+    assert canonicalize_response('{"tasks": ["Map enquiries"]}', values, []) == '{"tasks": ["Map enquiries"]}'
+    assert canonicalize_response('{"tasks": ["Fit bespoke doors"]}', values, []) is None
+
+
+def test_output_fields_round_trip():
+    """Test that a value in an output field is re-targeted at another business."""
+    response = json.dumps({"appName": "Smith Kitchens Command Center", "pages": []})
+    stored = canonicalize_response(response, {"business_name": "Smith Kitchens"}, ["appName"])
+
+    assert json.loads(stored) == {"appName": "[[business_name]] Command Center", "pages": []}
+    reused = substitute(stored, {"business_name": 'Jo\'s "Top" Kitchens'}, ["appName"])
+    assert json.loads(reused) == {"appName": 'Jo\'s "Top" Kitchens Command Center', "pages": []}
+
+
+def test_value_outside_output_fields_is_not_stored():
+    """Test that a response mentioning the value elsewhere is project-specific."""
+    response = json.dumps({"appName": "Smith Kitchens Command Center", "description": "For smith kitchens"})
+
+    assert canonicalize_response(response, {"business_name": "Smith Kitchens"}, ["appName"]) is None
+
+
+def test_free_model_output_is_never_rewritten():
+    """Test that common words matching the value survive reuse unchanged."""
+    response = json.dumps({"appName": "Oak Command Center", "features": ["Oak Smith tracking"]})
+
+    assert canonicalize_response(response, {"business_name": "Smith"}, ["appName"]) is None
+    stored = canonicalize_response(response, {"business_name": "Ash"}, ["appName"])
+    assert substitute(stored, {"business_name": "Elm"}, ["appName"]) == json.dumps(json.loads(response), ensure_ascii=False)
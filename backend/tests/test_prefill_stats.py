@@ -0,0 +1,36 @@
+"""
+Tests for prompt prefill statistics.
+"""
+import pytest
+
+from app.services.prefill_stats import PrefillTracker
+
+
+def test_saved_time_uses_uncached_token_cost():
+    """Test that cached tokens are costed at the observed per-token prefill rate."""
+    tracker = PrefillTracker()
+
+    # Cold request: 1000 tokens evaluated in 2s -> 2ms/token
+    tracker.record("overview", {"prompt_tokens": 1000, "cached_tokens": 0, "prefill_seconds": 2.0})
+    # Warm request: 900 of 1000 tokens served from cache
+    tracker.record("overview", {"prompt_tokens": 1000, "cached_tokens": 900, "prefill_seconds": 0.2})
+
+    stats = tracker.get("overview").to_dict()
+
+    assert stats["requests"] == 2
+    assert stats["cachedTokens"] == 900
+    assert stats["cacheHitRate"] == 0.45
+    assert stats["savedSeconds"] == pytest.approx(1.8, rel=0.01)
+
+
+def test_usage_without_prefill_fields_is_ignored():
+    """Test that API-style usage dicts are not recorded."""
+    tracker = PrefillTracker()
+    tracker.record("workflow", {"prompt_tokens": 500, "completion_tokens": 100, "total_tokens": 600})
+
+    assert tracker.get("workflow") is None
+    assert tracker.snapshot() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,69 @@
+"""
+Tests for the template proposal renderer.
+"""
+from types import SimpleNamespace
+
+from app.services.challenge_matcher import match_challenges_to_templates
+from app.services.proposal_renderer import CompiledHtml, render_proposal
+
+
+def _project(**overrides):
+    fields = dict(
+        client_name="Sam Taylor",
+        business_name="Oak & Pine <Joinery>",
+        challenges=["Quotes take too long to send", "I forget to invoice or invoice late"],
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def _context(challenges):
+    return match_challenges_to_templates(challenges)
+
+
+def test_compiled_html_escapes_values():
+    """Test that slot values are escaped unless the slot is *_html."""
+    template = CompiledHtml("<p>{{text}}</p>{{extra_html}}")
+    assert template.render(text="<b>&</b>", extra_html="<br>") == "<p>&lt;b&gt;&amp;&lt;/b&gt;</p><br>"
+
+
+def test_proposal_contains_systems_and_pricing():
+    """Test that each matched system, its price and the total appear."""
+    project = _project()
+    proposal = render_proposal(project, _context(project.challenges))
+
+    assert proposal.startswith("<html>")
+    assert "Quick Quote Builder" in proposal
+    assert "Automatic Invoicing" in proposal
+    assert "£3,500" in proposal and "£2,500" in proposal and "£6,000" in proposal
+    assert "Oak &amp; Pine &lt;Joinery&gt;" in proposal
+    assert "Hi Sam," in proposal
+
+
+def test_custom_summary_replaces_standard_one():
+    """Test that a model-written summary is used, one paragraph per block."""
+    project = _project()
+    proposal = render_proposal(project, _context(project.challenges), summary="First <para>.\n\nSecond.")
+
+    assert "<p>First &lt;para&gt;.</p><p>Second.</p>" in proposal
+    assert "Thanks for telling us" not in proposal
+
+
+def test_unknown_category_uses_default_copy():
+    """Test that categories without standard copy still render."""
+    context = {
+        "matched_templates": [{"challenge": "Stock runs out", "category": "stock_control", "base_price": 1500}],
+        "total_value": 1500,
+        "estimated_weeks": 2,
+    }
+    proposal = render_proposal(_project(challenges=["Stock runs out"]), context)
+
+    assert "Stock Control" in proposal
+    assert "Week 2: Final testing" in proposal
+
+
+def test_blank_client_name_greets_there():
+    """Test that a missing or whitespace-only client name falls back to "there"."""
+    for client_name in (None, "", "   "):
+        project = _project(client_name=client_name)
+        assert "Hi there," in render_proposal(project, _context(project.challenges))
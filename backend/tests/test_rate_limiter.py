@@ -0,0 +1,96 @@
+"""
+Tests for the in-process token-bucket rate limiter.
+"""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.rate_limiter import TokenBucket, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_full_bucket_allows_immediately():
+    """Test that a new bucket starts at capacity."""
+    bucket = TokenBucket(capacity=10, rate=1, clock=FakeClock())
+
+    assert bucket.time_until(10) == 0
+
+
+def test_empty_bucket_waits_for_refill():
+    """Test the wait computed from the refill rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=10, rate=2, clock=clock)
+    bucket.consume(10)
+
+    assert bucket.time_until(4) == pytest.approx(2.0)
+    clock.now += 2
+    assert bucket.time_until(4) == 0
+
+
+def test_refill_is_capped_at_capacity():
+    """Test that an idle bucket never exceeds its capacity."""
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=10, rate=5, clock=clock)
+    clock.now += 3600
+    bucket._refill()
+
+    assert bucket.tokens == 10
+
+
+def test_oversized_requests_wait_for_a_full_bucket():
+    """Test that a request larger than capacity is not blocked forever."""
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=10, rate=1, clock=clock)
+    bucket.consume(5)
+
+    assert bucket.time_until(50) == pytest.approx(5.0)
+
+
+def test_pause_delays_even_a_full_bucket():
+    """Test that a 429 backoff applies on top of available tokens."""
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=10, rate=1, clock=clock)
+    bucket.pause(30)
+    bucket.pause(5)  # A shorter pause never shortens the current one
+
+    assert bucket.time_until(1) == pytest.approx(30.0)
+    clock.now += 30
+    assert bucket.time_until(1) == 0
+
+
+def test_acquire_and_settle_charge_the_token_bucket(monkeypatch):
+    """Test that requests are charged an estimate and corrected with actual usage."""
+    monkeypatch.setattr(settings, "API_RATE_LIMITS", {"anthropic": {"rpm": 60, "tpm": 6000}})
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock)
+
+    async def run():
+        await limiter.acquire("anthropic", "model-a", 1000)
+        await limiter.settle("anthropic", "model-a", 1000, 3000)
+
+    asyncio.run(run())
+    requests, tokens = limiter._buckets[("anthropic", "model-a")]
+
+    assert requests.tokens == 59
+    assert tokens.tokens == 3000
+    # Refills 100 tokens/s: 3000 are available now, 4000 in 10s
+    assert tokens.time_until(3000) == 0
+    assert tokens.time_until(4000) == pytest.approx(10.0)
+
+
+def test_unlimited_providers_are_not_tracked(monkeypatch):
+    """Test that providers without configured limits pass straight through."""
+    monkeypatch.setattr(settings, "API_RATE_LIMITS", {})
+    limiter = RateLimiter(clock=FakeClock())
+
+    asyncio.run(limiter.acquire("gemini", "model-b", 1000))
+
+    assert limiter.snapshot() == {}
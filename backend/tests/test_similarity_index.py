@@ -0,0 +1,53 @@
+"""
+Tests for the hashed TF-IDF similarity index.
+"""
+import numpy as np
+
+from app.utils.similarity_index import SimilarityIndex, hashed_counts
+
+
+def _index():
+    return SimilarityIndex({
+        "quotes": "Quotes take too long to send; pricing estimates is slow",
+        "invoices": "I forget to invoice or invoice late",
+        "reviews": "I don't ask for reviews or testimonials often enough",
+    })
+
+
+def test_search_ranks_most_similar_first():
+    """Test that a paraphrase finds its document first."""
+    results = _index().search("it takes ages to get a quote out", k=2)
+    assert results[0][0] == "quotes"
+    assert results[0][1] > results[1][1]
+
+
+def test_word_variants_match():
+    """Test that character trigrams match plural and inflected forms."""
+    assert _index().search("unpaid invoices", k=1)[0][0] == "invoices"
+
+
+def test_identical_text_has_similarity_one():
+    """Test that vectors are normalised, so a document matches itself at 1.0."""
+    index = _index()
+    assert np.isclose(index.search("I forget to invoice or invoice late", k=1)[0][1], 1.0)
+
+
+def test_min_similarity_and_unrelated_text():
+    """Test that stop words and unrelated text find nothing above the threshold."""
+    index = _index()
+    assert index.search("the and of", k=3) == []
+    assert index.search("Something else", k=3, min_similarity=0.25) == []
+
+
+def test_similarities_many_matches_single_queries():
+    """Test the batched scoring against one query at a time, including empty texts."""
+    index = _index()
+    texts = ["a quote", "", "late invoices and reviews", "the"]
+    expected = np.stack([index.similarities(text) for text in texts])
+    assert np.allclose(index.similarities_many(texts), expected)
+
+
+def test_hashing_is_stable():
+    """Test that feature buckets don't depend on the process (no hash())."""
+    assert hashed_counts("quote", 4096) == hashed_counts("Quote!", 4096)
+    assert sorted(hashed_counts("quote", 4096)) == sorted(hashed_counts("quote", 4096))
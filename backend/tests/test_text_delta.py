@@ -0,0 +1,39 @@
+"""
+Tests for text deltas used by agent output history.
+"""
+from app.utils.text_delta import compress, decompress, make_delta, apply_delta
+
+
+PROPOSAL = "".join(
+    f"<h3>{i}. System {i}</h3>\n<p>Saves around {i} hours a week.</p>\n" for i in range(1, 40)
+)
+
+
+def test_round_trip():
+    """Test that applying a delta rebuilds the target exactly."""
+    target = PROPOSAL.replace("System 7", "Quote Builder").replace("<h3>30.", "<h3>Thirty.") + "<p>Thanks</p>"
+
+    assert apply_delta(PROPOSAL, make_delta(PROPOSAL, target)) == target
+
+
+def test_single_line_html_is_diffed_by_tag():
+    """Test that HTML with no newlines still produces a small delta."""
+    base = PROPOSAL.replace("\n", "")
+    target = base.replace("Saves around 12 hours", "Saves around 20 hours")
+    delta = make_delta(base, target)
+
+    assert apply_delta(base, delta) == target
+    assert len(delta) < len(compress(target)) / 4
+
+
+def test_unrelated_texts_and_empty_texts():
+    """Test deltas with nothing in common, and to or from empty text."""
+    for base, target in [("abc\n", "xyz\n"), ("", PROPOSAL), (PROPOSAL, ""), ("", "")]:
+        assert apply_delta(base, make_delta(base, target)) == target
+
+
+def test_compress_keeps_none():
+    """Test that missing texts stay missing."""
+    assert compress(None) is None
+    assert decompress(None) is None
+    assert decompress(compress("£6,000 – café")) == "£6,000 – café"
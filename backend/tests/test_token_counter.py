@@ -0,0 +1,46 @@
+"""
+Tests for tokenizer-based token counting.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from app.services.token_counter import TokenCounter, COUNT_CACHE_SIZE
+
+
+class _Tokenizer:
+    """Counts words; records how often it encodes."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, add_special_tokens=False):
+        self.calls += 1
+        return SimpleNamespace(ids=text.split())
+
+
+def test_counts_are_cached_per_instance():
+    """Test that repeated text is encoded once and the cache stays bounded."""
+    counter = TokenCounter()
+    tokenizer = _Tokenizer()
+    counter._tokenizers["qwen2"] = tokenizer
+
+    assert counter.count("one two three", "local", "qwen2.5:7b") == 3
+    assert counter.count("one two three", "local", "qwen2.5:7b") == 3
+    assert tokenizer.calls == 1
+
+    for i in range(COUNT_CACHE_SIZE + 10):
+        counter.count(f"text {i}", "local", "qwen2.5:7b")
+    assert len(counter._counts) == COUNT_CACHE_SIZE
+    assert TokenCounter()._counts == {}
+
+
+def test_loading_a_tokenizer_clears_cached_counts(monkeypatch):
+    """Test that counts made with an earlier tokenizer are not reused."""
+    counter = TokenCounter()
+    counter._tokenizers["qwen2"] = _Tokenizer()
+    counter.count("one two three", "local", "qwen2.5:7b")
+
+    monkeypatch.setattr(counter, "load", lambda: None)
+    asyncio.run(counter._load_in_background())
+
+    assert counter._counts == {}
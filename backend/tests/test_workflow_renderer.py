@@ -0,0 +1,104 @@
+"""
+Tests for the workflow template renderer.
+"""
+from datetime import datetime
+from types import SimpleNamespace
+import uuid
+
+from app.services.workflow_renderer import (
+    CompiledTemplate,
+    WorkflowRenderer,
+    describe_workflow,
+)
+
+
+WORKFLOW = {
+    "name": "Enquiry capture for [[business_name]]",
+    "nodes": [
+        {"name": "Facebook Lead Ad", "type": "n8n-nodes-base.facebookLeadAdsTrigger"},
+        {"name": "Tidy fields", "type": "n8n-nodes-base.set"},
+        {"name": "Log enquiry", "type": "n8n-nodes-base.googleSheets",
+         "parameters": {"sheet": "[[business_name]] enquiries", "sources": "[[enquiry_sources]]"}},
+        {"name": "Text owner", "type": "n8n-nodes-base.twilio",
+         "parameters": {"to": "[[client_phone]]", "message": "New enquiry via [[enquiry_sources]]"}},
+    ],
+}
+
+PARAMETERS = {
+    "business_name": 'Oak & "Pine" Joinery',
+    "client_phone": "+447700900000",
+    "enquiry_sources": ["Website", "Facebook"],
+}
+
+
+def _template(**overrides):
+    fields = dict(
+        id=uuid.uuid4(), name="Enquiry capture", slug="multi_channel_enquiry_capture",
+        description="Capture leads from every channel", estimated_hours=8,
+        updated_at=datetime(2024, 1, 1), n8n_workflow_json=WORKFLOW,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_render_substitutes_and_escapes():
+    """Test substitution inside strings, with JSON-special characters escaped."""
+    workflow, missing = CompiledTemplate(WORKFLOW).render(PARAMETERS)
+
+    assert workflow["name"] == 'Enquiry capture for Oak & "Pine" Joinery'
+    assert workflow["nodes"][2]["parameters"]["sheet"] == 'Oak & "Pine" Joinery enquiries'
+    assert workflow["nodes"][3]["parameters"]["message"] == "New enquiry via Website, Facebook"
+    assert missing == []
+
+
+def test_whole_value_placeholder_keeps_type():
+    """Test that a string that is only a placeholder takes the parameter's value."""
+    workflow, _ = CompiledTemplate(WORKFLOW).render(PARAMETERS)
+    assert workflow["nodes"][2]["parameters"]["sources"] == ["Website", "Facebook"]
+
+
+def test_missing_parameters_are_left_and_reported():
+    """Test that unfilled placeholders stay in place and are reported."""
+    workflow, missing = CompiledTemplate(WORKFLOW).render({**PARAMETERS, "client_phone": None})
+
+    assert workflow["nodes"][3]["parameters"]["to"] == "[[client_phone]]"
+    assert missing == ["client_phone"]
+
+
+def test_render_does_not_modify_template():
+    """Test that rendering returns a new workflow each time."""
+    plan = CompiledTemplate(WORKFLOW)
+    first, _ = plan.render(PARAMETERS)
+    first["nodes"].clear()
+
+    second, _ = plan.render(PARAMETERS)
+    assert len(second["nodes"]) == 4
+    assert WORKFLOW["name"] == "Enquiry capture for [[business_name]]"
+
+
+def test_plans_are_cached_per_template_version():
+    """Test that a template is compiled once until it is updated."""
+    renderer = WorkflowRenderer(max_plans=2)
+    template = _template()
+
+    assert renderer.plan_for(template) is renderer.plan_for(template)
+    assert renderer.compiled == 1
+
+    template.updated_at = datetime(2024, 2, 1)
+    renderer.plan_for(template)
+    assert renderer.compiled == 2
+
+    renderer.plan_for(_template())
+    assert renderer.snapshot()["cachedPlans"] == 2
+
+
+def test_describe_workflow():
+    """Test the workflow specification built from the rendered nodes."""
+    workflow, _ = CompiledTemplate(WORKFLOW).render(PARAMETERS)
+    spec = describe_workflow(_template(), workflow)
+
+    assert spec["trigger"] == "Facebook Lead Ad"
+    assert spec["steps"] == ["1. Tidy fields", "2. Log enquiry", "3. Text owner"]
+    assert spec["integrations"] == ["Facebook Lead Ads", "Google Sheets", "Twilio"]
+    assert spec["estimated_build_time"] == "8 hours"
+    assert spec["source"] == "template"